@@ -19,5 +19,6 @@ done)
 echo "PARSING ..."
 
 (cd processing
+echo "python3 extractRawContent.py"
 echo "python3 parseRawData.py"
 echo "python3 getStatistics.py")
\ No newline at end of file
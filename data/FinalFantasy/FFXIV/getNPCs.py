@@ -117,7 +117,11 @@ if not skipDownloads:
 					
 	dataKeys = [x for x in get_keys_recursively(data["text"])]
 	dataKeys = list(set(dataKeys))
-	dataKeys = [x for x in dataKeys if not x in allNPCs]
+	# Skip keys that are NPC names, since their pages have already been downloaded
+	#  (only exact matches: the parsing below names each character after
+	#  its file, so variants like "Dr X" need their own file)
+	npcNames = set([name for name,link in allNPCs])
+	dataKeys = [x for x in dataKeys if not x in npcNames]
 
 	for key in dataKeys:
 		fn = "raw/npcs/"+key+".html"
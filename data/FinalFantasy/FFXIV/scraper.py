@@ -3,11 +3,13 @@
 #  Load the category pages, then download each link within it.
 
 from urllib.request import *
-import time
-from os import path
+import time, sys
 import re
 
 from bs4 import BeautifulSoup
+# Raw files are saved to the game's raw store if it has one (see processing/parsers/rawStore.py)
+sys.path.append("../../../processing")
+from parsers import rawStore
 
 def loadPage(page):
 	req = Request(
@@ -35,18 +37,16 @@ indexPages = [
 
 
 # Save all category pages to single index file
-if not path.exists("raw/indexPage.txt"):
+if not rawStore.rawExists("raw/indexPage.txt"):
 	print("Downloading index pages ...")
 	iText= ""
 	for iPage in indexPages:
 		iText += loadPage(iPage)
 		time.sleep(2)
-	o = open("raw/indexPage.txt",'w')
-	o.write(iText)
-	o.close()
+	rawStore.saveRaw("raw/indexPage.txt",iText)
 
 # Open index page
-o = open("raw/indexPage.txt")
+o = rawStore.openRaw("raw/indexPage.txt")
 categoryPage = o.read()
 o.close()
 
@@ -60,7 +60,7 @@ pages = list(set(pages))
 for page in pages:
 	print(page)
 	fileName = "raw/page_"+page.replace("/","#")+".html"
-	if not path.exists(fileName):
+	if not rawStore.rawExists(fileName):
 		html = loadPage(base+page)
 		time.sleep(3)
 		dialogue = ""
@@ -68,7 +68,5 @@ for page in pages:
 			soup = BeautifulSoup(html, 'html.parser')	
 			dialogue = soup.find("div", {"id":"mw-content-text"})
 		# Write the file no matter what, so we know we processed it
-		o = open(fileName,'w')
-		o.write(str(dialogue))
-		o.close()
+		rawStore.saveRaw(fileName,str(dialogue))
 		
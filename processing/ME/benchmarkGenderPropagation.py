@@ -0,0 +1,95 @@
+# Compare the time taken to find female-only and male-only lines with
+#  propagateGender (in followMEDialogue.py) and with the recursive
+#  walk that it replaced, and check that they find the same lines.
+# Results are written to ../../results/genderPropagationBenchmark.csv
+
+import json, csv, time, sys
+from copy import deepcopy
+from followMEDialogue import getConvLinks, propagateGender, getGenderOnlyLines
+
+games = ["MassEffect1B","MassEffect2","MassEffect3C"]
+
+def walkLinksRecursive(links,idToLine):
+	# The original walk: follows every path, but stops following
+	#  a link after it has been followed 50 times
+	id2Gender = {"START":"START"}
+	seenLinks = {}
+	def walkLinks(startID, status=""):
+		if startID in links:
+			switchStatus = False
+			for desitnationID in links[startID]:
+				destLine = idToLine[desitnationID]
+				if destLine.count("Shepard is female")>0:
+					status = "F"
+					switchStatus = True
+				elif destLine.count("Shepard is male")>0:
+					status = "M"
+					switchStatus = True
+				if not desitnationID in id2Gender:
+					id2Gender[desitnationID] = []
+				if status != "":
+					if not status in id2Gender[desitnationID]:
+						id2Gender[desitnationID].append(status)
+				if not (startID,desitnationID) in seenLinks:
+					seenLinks[(startID,desitnationID)] = 0
+				seenLinks[(startID,desitnationID)] += 1
+				if seenLinks[(startID,desitnationID)]<50:
+					walkLinks(desitnationID,status)
+				if switchStatus:
+					if status == "F":
+						status = "M"
+					elif status == "M":
+						status = "F"
+	walkLinks("START")
+	return(id2Gender)
+
+def getConversations(lines):
+	seq = []
+	for line in lines:
+		if "LOCATION" in line:
+			if len(seq)>0:
+				yield(seq)
+			seq = []
+		else:
+			seq.append(line)
+	if len(seq)>0:
+		yield(seq)
+
+def timeWalk(walk,convLinks):
+	startTime = time.perf_counter()
+	results = []
+	for links,idToLine in convLinks:
+		try:
+			results.append(getGenderOnlyLines(walk(links,idToLine),idToLine))
+		except RecursionError:
+			results.append(None)
+	return(time.perf_counter()-startTime, results)
+
+if __name__ == "__main__":
+	if len(sys.argv)>1:
+		games = sys.argv[1:]
+	out = [["game","conversations","links","recursiveSeconds","worklistSeconds","recursionErrors","conversationsDifferent"]]
+	for game in games:
+		with open("../../data/MassEffect/"+game+"/data.json") as json_file:
+			lines = json.load(json_file)["text"]
+		convLinks = []
+		for seq in getConversations(lines):
+			try:
+				convLinks.append(getConvLinks(deepcopy(seq)))
+			except (IndexError, KeyError):
+				pass
+		numLinks = sum([sum([len(x) for x in links.values()]) for links,idToLine in convLinks])
+		recursiveTime,recursiveResults = timeWalk(walkLinksRecursive,convLinks)
+		worklistTime,worklistResults = timeWalk(propagateGender,convLinks)
+		recursionErrors = len([x for x in recursiveResults if x is None])
+		numDifferent = 0
+		for a,b in zip(recursiveResults,worklistResults):
+			if not a is None and (set(a[0])!=set(b[0]) or set(a[1])!=set(b[1])):
+				numDifferent += 1
+		print(game+": recursive "+str(round(recursiveTime,3))+"s, worklist "+str(round(worklistTime,3))+"s, "+str(numDifferent)+" conversations different")
+		out.append([game,len(convLinks),numLinks,round(recursiveTime,4),round(worklistTime,4),recursionErrors,numDifferent])
+
+	with open("../../results/genderPropagationBenchmark.csv",'w') as csvfile:
+		csvwriter = csv.writer(csvfile)
+		for x in out:
+			csvwriter.writerow(x)
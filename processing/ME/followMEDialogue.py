@@ -1,19 +1,18 @@
 import json,csv
 
 
-def followConv(lines,loc):
-
+def getConvLinks(lines):
 	# Make dictionary of ids to content,
 	# and links between IDs
 	links = {}
 	idToLine = {"START":"START"}
-	def getConvLinks(lines, prevLink = "START"):
+	def addConvLinks(lines, prevLink = "START"):
 		for line in lines:
 			mainKey = [x for x in line if not x.startswith("_")][0]
 			if mainKey == "CHOICE":
 				choices = line["CHOICE"]
 				for choice in choices:
-					getConvLinks(choice,prevLink)
+					addConvLinks(choice,prevLink)
 			elif mainKey == "GOTO":
 				try:
 					links[prevLink].append(line["GOTO"])
@@ -36,61 +35,18 @@ def followConv(lines,loc):
 						links[prevLink] = [sid]
 					prevLink = sid
 				
-	getConvLinks(lines)
+	addConvLinks(lines)
+	return((links,idToLine))
+
+def followConv(lines,loc):
+	links,idToLine = getConvLinks(lines)
 				
 	# Now walk through the links, keeping track of gender
 	# assignments to each ID
-	
-	id2Gender = {"START":"START"}
-	
-	seenIDs = {}
-	seenLinks = {}
-	def walkLinks(startID, status=""):
-		if startID in links:
-			switchStatus = False
-			for desitnationID in links[startID]:
-				# (destline is string)
-				destLine = idToLine[desitnationID]
-				# Detect change in status
-				if destLine.count("Shepard is female")>0:
-					status = "F"
-					switchStatus = True
-				elif destLine.count("Shepard is male")>0:
-					status = "M"
-					switchStatus = True
-				# Add to id2Gender
-				if not desitnationID in id2Gender:
-					id2Gender[desitnationID] = []
-				if status != "":
-					if not status in id2Gender[desitnationID]:
-						id2Gender[desitnationID].append(status)
-				
-				# Should we continue?
-				# Keep track of links we've done already, assume we won't go through the 
-				# same link more than 10 times
-				if not (startID,desitnationID) in seenLinks:
-					seenLinks[(startID,desitnationID)] = 0
-				seenLinks[(startID,desitnationID)] += 1
-				if seenLinks[(startID,desitnationID)]<50:
-					walkLinks(desitnationID,status)
-				# If the gender status has been set, then we need to 
-				# make all the subsequent alternative destinations be the opposite
-				if switchStatus:
-					if status == "F":
-						status = "M"
-					elif status == "M":
-						status = "F"
-	walkLinks("START")
+	id2Gender = propagateGender(links,idToLine)
 	#print(id2Gender)
 	
-	femaleOnlyLines = []
-	maleOnlyLines = []
-	for lineID in id2Gender:
-		if idToLine[lineID].count("ACTION")==0 and idToLine[lineID].count("STATUS")==0:
-			if id2Gender[lineID] == ["F"]:
-				femaleOnlyLines.append(idToLine[lineID])
-			if id2Gender[lineID] == ["M"]:
-				maleOnlyLines.append(idToLine[lineID])
+	femaleOnlyLines,maleOnlyLines = getGenderOnlyLines(id2Gender,idToLine)
 
 	out = []
 	longestListLength = max([len(femaleOnlyLines),len(maleOnlyLines)])
@@ -139,6 +95,68 @@ def followConv(lines,loc):
 	#	outfile.write(gv)
 		
 
+def getGenderOnlyLines(id2Gender,idToLine):
+	femaleOnlyLines = []
+	maleOnlyLines = []
+	for lineID in id2Gender:
+		if idToLine[lineID].count("ACTION")==0 and idToLine[lineID].count("STATUS")==0:
+			if id2Gender[lineID] == ["F"]:
+				femaleOnlyLines.append(idToLine[lineID])
+			if id2Gender[lineID] == ["M"]:
+				maleOnlyLines.append(idToLine[lineID])
+	return((femaleOnlyLines,maleOnlyLines))
+
+def destinationStatuses(links,idToLine,startID,status):
+	# The gender status passed on to each destination of startID
+	out = []
+	switchStatus = False
+	for desitnationID in links.get(startID,[]):
+		# (destline is string)
+		destLine = idToLine[desitnationID]
+		# Detect change in status
+		if destLine.count("Shepard is female")>0:
+			status = "F"
+			switchStatus = True
+		elif destLine.count("Shepard is male")>0:
+			status = "M"
+			switchStatus = True
+		out.append((desitnationID,status))
+		# If the gender status has been set, then we need to 
+		# make all the subsequent alternative destinations be the opposite
+		if switchStatus:
+			if status == "F":
+				status = "M"
+			elif status == "M":
+				status = "F"
+	return(out)
+
+def propagateGender(links,idToLine):
+	# Walk through the links, keeping track of the gender statuses
+	#  ("F", "M", or "" for not known yet) that can reach each ID.
+	# Each (ID, status) state is only walked from once, so this takes
+	#  time in proportion to the number of links, and uses a stack
+	#  rather than recursion. The states are visited in the same
+	#  depth-first order as following the links.
+	id2Gender = {"START":"START"}
+	seenStates = set([("START","")])
+	stack = [iter(destinationStatuses(links,idToLine,"START",""))]
+	while len(stack)>0:
+		for desitnationID,status in stack[-1]:
+			# Add to id2Gender
+			if not desitnationID in id2Gender:
+				id2Gender[desitnationID] = []
+			if status != "":
+				if not status in id2Gender[desitnationID]:
+					id2Gender[desitnationID].append(status)
+			# Should we continue?
+			if not (desitnationID,status) in seenStates:
+				seenStates.add((desitnationID,status))
+				stack.append(iter(destinationStatuses(links,idToLine,desitnationID,status)))
+				break
+		else:
+			stack.pop()
+	return(id2Gender)
+
 def getGenderDifferentLines(inFileName,outFileName):
 	with open(inFileName) as json_file:
 		lines = json.load(json_file)["text"]		
@@ -169,8 +187,9 @@ def getGenderDifferentLines(inFileName,outFileName):
 		for x in out:
 			csvwriter.writerow(x)
 		
-getGenderDifferentLines("../../data/MassEffect/MassEffect3C/data.json","../../results/doNotShare/ME/ShepGender/ME3_GenderDifferences.csv")
+if __name__ == "__main__":
+	getGenderDifferentLines("../../data/MassEffect/MassEffect3C/data.json","../../results/doNotShare/ME/ShepGender/ME3_GenderDifferences.csv")
 
-getGenderDifferentLines("../../data/MassEffect/MassEffect2/data.json","../../results/doNotShare/ME/ShepGender/ME2_GenderDifferences.csv")
+	getGenderDifferentLines("../../data/MassEffect/MassEffect2/data.json","../../results/doNotShare/ME/ShepGender/ME2_GenderDifferences.csv")
 
-getGenderDifferentLines("../../data/MassEffect/MassEffect1B/data.json","../../results/doNotShare/ME/ShepGender/ME1_GenderDifferences.csv")
+	getGenderDifferentLines("../../data/MassEffect/MassEffect1B/data.json","../../results/doNotShare/ME/ShepGender/ME1_GenderDifferences.csv")
@@ -1,37 +1,17 @@
-import json,csv
-from textatistic import word_array
-
-with open("../../data/MassEffect/MassEffect1B/data.json") as json_file:
-	ME1lines = json.load(json_file)["text"]
-with open("../../data/MassEffect/MassEffect2/data.json") as json_file:
-	ME2lines = json.load(json_file)["text"]
-with open("../../data/MassEffect/MassEffect3C/data.json") as json_file:
-	ME3lines = json.load(json_file)["text"]
+import json,csv,sys
+sys.path.append("..")
+from corpusIndex import CorpusIndex
+
+# Index all lines once, then each search is a lookup in the index
+index = CorpusIndex()
+index.addDataFile("ME1","../../data/MassEffect/MassEffect1B/data.json")
+index.addDataFile("ME2","../../data/MassEffect/MassEffect2/data.json")
+index.addDataFile("ME3","../../data/MassEffect/MassEffect3C/data.json")
 	
 
-def getTextByCue(lines,cues,speakers=[]):
-	if isinstance(lines,dict):
-		mainKey = [x for x in lines if not x.startswith("_")][0]
-		mainVal = lines[mainKey]
-		if isinstance(mainVal,str):
-			if len(speakers)==0 or mainKey in speakers:
-				mainVal = mainVal.lower()
-				# If there are no cues, return the line
-				if len(cues)==0:
-					yield lines
-				# Check if cue appears anywhere
-				elif any([mainVal.count(cue)>0 for cue in cues]):
-					# Check if cue is a word
-					tokens = word_array(mainVal)
-					if any([cue in tokens for cue in cues]):
-						yield lines
-		else:
-			for result in getTextByCue(mainVal,cues,speakers):
-				yield result
-	elif isinstance(lines,list):
-		for line in lines:
-			for result in getTextByCue(line,cues,speakers):
-				yield result
+def getTextByCue(game,cues,speakers=[]):
+	# Lines by any of the speakers that contain any of the cues as a word
+	return(index.search(cues,speakers,[game]))
 
 def writeToCSV(lines,fileName):
 	with open(fileName, 'w') as csvfile:
@@ -47,9 +27,9 @@ def writeToCSV(lines,fileName):
 			csvwriter.writerow([idx,mainKey,dialogue])
 
 def getCues(cues,speakers, filePrefix):
-	writeToCSV(getTextByCue(ME1lines, cues,speakers),filePrefix+"_ME1.csv")
-	writeToCSV(getTextByCue(ME2lines, cues,speakers),filePrefix+"_ME2.csv")
-	writeToCSV(getTextByCue(ME3lines, cues,speakers),filePrefix+"_ME3.csv")
+	writeToCSV(getTextByCue("ME1", cues,speakers),filePrefix+"_ME1.csv")
+	writeToCSV(getTextByCue("ME2", cues,speakers),filePrefix+"_ME2.csv")
+	writeToCSV(getTextByCue("ME3", cues,speakers),filePrefix+"_ME3.csv")
 
 # cues should be lowercase
 getCues(["benezia"],[],"../../results/doNotShare/ME/Antagonists/Antagonists_BeneziaAbout")
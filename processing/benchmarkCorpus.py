@@ -0,0 +1,231 @@
+# Benchmarks for the main stages of building the corpus, on synthetic scripts.
+#  A script in the corpus format is generated with a given number of
+#  top-level lines, choice depth, options per choice, number of speakers
+#  and number of aliases (see makeScript), then each stage is timed:
+#  - aliases: parseRawData.changeAliasMulitlevel_applyMetaFileOrder
+#  - writeData: parseRawData.writeData
+#  - getStats: getStatistics.getStats
+#  - walkLines / walkLinesRandom: getChoiceVariation
+#  - walkDialogue: dialogueTransitions.walkDialogue
+#  - keyness counting: keyness.countWordsByGroup
+#  The analysis scripts run over the whole corpus when imported, so only
+#  their imports and function definitions are loaded (see loadFunctions).
+#  Stages that need a missing library are reported as skipped.
+#
+#  Results are written to ../results/benchmarks/[name].json and .csv
+#  Use --compare with an earlier result file to check for regressions.
+#  > python3 benchmarkCorpus.py
+#  > python3 benchmarkCorpus.py --lines 20000 --depth 4 --branching 3 --name large
+#  > python3 benchmarkCorpus.py --compare ../results/benchmarks/baseline.json
+
+import os, sys, ast, copy, json, csv, time, random, platform, argparse, tempfile, shutil, statistics
+
+def loadFunctions(scriptFile,names):
+	""" Return a namespace with the imports and function definitions from
+		a script, without running the rest of it. Imports that fail are
+		skipped, so functions that need them will fail when called. """
+	with open(scriptFile) as f:
+		tree = ast.parse(f.read(), scriptFile)
+	namespace = {"__name__": "benchmark_"+os.path.basename(scriptFile).replace(".py","")}
+	missing = []
+	for node in tree.body:
+		if isinstance(node,(ast.Import,ast.ImportFrom)):
+			try:
+				exec(compile(ast.Module(body=[node],type_ignores=[]),scriptFile,"exec"),namespace)
+			except Exception as e:
+				missing.append(ast.unparse(node)+" ("+type(e).__name__+")")
+		elif isinstance(node,ast.FunctionDef):
+			exec(compile(ast.Module(body=[node],type_ignores=[]),scriptFile,"exec"),namespace)
+	for name in names:
+		if not name in namespace:
+			raise ValueError("No function "+name+" in "+scriptFile)
+	namespace["_missingImports"] = missing
+	return(namespace)
+
+##################
+# Synthetic scripts
+
+words = ["the","a","you","I","we","to","of","and","is","it","that","what","go","must","never",
+	"dragon","city","king","sword","home","night","friend","war","light","here","there","now",
+	"why","know","think","come","back","over","through","please","sorry","yes","no","well"]
+
+def makeLine(rnd,speakers):
+	speaker = rnd.choice(speakers)
+	numWords = rnd.randint(2,25)
+	text = " ".join(rnd.choice(words) for i in range(numWords))
+	text = text[0].upper()+text[1:]+rnd.choice([".",".",".","!","?","..."])
+	if rnd.random()<0.1:
+		text = "(quietly) "+text
+	line = {speaker: text}
+	if rnd.random()<0.1:
+		line["_ID"] = str(rnd.randint(0,100000))
+	return(line)
+
+def makeSequence(rnd,numLines,speakers,depth,branching,choiceProb):
+	out = []
+	for i in range(numLines):
+		if depth>0 and rnd.random()<choiceProb:
+			options = [makeSequence(rnd,rnd.randint(1,6),speakers,depth-1,branching,choiceProb) for j in range(branching)]
+			out.append({"CHOICE": options})
+		elif rnd.random()<0.05:
+			out.append({rnd.choice(["ACTION","NARRATIVE","LOCATION"]): "Something happens."})
+		else:
+			out.append(makeLine(rnd,speakers))
+	return(out)
+
+def makeScript(numLines=5000,depth=3,branching=3,numSpeakers=50,numAliases=20,choiceProb=0.05,seed=1):
+	""" Returns (script, meta) for a synthetic game.
+		Some lines are spoken by aliases of the speakers, which the
+		meta file maps back to the speakers. """
+	rnd = random.Random(seed)
+	speakers = ["Speaker "+str(i) for i in range(numSpeakers)]
+	aliases = {}
+	for i in range(numAliases):
+		target = "Alias "+str(i)
+		kind = i%3
+		if kind==0:
+			aliases[target] = rnd.choice(speakers)
+		elif kind==1:
+			# Split a line between two speakers
+			aliases[target] = rnd.sample(speakers,2)
+		else:
+			# Choose the speaker by how the line starts
+			aliases[target] = {rnd.choice(speakers): [w.capitalize() for w in rnd.sample(words,3)], rnd.choice(speakers): ["(quietly)"]}
+	script = makeSequence(rnd,numLines,speakers+list(aliases.keys()),depth,branching,choiceProb)
+	groups = {"male": speakers[0::3], "female": speakers[1::3], "neutral": speakers[2::3]}
+	meta = {"game": "Benchmark", "series": "Benchmark", "characterGroups": groups, "aliases": aliases,
+		"parserParameters": {}}
+	return((script,meta))
+
+def countLines(lines):
+	n = 0
+	for line in lines:
+		if "CHOICE" in line:
+			for option in line["CHOICE"]:
+				n += countLines(option)
+		else:
+			n += 1
+	return(n)
+
+##################
+# Benchmarks
+
+def timeStage(func,setup,repeats):
+	# setup() makes fresh arguments for each run (not timed)
+	times = []
+	for r in range(repeats):
+		args = setup()
+		startTime = time.perf_counter()
+		func(*args)
+		times.append(time.perf_counter()-startTime)
+	return(times)
+
+def makeStages(script,meta,tmpFolder):
+	parseRawData = loadFunctions("parseRawData.py",["changeAliasMulitlevel_applyMetaFileOrder","writeData"])
+	getStatistics = loadFunctions("getStatistics.py",["getStats"])
+	getChoiceVariation = loadFunctions("getChoiceVariation.py",["walkLines","walkLinesRandom"])
+	dialogueTransitions = loadFunctions("dialogueTransitions.py",["walkDialogue"])
+	keyness = loadFunctions("keyness.py",["countWordsByGroup"])
+	from corpusHelpers import getAllCharacterTexts, getNameToGroup
+
+	aliasedScript = parseRawData["changeAliasMulitlevel_applyMetaFileOrder"](copy.deepcopy(script),meta["aliases"])
+	nameToGroup = getNameToGroup(meta)
+	texts = [x for x in getAllCharacterTexts(aliasedScript) if len(x)>0]
+	allChoices = [x for x in aliasedScript if "CHOICE" in x]
+	# Tokenised lines by speaker, as in keyness.py
+	charDialogue = {}
+	for charName,dialogue in getAllCharacterTexts(aliasedScript,getNames=True):
+		key = ("","","",nameToGroup.get(charName,""),charName)
+		charDialogue.setdefault(key,[]).append(dialogue.lower().split())
+
+	def walkLinesAll(allChoices):
+		return([getChoiceVariation["walkLines"]([x],nameToGroup) for x in allChoices])
+	def walkLinesRandom100(allChoices):
+		random.seed(1)
+		return([getChoiceVariation["walkLinesRandom"](allChoices,nameToGroup) for i in range(100)])
+
+	return([
+		("aliases", parseRawData, lambda s,a: parseRawData["changeAliasMulitlevel_applyMetaFileOrder"](s,a), lambda: (copy.deepcopy(script),meta["aliases"])),
+		("writeData", parseRawData, lambda o,f: parseRawData["writeData"](o,f), lambda: (aliasedScript,tmpFolder)),
+		("getStats", getStatistics, lambda t: getStatistics["getStats"](t), lambda: (texts,)),
+		("walkLines", getChoiceVariation, walkLinesAll, lambda: (copy.deepcopy(allChoices),)),
+		("walkLinesRandom", getChoiceVariation, walkLinesRandom100, lambda: (copy.deepcopy(allChoices),)),
+		("walkDialogue", dialogueTransitions, lambda d: dialogueTransitions["walkDialogue"](d,"-"), lambda: (aliasedScript,)),
+		("keynessCounting", keyness, lambda c: keyness["countWordsByGroup"](c), lambda: (charDialogue,))])
+
+def runBenchmarks(config,repeats):
+	script,meta = makeScript(config["lines"],config["depth"],config["branching"],config["speakers"],config["aliases"],config["choiceProb"],config["seed"])
+	print("Script: "+str(len(script))+" top-level elements, "+str(countLines(script))+" lines in total")
+	tmpFolder = tempfile.mkdtemp()+os.sep
+	results = []
+	try:
+		for name,module,func,setup in makeStages(script,meta,tmpFolder):
+			try:
+				times = timeStage(func,setup,repeats)
+			except (NameError,ImportError) as e:
+				reason = str(e)
+				if len(module["_missingImports"])>0:
+					reason = "missing "+", ".join(module["_missingImports"])
+				print(name+": skipped ("+reason+")")
+				results.append({"stage": name, "skipped": reason})
+				continue
+			result = {"stage": name, "best": min(times), "median": statistics.median(times), "repeats": len(times)}
+			print(name+": "+str(round(result["best"],4))+"s (median "+str(round(result["median"],4))+"s)")
+			results.append(result)
+	finally:
+		shutil.rmtree(tmpFolder)
+	return(results)
+
+def compareResults(config,results,previousFile,tolerance):
+	# Returns the stages that are more than `tolerance` slower than before
+	with open(previousFile) as f:
+		previous = json.load(f)
+	if previous["config"]!=config:
+		print("WARNING: "+previousFile+" used a different synthetic script")
+	previousBest = dict((x["stage"],x["best"]) for x in previous["results"] if "best" in x)
+	slower = []
+	print("\nCompared to "+previousFile+":")
+	for x in results:
+		if "best" in x and x["stage"] in previousBest and previousBest[x["stage"]]>0:
+			ratio = x["best"]/previousBest[x["stage"]]
+			flag = ""
+			if ratio > 1+tolerance:
+				flag = "  SLOWER"
+				slower.append(x["stage"])
+			print("  "+x["stage"]+": "+str(round(ratio,2))+"x"+flag)
+	return(slower)
+
+if __name__ == "__main__":
+	argParser = argparse.ArgumentParser(description="Benchmark corpus building stages on a synthetic script")
+	argParser.add_argument("--lines", type=int, default=5000, help="number of top-level lines")
+	argParser.add_argument("--depth", type=int, default=3, help="maximum depth of nested choices")
+	argParser.add_argument("--branching", type=int, default=3, help="options per choice")
+	argParser.add_argument("--speakers", type=int, default=50)
+	argParser.add_argument("--aliases", type=int, default=20)
+	argParser.add_argument("--choiceProb", type=float, default=0.05, help="probability of a choice at each line (keep choiceProb*branching*3.5 below 1, or nested choices multiply quickly)")
+	argParser.add_argument("--seed", type=int, default=1)
+	argParser.add_argument("--repeats", type=int, default=5, help="runs of each stage (the best time is compared)")
+	argParser.add_argument("--name", default="corpusBenchmark", help="name of the results files in ../results/benchmarks/")
+	argParser.add_argument("--compare", help="earlier results (.json) to compare with")
+	argParser.add_argument("--tolerance", type=float, default=0.1, help="slowdown that counts as a regression (0.1 = 10%%)")
+	args = argParser.parse_args()
+
+	currentConfig = {"lines": args.lines, "depth": args.depth, "branching": args.branching, "speakers": args.speakers,
+		"aliases": args.aliases, "choiceProb": args.choiceProb, "seed": args.seed}
+	results = runBenchmarks(currentConfig,args.repeats)
+
+	outFolder = "../results/benchmarks/"
+	os.makedirs(outFolder, exist_ok=True)
+	with open(outFolder+args.name+".json",'w') as o:
+		json.dump({"config": currentConfig, "python": platform.python_version(), "platform": platform.platform(),
+			"time": time.strftime("%Y-%m-%d %H:%M:%S"), "results": results}, o, indent="\t")
+	with open(outFolder+args.name+".csv",'w') as o:
+		csvwriter = csv.writer(o)
+		csvwriter.writerow(["stage","bestSeconds","medianSeconds","repeats","skipped"])
+		for x in results:
+			csvwriter.writerow([x["stage"],x.get("best","NA"),x.get("median","NA"),x.get("repeats","NA"),x.get("skipped","")])
+
+	if not args.compare is None:
+		slower = compareResults(currentConfig,results,args.compare,args.tolerance)
+		if len(slower)>0:
+			sys.exit(1)
@@ -0,0 +1,69 @@
+# Import-time benchmark for the parsers module.
+#  Runs `python -X importtime` in a fresh interpreter for:
+#  - importing the parsers package on its own (parser modules are loaded lazily)
+#  - importing the package and every parser (what `import parsers` used to cost)
+#  - importing the package and each parser on its own
+#  and reports the total import time (in microseconds, from -X importtime,
+#  minus the interpreter's own startup imports) and the number of modules loaded.
+#  Results are written to ../results/parserImportBenchmark.csv
+#  > python3 benchmarkParserImports.py [--repeats 3] [--each]
+
+import os, sys, csv, re, argparse, subprocess
+import parsers
+
+def importTime(code):
+	# Returns (microseconds, number of modules) for imports made by the code
+	#  beyond those made by the interpreter itself
+	def run(code):
+		proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+			capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+		if proc.returncode != 0:
+			raise RuntimeError(proc.stderr.strip().split("\n")[-1])
+		total = 0
+		modules = 0
+		for line in proc.stderr.split("\n"):
+			m = re.match(r"import time: +([0-9]+) \| +([0-9]+) \| ( *)(.+)$", line)
+			if m:
+				modules += 1
+				# Only count top-level imports, which include their own imports
+				if len(m.group(3))==0:
+					total += int(m.group(2))
+		return(total,modules)
+	baseTime,baseModules = run("pass")
+	t,modules = run(code)
+	return(max(t-baseTime,0),modules-baseModules)
+
+def bestImportTime(code,repeats):
+	best = None
+	for r in range(repeats):
+		t,modules = importTime(code)
+		if best is None or t < best[0]:
+			best = (t,modules)
+	return(best)
+
+if __name__ == "__main__":
+	argParser = argparse.ArgumentParser(description="Benchmark importing the parsers")
+	argParser.add_argument("--repeats", type=int, default=3)
+	argParser.add_argument("--each", action="store_true", help="also time importing each parser on its own")
+	args = argParser.parse_args()
+
+	tests = [("parsers", "import parsers"),
+		("parsers (all)", "import parsers\nfor name in parsers.parserNames: parsers.getParser(name)")]
+	if args.each:
+		tests += [("parsers."+name, "import parsers\nparsers.getParser('"+name+"')") for name in parsers.parserNames]
+
+	results = [["import","microseconds","modules"]]
+	for name,code in tests:
+		try:
+			t,modules = bestImportTime(code,args.repeats)
+		except RuntimeError as e:
+			print(name+": failed ("+str(e)+")")
+			results.append([name,"NA","NA"])
+			continue
+		print(name+": "+str(round(t/1000,1))+"ms, "+str(modules)+" modules")
+		results.append([name,t,modules])
+
+	os.makedirs("../results/", exist_ok=True)
+	with open("../results/parserImportBenchmark.csv",'w') as o:
+		csvwriter = csv.writer(o)
+		csvwriter.writerows(results)
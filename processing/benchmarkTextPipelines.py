@@ -0,0 +1,64 @@
+# Micro-benchmark for the parsers' text cleaning pipelines (parsers/textPipeline.py).
+#  For each pipeline, clean a set of sample lines by applying the rules
+#  one by one (as the parsers used to) and with the compiled pipeline,
+#  check the results are identical, and report lines per second.
+#  Sample lines are random words mixed with the text each pipeline's
+#  rules look for.
+#  Results are written to ../results/textPipelineBenchmark.csv
+#  > python3 benchmarkTextPipelines.py [number of lines]
+
+import os, sys, csv, time, random
+from parsers import FF9BParser, SkyrimParser, KQ7Parser, StardewValleyParser, BG3Localisation, ElderScrollsWikiParser, GamerescapeParser
+
+pipelines = [
+	("FF9BParser.cleanLine", FF9BParser.cleanLine),
+	("SkyrimParser.cleanText", SkyrimParser.cleanTextPipeline),
+	("KQ7Parser.cleanQuotes", KQ7Parser.cleanQuotes),
+	("KQ7Parser.removeBrackets", KQ7Parser.removeBrackets),
+	("StardewValleyParser.cleanStardewDialogue", StardewValleyParser.cleanStardewDialogue),
+	("BG3Localisation.cleanLine", BG3Localisation.cleanLine),
+	("ElderScrollsWikiParser.cleanLine", ElderScrollsWikiParser.cleanLine),
+	("GamerescapeParser.cleanText", GamerescapeParser.cleanText)]
+
+words = ["the","dragon","is","coming","to","Whiterun","and","you","must","go","...","(quietly)","<b>","Hello","$h","well,then"]
+
+def sampleLines(pipeline,numLines,seed=1):
+	rnd = random.Random(seed)
+	# Literal targets from the rules, plus some other awkward characters
+	targets = [rule[1] for rule in pipeline.rules if rule[0]=="replace"]
+	targets += ["  ","\n",'"',"(",")","[","]","<",">"]
+	lines = []
+	for i in range(numLines):
+		parts = [rnd.choice(words) if rnd.random()<0.8 else rnd.choice(targets) for j in range(rnd.randint(5,30))]
+		lines.append(" ".join(parts))
+	return(lines)
+
+def timeCleaning(clean,lines,repeats=3):
+	# Best of several runs, in seconds
+	best = None
+	for r in range(repeats):
+		startTime = time.perf_counter()
+		out = [clean(line) for line in lines]
+		t = time.perf_counter()-startTime
+		if best is None or t < best:
+			best = t
+	return(best,out)
+
+if __name__ == "__main__":
+	numLines = 20000
+	if len(sys.argv)>1:
+		numLines = int(sys.argv[1])
+	results = [["pipeline","rules","operations","lines","rulesLinesPerSecond","pipelineLinesPerSecond","speedup","identical"]]
+	for name,pipeline in pipelines:
+		lines = sampleLines(pipeline,numLines)
+		rulesTime,rulesOut = timeCleaning(pipeline.applyRules,lines)
+		pipelineTime,pipelineOut = timeCleaning(pipeline,lines)
+		identical = rulesOut==pipelineOut
+		print(name+": "+str(round(numLines/rulesTime))+" -> "+str(round(numLines/pipelineTime))+" lines/s"+("" if identical else " (DIFFERENT)"))
+		results.append([name,len(pipeline.rules),pipeline.numSteps,numLines,round(numLines/rulesTime),
+			round(numLines/pipelineTime),round(rulesTime/pipelineTime,2),identical])
+
+	os.makedirs("../results/", exist_ok=True)
+	with open("../results/textPipelineBenchmark.csv",'w') as o:
+		csvwriter = csv.writer(o)
+		csvwriter.writerows(results)
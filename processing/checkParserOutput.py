@@ -0,0 +1,44 @@
+# Re-parse games and check that the output is identical to the
+#  current data.json, timing each game.
+#  Use this after changing a parser that should not change its output.
+#  Results are written to ../results/parserOutputCheck.csv
+#  Check just one game e.g.
+#  > python3 checkParserOutput.py ../data/StarWarsKOTOR/StarWarsKOTOR
+
+import os, json, sys, csv, time
+from parseRawData import parseGame, toJSON
+
+folders = [root+os.sep for root,dirs,files in os.walk("../data/") if "meta.json" in files]
+
+if len(sys.argv)>1:
+	fx = sys.argv[-1]
+	if not fx.endswith(os.sep):
+		fx += os.sep
+	folders = [fx]
+
+results = []
+for folder in folders:
+	with open(folder+"meta.json") as json_file:
+		meta = json.load(json_file)
+	if not "parser" in meta["parserParameters"] or not os.path.isdir(folder+"raw/") or not os.path.isfile(folder+"data.json"):
+		continue
+	print("CHECKING "+meta["game"])
+	gameID = folder.replace("../data/","").strip(os.sep).replace(os.sep,"_")
+	startTime = time.perf_counter()
+	try:
+		out = parseGame(folder,meta)
+	except Exception as e:
+		print("  Could not parse: "+str(e))
+		results.append([gameID,"NA","NA"])
+		continue
+	t = time.perf_counter()-startTime
+	with open(folder+"data.json") as f:
+		identical = toJSON(out) == f.read()
+	print("  "+str(round(t,3))+"s, "+("identical" if identical else "DIFFERENT"))
+	results.append([gameID,round(t,3),identical])
+
+os.makedirs("../results/", exist_ok=True)
+with open("../results/parserOutputCheck.csv",'w') as o:
+	writer = csv.writer(o)
+	writer.writerow(["game","seconds","identical"])
+	writer.writerows(results)
@@ -0,0 +1,70 @@
+# Parse games with each html backend (see parsers/parserBackend.py),
+#  and compare the output and timings against the game's current backend.
+#  Use this before setting "htmlBackend" in a game's meta.json.
+#  Results are written to ../results/parserBackends.csv, and any
+#  differences to ../results/parserBackendDiffs/
+#  Compare just one game e.g.
+#  > python3 compareParserBackends.py ../data/FinalFantasy/FFVII
+
+import os, json, sys, csv, time, difflib
+from copy import deepcopy
+from parseRawData import parseGame
+from parsers import parserBackend
+
+def toLines(out):
+	return(json.dumps({"text":out}, indent="\t",ensure_ascii=False).split("\n"))
+
+def parseWithBackend(folder,meta,backend=None):
+	meta = deepcopy(meta)
+	if not backend is None:
+		meta["parserParameters"]["htmlBackend"] = backend
+	startTime = time.perf_counter()
+	out = parseGame(folder,meta)
+	return(out, time.perf_counter()-startTime)
+
+folders = [root+os.sep for root,dirs,files in os.walk("../data/") if "meta.json" in files]
+
+if len(sys.argv)>1:
+	fx = sys.argv[-1]
+	if not fx.endswith(os.sep):
+		fx += os.sep
+	folders = [fx]
+
+diffFolder = "../results/parserBackendDiffs/"
+os.makedirs(diffFolder, exist_ok=True)
+
+results = []
+for folder in folders:
+	with open(folder+"meta.json") as json_file:
+		meta = json.load(json_file)
+	if not "parser" in meta["parserParameters"] or not os.path.isdir(folder+"raw/"):
+		continue
+	print("COMPARING "+meta["game"])
+	try:
+		baseOut,baseTime = parseWithBackend(folder,meta)
+	except Exception as e:
+		print("  Could not parse: "+str(e))
+		continue
+	baseLines = toLines(baseOut)
+	gameID = folder.replace("../data/","").strip(os.sep).replace(os.sep,"_")
+	results.append([gameID,"current",round(baseTime,3),len(baseLines),0])
+	for backend in parserBackend.backends:
+		try:
+			out,t = parseWithBackend(folder,meta,backend)
+		except Exception as e:
+			print("  "+backend+" failed: "+str(e))
+			results.append([gameID,backend,"NA","NA","NA"])
+			continue
+		lines = toLines(out)
+		diff = list(difflib.unified_diff(baseLines,lines,"current",backend,lineterm=""))
+		numDiffs = len([x for x in diff if x.startswith(("+","-")) and not x.startswith(("+++","---"))])
+		if numDiffs>0:
+			with open(diffFolder+gameID+"_"+backend+".diff",'w') as o:
+				o.write("\n".join(diff))
+		print("  "+backend+": "+str(round(t,3))+"s, "+str(numDiffs)+" lines differ")
+		results.append([gameID,backend,round(t,3),len(lines),numDiffs])
+
+with open("../results/parserBackends.csv",'w') as o:
+	writer = csv.writer(o)
+	writer.writerow(["game","backend","seconds","jsonLines","linesDifferent"])
+	writer.writerows(results)
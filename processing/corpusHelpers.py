@@ -27,7 +27,23 @@ def get_keys_recursively(var):
 #	return(dict(zip(groups.keys(),groupCounts)))
 
 
-def getAllCharacterTexts(var, excludeKeys=["ACTION","CHOICE","LOCATION","COMMENT","SYSTEM","GOTO","NARRATIVE","STATUS"],getNames=False):
+def get_key_values_recursively(var):
+	# (key, value) for every key in the data, in the same order as
+	#  getAllCharacterTexts and getTextByCharacters
+	if isinstance(var,dict) or isinstance(var,list):
+		for k in var:
+			if isinstance(var, dict):
+				v = var[k]
+				yield (k,v)
+				for result in get_key_values_recursively(v):
+					yield result
+			elif isinstance(var, list):
+				for result in get_key_values_recursively(k):
+					yield result
+
+nonDialogueKeys = ["ACTION","CHOICE","LOCATION","COMMENT","SYSTEM","GOTO","NARRATIVE","STATUS"]
+
+def getAllCharacterTexts(var, excludeKeys=nonDialogueKeys,getNames=False):
 	if isinstance(var,dict) or isinstance(var,list):
 		for k in var:
 			if isinstance(var, dict):
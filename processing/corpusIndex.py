@@ -0,0 +1,90 @@
+# Inverted index for searching the lines of one or more games.
+#  Each line (any entry with a string value, in the order they appear
+#  in data.json) gets a position, and tokens, speakers and games
+#  map to the positions they appear in. Searches are then unions and
+#  intersections of these position lists, rather than walks of the data.
+#  e.g.
+#  > index = CorpusIndex()
+#  > index.addDataFile("ME1","../data/MassEffect/MassEffect1B/data.json")
+#  > index.search(cues=["mother"],speakers=["Liara T'Soni"])
+
+import json
+
+def wordTokens(text):
+	# (imported here, as textatistic is slow to load)
+	from textatistic import word_array
+	return(word_array(text))
+
+class CorpusIndex:
+	def __init__(self,tokenize=wordTokens):
+		self.tokenize = tokenize
+		self.lines = []         # position -> line
+		self.games = []         # position -> game ID
+		self.speakers = []      # position -> speaker (the line's main key)
+		self.tokenIndex = {}    # lower case token -> positions
+		self.speakerIndex = {}  # speaker -> positions
+		self.gameIndex = {}     # game ID -> positions
+
+	def addPosting(self,index,key,pos):
+		if key in index:
+			index[key].append(pos)
+		else:
+			index[key] = [pos]
+
+	def iterLines(self,lines):
+		# Lines in the order they appear, without recursion
+		stack = [iter([lines])]
+		while len(stack)>0:
+			for item in stack[-1]:
+				if isinstance(item,dict):
+					mainKey = [x for x in item if not x.startswith("_")][0]
+					if isinstance(item[mainKey],str):
+						yield((mainKey,item))
+					else:
+						stack.append(iter([item[mainKey]]))
+						break
+				elif isinstance(item,list):
+					stack.append(iter(item))
+					break
+			else:
+				stack.pop()
+
+	def addGame(self,gameID,lines):
+		for speaker,line in self.iterLines(lines):
+			pos = len(self.lines)
+			self.lines.append(line)
+			self.games.append(gameID)
+			self.speakers.append(speaker)
+			self.addPosting(self.speakerIndex,speaker,pos)
+			self.addPosting(self.gameIndex,gameID,pos)
+			for token in set(self.tokenize(line[speaker].lower())):
+				self.addPosting(self.tokenIndex,token,pos)
+
+	def addDataFile(self,gameID,fileName):
+		with open(fileName) as json_file:
+			self.addGame(gameID,json.load(json_file)["text"])
+
+	def positions(self,index,keys):
+		# Positions for any of the keys
+		out = set()
+		for key in keys:
+			out.update(index.get(key,[]))
+		return(out)
+
+	def searchPositions(self,cues=[],speakers=[],games=[]):
+		# Positions of lines that contain any of the cues (lower case tokens),
+		#  spoken by any of the speakers, in any of the games.
+		#  An empty list means no restriction.
+		found = None
+		# (start with the most restrictive filter)
+		for index,keys in sorted([(self.gameIndex,games),(self.speakerIndex,speakers),(self.tokenIndex,cues)],
+				key=lambda x: sum([len(x[0].get(k,[])) for k in x[1]])):
+			if len(keys)>0:
+				pos = self.positions(index,keys)
+				found = pos if found is None else found.intersection(pos)
+		if found is None:
+			return(list(range(len(self.lines))))
+		return(sorted(found))
+
+	def search(self,cues=[],speakers=[],games=[]):
+		return([self.lines[pos] for pos in self.searchPositions(cues,speakers,games)])
@@ -0,0 +1,209 @@
+# Full-text search over the whole corpus.
+#  Lines from every data.json are stored in an SQLite FTS5 database
+#  (../results/doNotShare/corpusSearch.sqlite), along with the speaker,
+#  character group, game, series, location and the choices that lead
+#  to each line. Games are only re-indexed if their data.json changes.
+#  Stage directions and other non-dialogue lines (ACTION, LOCATION,
+#  SYSTEM etc., see corpusHelpers.nonDialogueKeys) are stored with the
+#  type "direction", and are only searched with --directions.
+#  GOTOs are not stored.
+#
+#  Update the database (all games, or just one game) e.g.
+#  > python3 corpusSearch.py update
+#  > python3 corpusSearch.py update ../data/FinalFantasy/FFVII
+#
+#  Search with FTS5 query syntax (words, "exact phrases", prefix*, AND/OR/NOT), e.g.
+#  > python3 corpusSearch.py search '"my mother"' --series "Mass Effect"
+#  > python3 corpusSearch.py search 'benez*' --group female --out benezia.csv
+#  > python3 corpusSearch.py search "" --speaker "Aria T'Loak"
+
+import os, json, csv, sqlite3, hashlib, argparse
+from corpusHelpers import getNameToGroup, nonDialogueKeys
+
+defaultDBFile = "../results/doNotShare/corpusSearch.sqlite"
+
+# Databases made with an earlier schema are rebuilt
+schemaVersion = 2
+
+schema = [
+	"CREATE TABLE IF NOT EXISTS games (gameID TEXT PRIMARY KEY, game TEXT, series TEXT, sourceHash TEXT)",
+	"""CREATE TABLE IF NOT EXISTS lines (id INTEGER PRIMARY KEY, gameID TEXT, position INTEGER,
+		speaker TEXT, grp TEXT, lineID TEXT, text TEXT, location TEXT, path TEXT, previous TEXT, type TEXT)""",
+	"CREATE INDEX IF NOT EXISTS lines_game ON lines (gameID, position)",
+	"CREATE INDEX IF NOT EXISTS lines_speaker ON lines (speaker)",
+	"CREATE VIRTUAL TABLE IF NOT EXISTS lines_fts USING fts5(text, content='lines', content_rowid='id')",
+	# Keep the full-text index in step with the lines table
+	"""CREATE TRIGGER IF NOT EXISTS lines_insert AFTER INSERT ON lines BEGIN
+		INSERT INTO lines_fts(rowid, text) VALUES (new.id, new.text); END""",
+	"""CREATE TRIGGER IF NOT EXISTS lines_delete AFTER DELETE ON lines BEGIN
+		INSERT INTO lines_fts(lines_fts, rowid, text) VALUES ('delete', old.id, old.text); END"""
+]
+
+def connect(dbFile=defaultDBFile):
+	os.makedirs(os.path.dirname(dbFile), exist_ok=True)
+	con = sqlite3.connect(dbFile)
+	if con.execute("PRAGMA user_version").fetchone()[0] < schemaVersion:
+		for table in ["lines_fts","lines","games"]:
+			con.execute("DROP TABLE IF EXISTS "+table)
+		con.execute("PRAGMA user_version = "+str(schemaVersion))
+	for statement in schema:
+		con.execute(statement)
+	return(con)
+
+def hashFile(fileName):
+	h = hashlib.md5()
+	with open(fileName,'rb') as f:
+		for chunk in iter(lambda: f.read(1<<20), b""):
+			h.update(chunk)
+	return(h.hexdigest())
+
+def iterLines(lines):
+	# Yield (speaker, line, location, choice path, previous line, type) for
+	#  each line with a string value (except GOTOs), in order, without recursion.
+	# The choice path is a list of (option number, number of options)
+	#  for each CHOICE on the way to the line.
+	# The type is "dialogue", or "direction" for nonDialogueKeys
+	#  (the previous line is the last line of dialogue).
+	location = ""
+	# Each frame is [iterator over a list of lines, choice path, previous line].
+	#  The options of a CHOICE are pushed in reverse, so they are walked
+	#  in order, each starting from the line before the CHOICE.
+	stack = [[iter(lines), [], ""]]
+	while len(stack)>0:
+		frame = stack[-1]
+		for line in frame[0]:
+			mainKey = [x for x in line if not x.startswith("_")][0]
+			value = line[mainKey]
+			if mainKey == "CHOICE":
+				for i in reversed(range(len(value))):
+					stack.append([iter(value[i]), frame[1]+[(i+1,len(value))], frame[2]])
+				break
+			if mainKey == "LOCATION":
+				location = value
+			if isinstance(value,str) and mainKey != "GOTO":
+				if mainKey in nonDialogueKeys:
+					yield((mainKey, line, location, frame[1], frame[2], "direction"))
+				else:
+					yield((mainKey, line, location, frame[1], frame[2], "dialogue"))
+					frame[2] = mainKey + ": " + value
+		else:
+			stack.pop()
+
+def formatPath(path):
+	return(" > ".join(["CHOICE "+str(i)+"/"+str(n) for i,n in path]))
+
+def indexGame(con,folder):
+	# (Re-)index one game folder, if its data.json has changed.
+	#  Returns True if the game was indexed.
+	with open(folder+"meta.json") as json_file:
+		meta = json.load(json_file)
+	gameID = os.path.basename(os.path.normpath(folder))
+	sourceHash = hashFile(folder+"data.json")
+	row = con.execute("SELECT sourceHash FROM games WHERE gameID=?",(gameID,)).fetchone()
+	if not row is None and row[0]==sourceHash:
+		return(False)
+	print("INDEXING "+meta["game"])
+	with open(folder+"data.json") as json_file:
+		lines = json.load(json_file)["text"]
+	nameToGroup = {}
+	if "characterGroups" in meta:
+		nameToGroup = getNameToGroup(meta)
+	rows = []
+	for position,(speaker,line,location,path,previous,lineType) in enumerate(iterLines(lines)):
+		rows.append((gameID, position, speaker, nameToGroup.get(speaker,""), line.get("_ID",""),
+			line[speaker], location, formatPath(path), previous, lineType))
+	with con:
+		con.execute("DELETE FROM lines WHERE gameID=?",(gameID,))
+		con.executemany("INSERT INTO lines (gameID, position, speaker, grp, lineID, text, location, path, previous, type) VALUES (?,?,?,?,?,?,?,?,?,?)",rows)
+		con.execute("INSERT OR REPLACE INTO games VALUES (?,?,?,?)",(gameID, meta.get("game",""), meta.get("series",""), sourceHash))
+	return(True)
+
+def removeMissingGames(con,gameIDs):
+	with con:
+		for (gameID,) in con.execute("SELECT gameID FROM games").fetchall():
+			if not gameID in gameIDs:
+				print("REMOVING "+gameID)
+				con.execute("DELETE FROM lines WHERE gameID=?",(gameID,))
+				con.execute("DELETE FROM games WHERE gameID=?",(gameID,))
+
+def update(con,folders=None):
+	# Index all games (or just the given folders)
+	allFolders = [root+os.sep for root,dirs,files in os.walk("../data/") if "meta.json" in files and "data.json" in files]
+	if folders is None:
+		folders = allFolders
+		removeMissingGames(con,[os.path.basename(os.path.normpath(x)) for x in allFolders])
+	for folder in folders:
+		indexGame(con,folder)
+
+def search(con,query="",speakers=[],groups=[],games=[],series=[],limit=None,directions=False):
+	# Returns a list of dictionaries, in corpus order.
+	#  query uses FTS5 syntax, and an empty query matches every line.
+	#  games can be game IDs (folder names) or game titles.
+	#  Only lines of dialogue are returned, unless directions is True.
+	conditions = []
+	args = []
+	if not directions:
+		conditions.append("lines.type = 'dialogue'")
+	if len(query.strip())>0:
+		conditions.append("lines.id IN (SELECT rowid FROM lines_fts WHERE lines_fts MATCH ?)")
+		args.append(query)
+	for column,values in [("lines.speaker",speakers),("lines.grp",groups),("games.series",series)]:
+		if len(values)>0:
+			conditions.append(column+" IN ("+",".join(["?"]*len(values))+")")
+			args += values
+	if len(games)>0:
+		marks = ",".join(["?"]*len(games))
+		conditions.append("(games.gameID IN ("+marks+") OR games.game IN ("+marks+"))")
+		args += games + games
+	sql = """SELECT games.gameID, games.game, games.series, lines.speaker, lines.grp, lines.lineID,
+		lines.text, lines.location, lines.path, lines.previous, lines.type
+		FROM lines JOIN games ON lines.gameID = games.gameID"""
+	if len(conditions)>0:
+		sql += " WHERE " + " AND ".join(conditions)
+	sql += " ORDER BY lines.gameID, lines.position"
+	if not limit is None:
+		sql += " LIMIT " + str(int(limit))
+	columns = ["gameID","game","series","speaker","group","ID","text","location","path","previous","type"]
+	return([dict(zip(columns,row)) for row in con.execute(sql,args)])
+
+if __name__ == "__main__":
+	argParser = argparse.ArgumentParser(description="Full-text search over the corpus")
+	argParser.add_argument("--db", default=defaultDBFile)
+	subParsers = argParser.add_subparsers(dest="command", required=True)
+	updateParser = subParsers.add_parser("update")
+	updateParser.add_argument("folders", nargs="*")
+	searchParser = subParsers.add_parser("search")
+	searchParser.add_argument("query")
+	searchParser.add_argument("--speaker", action="append", default=[])
+	searchParser.add_argument("--group", action="append", default=[])
+	searchParser.add_argument("--game", action="append", default=[])
+	searchParser.add_argument("--series", action="append", default=[])
+	searchParser.add_argument("--limit", type=int)
+	searchParser.add_argument("--directions", action="store_true", help="also search stage directions (ACTION, LOCATION, SYSTEM etc.)")
+	searchParser.add_argument("--out", help="write results to a csv file")
+	args = argParser.parse_args()
+
+	con = connect(args.db)
+	if args.command == "update":
+		folders = None
+		if len(args.folders)>0:
+			folders = [x if x.endswith(os.sep) else x+os.sep for x in args.folders]
+		update(con,folders)
+	else:
+		results = search(con,args.query,args.speaker,args.group,args.game,args.series,args.limit,args.directions)
+		if args.out is None:
+			for res in results:
+				context = res["location"]
+				if len(res["path"])>0:
+					context += " [" + res["path"] + "]"
+				print(res["game"]+" | "+context)
+				if len(res["previous"])>0:
+					print("    " + res["previous"])
+				print("  > " + res["speaker"] + ": " + res["text"])
+			print(str(len(results))+" results")
+		else:
+			with open(args.out,'w') as csvfile:
+				writer = csv.DictWriter(csvfile, fieldnames=list(results[0].keys()) if len(results)>0 else ["gameID"])
+				writer.writeheader()
+				writer.writerows(results)
+	con.close()
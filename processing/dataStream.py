@@ -0,0 +1,69 @@
+# Line-delimited version of data.json, so that large games can be read
+#  one part at a time instead of loading the whole script into memory.
+#  data.jsonl has one top-level element of the script per line (a line of
+#  dialogue, or a CHOICE with its options inline), e.g.
+#  {"Cloud": "Let's go."}
+#  {"CHOICE": [[{"Cloud": "Yes"}], [{"Cloud": "No"}]]}
+#  data.jsonl.idx has the byte offset where each line starts, as 8-byte
+#  unsigned integers (little-endian), so element i can be read by seeking
+#  to 8*i in the index and then to that offset in data.jsonl.
+#  parseRawData.py writes these with --jsonl, e.g.
+#  > python3 parseRawData.py --jsonl ../data/ElderScrolls/Skyrim
+#  Scripts can then use iterScript(folder), which reads data.jsonl if it's
+#  up to date, and otherwise falls back to loading data.json.
+
+import os, json, array, sys
+
+jsonlFile = "data.jsonl"
+indexFile = "data.jsonl.idx"
+
+def writeJSONL(out,folder):
+	offsets = array.array('Q')
+	pos = 0
+	with open(folder+jsonlFile,'wb') as o:
+		for element in out:
+			line = (json.dumps(element,ensure_ascii=False)+"\n").encode("utf8")
+			offsets.append(pos)
+			o.write(line)
+			pos += len(line)
+	if sys.byteorder!="little":
+		offsets.byteswap()
+	with open(folder+indexFile,'wb') as o:
+		offsets.tofile(o)
+
+def hasJSONL(folder):
+	# True if data.jsonl exists and is not older than data.json
+	if not (os.path.isfile(folder+jsonlFile) and os.path.isfile(folder+indexFile)):
+		return(False)
+	if os.path.isfile(folder+"data.json"):
+		return(os.path.getmtime(folder+jsonlFile) >= os.path.getmtime(folder+"data.json"))
+	return(True)
+
+def hasData(folder):
+	return(os.path.isfile(folder+"data.json") or hasJSONL(folder))
+
+def iterScript(folder):
+	""" Yield the top-level elements of a game's script, streaming
+		from data.jsonl if possible. """
+	if hasJSONL(folder):
+		with open(folder+jsonlFile, encoding = 'utf8') as f:
+			for line in f:
+				yield(json.loads(line))
+	else:
+		with open(folder+"data.json") as json_file:
+			for element in json.load(json_file)["text"]:
+				yield(element)
+
+def numElements(folder):
+	return(os.path.getsize(folder+indexFile)//8)
+
+def readElement(folder,i):
+	""" Return top-level element i of the script in data.jsonl. """
+	if i<0 or i>=numElements(folder):
+		raise IndexError("No element "+str(i)+" in "+folder+jsonlFile)
+	with open(folder+indexFile,'rb') as f:
+		f.seek(8*i)
+		offset = int.from_bytes(f.read(8),"little")
+	with open(folder+jsonlFile,'rb') as f:
+		f.seek(offset)
+		return(json.loads(f.readline().decode("utf8")))
@@ -1,5 +1,6 @@
 import os, json, re, csv, sys
 from corpusHelpers import *
+import dataStream
 
 # TODO: are we checking that lines actually have spoken content?
 
@@ -10,9 +11,9 @@ def walkDialogue(var, prevChar=["-"]):
 	# This algorithm captures all possible transitions in the tree.
 	out = []
 	if not isinstance(var,str) and (not isinstance(var,int)):
-		if isinstance(var,list):
-			for i in range(len(var)):
-				dx = var[i]
+		# (var can also be a stream of elements, see dataStream.py)
+		if not isinstance(var,dict):
+			for dx in var:
 				if isinstance(dx,dict):
 					# get character name
 					nx = [x for x in dx if not x.startswith("_")][0]
@@ -62,11 +63,10 @@ printTransition = False
 
 for folder in foldersToProcess:
 	print(folder)
-	if os.path.isfile(folder+"meta.json") and os.path.isfile(folder+"data.json"):
+	if os.path.isfile(folder+"meta.json") and dataStream.hasData(folder):
 		with open(folder+"meta.json") as json_file:
 			meta = json.load(json_file)
-		with open(folder+"data.json") as json_file:
-			d = json.load(json_file)["text"]
+		d = dataStream.iterScript(folder)
 		
 		includeGame = True
 		# alternativeMeasure is true if this parsing should not count 
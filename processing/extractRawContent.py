@@ -0,0 +1,32 @@
+import os, json, sys
+from parsers import rawContent, rawStore
+
+# Extract the content div from each raw page once, after scraping.
+#  Only applies to games that define "textDivId" in their parserParameters.
+#  The parsers will also do this on demand if the content file is missing
+#  or older than the raw page.
+
+folders = [root+os.sep for root,dirs,files in os.walk("../data/") if "meta.json" in files]
+
+# Allow processing of just one game
+if len(sys.argv)>1:
+	fx = sys.argv[-1]
+	if not fx.endswith(os.sep):
+		fx += os.sep
+	folders = [fx]
+
+for folder in folders:
+	with open(folder+"meta.json") as json_file:
+		meta = json.load(json_file)
+	pp = meta["parserParameters"]
+	if not "textDivId" in pp or not os.path.isdir(folder+"raw/"):
+		continue
+	print("EXTRACTING "+meta["game"])
+	fileType = "html"
+	if "fileType" in pp:
+		fileType = pp["fileType"]
+	rawFiles = [x for x in rawStore.listRaw(folder+"raw/") if x.endswith(fileType)]
+	rawFiles.sort()
+	for rawFile in rawFiles:
+		if not rawContent.isContentFresh(folder+"raw/"+rawFile,pp["textDivId"]):
+			rawContent.writeContent(folder+"raw/"+rawFile,pp["textDivId"])
@@ -1,70 +1,174 @@
-import sys, time, json, re, os
-from urllib.request import urlopen
-from bs4 import BeautifulSoup
+# Attempt to automatically identify an attribute (e.g. gender) for each
+#  character using a wiki (the "characterInfoSource" in meta.json).
+#  Each character's page is downloaded once and stored in
+#  raw/characterInfo/ in the game folder, and all the infobox attributes
+#  ("data-source" divs) are read from it in one pass, so looking up
+#  another attribute doesn't download the pages again.
+#  Pages are fetched by several threads, but requests to the same host
+#  are spaced out by at least --delay seconds.
+#  e.g.
+#  > python3 getCharacterInfo.py ../data/FinalFantasy/FFXII
+#  > python3 getCharacterInfo.py --attribute race ../data/FinalFantasy/FFXII
+#  The source can be overridden, e.g. to test with a local server:
+#  > python3 getCharacterInfo.py --source http://localhost:8000/wiki/ ../data/FinalFantasy/FFXII
 
+import sys, time, json, re, os, hashlib, threading, argparse
+from urllib.request import urlopen, Request
+from urllib.error import HTTPError
+from urllib.parse import quote, urlparse
+from concurrent.futures import ThreadPoolExecutor
+from lxml import etree
+from nameMatcher import NameMatcher
 
-def findAttribute(characterName,attributName):
-	page = urlopen(baseWiki+character).read().decode('utf-8')
-	soup = BeautifulSoup(page, 'html.parser')
-	attribute = soup.find('div', attrs={"data-source": attributName})
-	return(	attribute.find("div").getText())
+def readCharacterList(fileName):
+	# characters.txt has one '"name" :count' entry per line (see getStatistics.py)
+	characters = []
+	with open(fileName) as f:
+		for line in f:
+			m = re.match('^"(.*)" :[0-9]+,?$', line.strip())
+			if m:
+				characters.append(m.group(1))
+	return(characters)
 
+def pageURL(baseWiki,characterName):
+	return(baseWiki + quote(characterName.replace(" ","_")))
 
-folder = ""
-if len(sys.argv)>1:
-	folder = sys.argv[-1]
+class PageFetcher:
+	# Downloads pages, keeping a copy of each on disk.
+	#  Requests to the same host are at least `delay` seconds apart,
+	#  however many threads are fetching.
+	def __init__(self,cacheFolder,delay=2):
+		self.cacheFolder = cacheFolder
+		self.delay = delay
+		self.lock = threading.Lock()
+		self.hostLocks = {}
+		self.lastRequest = {}
+		os.makedirs(cacheFolder, exist_ok=True)
+
+	def cacheFileName(self,url):
+		return(self.cacheFolder + hashlib.md5(url.encode("utf8")).hexdigest() + ".html")
+
+	def waitForHost(self,host):
+		# Returns the lock for the host, once it's ok to make a request
+		with self.lock:
+			if not host in self.hostLocks:
+				self.hostLocks[host] = threading.Lock()
+		hostLock = self.hostLocks[host]
+		hostLock.acquire()
+		wait = self.lastRequest.get(host,0) + self.delay - time.monotonic()
+		if wait>0:
+			time.sleep(wait)
+		return(hostLock)
+
+	def download(self,url):
+		hostLock = self.waitForHost(urlparse(url).netloc)
+		try:
+			req = Request(url, data=None, headers={
+				'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_9_3) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/35.0.1916.47 Safari/537.36'})
+			return(urlopen(req).read().decode('utf-8'))
+		finally:
+			self.lastRequest[urlparse(url).netloc] = time.monotonic()
+			hostLock.release()
+
+	def fetch(self,url):
+		# Returns the page, or None if there is no page
+		#  (missing pages are remembered as empty files)
+		cacheFile = self.cacheFileName(url)
+		if not os.path.isfile(cacheFile):
+			try:
+				page = self.download(url)
+			except HTTPError as e:
+				if e.code != 404:
+					raise
+				page = ""
+			with open(cacheFile,'w') as o:
+				o.write(page)
+		with open(cacheFile) as f:
+			page = f.read()
+		if len(page)==0:
+			return(None)
+		return(page)
+
+def extractAttributes(page):
+	# All infobox attributes on a page: {data-source: text of its first inner div}
+	attributes = {}
+	root = etree.fromstring(page.encode("utf8"), etree.HTMLParser(encoding="utf8"))
+	if root is None:
+		return(attributes)
+	for div in root.iter("div"):
+		source = div.get("data-source")
+		if source is None or source in attributes:
+			continue
+		value = div.find(".//div")
+		if not value is None:
+			attributes[source] = "".join(value.itertext())
+	return(attributes)
+
+def getCharacterAttributes(fetcher,baseWiki,characterName):
+	try:
+		page = fetcher.fetch(pageURL(baseWiki,characterName))
+	except Exception as e:
+		print("Could not get page for "+characterName+": "+str(e))
+		return({})
+	if page is None:
+		return({})
+	return(extractAttributes(page))
+
+if __name__ == "__main__":
+	argParser = argparse.ArgumentParser(description="Look up character attributes on a wiki")
+	argParser.add_argument("folder", help="game folder")
+	argParser.add_argument("--attribute", default="gender")
+	argParser.add_argument("--source", help="base url for character pages (default: characterInfoSource in meta.json)")
+	argParser.add_argument("--threads", type=int, default=8)
+	argParser.add_argument("--delay", type=float, default=2, help="minimum seconds between requests to the same host")
+	args = argParser.parse_args()
+
+	folder = args.folder
 	if not folder.endswith(os.sep):
 		folder += os.sep
-else:
-	print("No game folder specified")
-	exit(1)
 
+	with open(folder+"meta.json") as json_file:
+		meta = json.load(json_file)
 
-with open(folder+"meta.json") as json_file:
-	meta = json.load(json_file)	
-	
-baseWiki = meta["characterInfoSource"]
+	baseWiki = meta["characterInfoSource"]
+	if not args.source is None:
+		baseWiki = args.source
 
-with open(folder+"characters.txt") as f:
-	charList = f.read()
-	
-charList = re.sub(":[0-9]+","",charList)
+	characters = readCharacterList(folder+"characters.txt")
+	print(characters)
 
-characters = eval("["+charList+"]")
-print(characters)
+	alreadyProcessedCharacters = ["ACTION","NARRATIVE","LOCATION",'Girl','Boy',"Woman","Man","Person"]
+	for k in meta["characterGroups"].keys():
+		alreadyProcessedCharacters += meta["characterGroups"][k]
 
-alreadyProcessedCharacters = ["ACTION","NARRATIVE","LOCATION",'Girl','Boy',"Woman","Man","Person"]
-for k in meta["characterGroups"].keys():
-	alreadyProcessedCharacters += meta["characterGroups"][k]
+	print(alreadyProcessedCharacters)
+	# (also matches variants like "Dr Lugae" for "Dr. Lugae")
+	alreadyProcessed = NameMatcher(alreadyProcessedCharacters)
 
-print(alreadyProcessedCharacters)
+	# Don't look up names with numbers in
+	toLookUp = [x for x in characters if alreadyProcessed.resolve(x, substrings=False) is None and not re.search("[0-9]",x)]
+	print("Searching for "+str(len(toLookUp))+" characters")
+	fetcher = PageFetcher(folder+"raw/characterInfo/",args.delay)
+	with ThreadPoolExecutor(max_workers=args.threads) as executor:
+		found = dict(zip(toLookUp, executor.map(lambda x: getCharacterAttributes(fetcher,baseWiki,x), toLookUp)))
 
-genders = {}
-for character in characters:
-	gender = "unclassified"
-	if not character in alreadyProcessedCharacters:
-		if not re.search("[0-9]",character):
-			# Don't look up names with numbers in
-			print("Searching for\t"+character, end="")
-			try:
-				gender = findAttribute(character, "gender")
-				print("\t"+gender)
-			except:
-				pass
-			time.sleep(2)
-			print("")
-	try:
-		genders[gender].append(character)
-	except:
-		genders[gender] = [character]
-
-
-print(genders)
-	
-json_data = json.dumps(genders, indent = 4)
-json_data = re.sub('{\n\t+','{',json_data)
-json_data = re.sub('\n\t+}','}',json_data)
-json_data = re.sub('\n\t+]',']',json_data)
-o = open(folder+"autoCharInfo.json",'w')
-o.write(json_data)
-o.close()
\ No newline at end of file
+	genders = {}
+	for character in characters:
+		gender = "unclassified"
+		if character in found and args.attribute in found[character]:
+			gender = found[character][args.attribute]
+			print(character+"\t"+gender)
+		try:
+			genders[gender].append(character)
+		except:
+			genders[gender] = [character]
+
+	print(genders)
+
+	json_data = json.dumps(genders, indent = 4)
+	json_data = re.sub('{\n\t+','{',json_data)
+	json_data = re.sub('\n\t+}','}',json_data)
+	json_data = re.sub('\n\t+]',']',json_data)
+	o = open(folder+"autoCharInfo.json",'w')
+	o.write(json_data)
+	o.close()
@@ -7,6 +7,7 @@
 print("LOADING LIBRARIES ...")
 import os, json, re, csv, sys
 import parsers
+import dataStream
 from textatistic import Textatistic,word_count,sent_count
 
 # TODO: Load more accurate parser
@@ -86,24 +87,36 @@ else:
 for folder in foldersToProcess:
 	print("PROCESSING "+folder+ " ...")
 	
-	if not (os.path.isfile(folder+"meta.json") and os.path.isfile(folder+"data.json")):
+	if not (os.path.isfile(folder+"meta.json") and dataStream.hasData(folder)):
 		print("##########")
 		print("JSON files not found")
 		continue
 
 	with open(folder+"meta.json") as json_file:
 		meta = json.load(json_file)
-	with open(folder+"data.json") as json_file:
-		d = json.load(json_file)["text"]
 
-	# Print list of all characters
-	# with frequency
+	# Read the script one part at a time (see dataStream.py),
+	#  keeping only the keys and lines of dialogue
 	allKeys = {}
-	for k in get_keys_recursively(d):
+	keyValues = []
+	for element in dataStream.iterScript(folder):
+		for k,v in get_key_values_recursively(element):
+			if not k.startswith("_"):
+				try:
+					allKeys[k] += 1
+				except:
+					allKeys[k] = 1
+				if isinstance(v,str):
+					keyValues.append((k,v))
+	textsByCharacter = {}
+	for k,v in keyValues:
 		try:
-			allKeys[k] += 1
+			textsByCharacter[k].append(v)
 		except:
-			allKeys[k] = 1
+			textsByCharacter[k] = [v]
+
+	# Print list of all characters
+	# with frequency
 	listOfCharactersForWriting = ",\n".join(reversed(['"'+k + '" '+ ":" + str(allKeys[k]) for k in sorted(allKeys, key=allKeys.get)]))
 	with open(folder+"characters.txt",'w') as f:
 		f.write(listOfCharactersForWriting)
@@ -145,7 +158,7 @@ for folder in foldersToProcess:
 	
 	charCountByGroup = {}
 	for groupName,character in groupsAndChars:
-		texts = [x for x in getTextByCharacters(d,[character]) if len(x.strip())>0]
+		texts = [x for x in textsByCharacter.get(character,[]) if len(x.strip())>0]
 		if len(texts)>0:
 			sx = getStats(texts)
 			lines = sx[0]
@@ -162,7 +175,7 @@ for folder in foldersToProcess:
 	out.append(columnHeaders)
 	######################
 	# Total Dialogue
-	charNamesAndDialogue = [x for x in getAllCharacterTexts(d,getNames=True)]
+	charNamesAndDialogue = [(k,v) for k,v in keyValues if not k in nonDialogueKeys]
 	totalNumChars = len(set([charName for charName,dialogue in charNamesAndDialogue if len(dialogue)>0]))
 	texts = [dialogue for charName,dialogue in charNamesAndDialogue if len(dialogue)>0]
 	stats = getStats(texts)
@@ -173,7 +186,7 @@ for folder in foldersToProcess:
 	########################
 	# Dialogue by Groups
 	for groupName,characters in meta["characterGroups"].items():
-		texts = [x for x in getTextByCharacters(d,characters) if len(x)>0]
+		texts = [v for k,v in keyValues if k in characters and len(v)>0]
 		stats = getStats(texts)
 		# csv handles escaping quotes etc.
 		cc = 0
@@ -1,5 +1,5 @@
 import os,sys,json,csv,time
-from bs4 import BeautifulSoup
+from getTropes import parseHTML, getMainArticle, getText
 
 from urllib.request import *
 
@@ -27,16 +27,14 @@ def downloadTropePageLinks(folder,url):
 		o.write(html)
 		o.close()
 	
-	html = open(charFile).read()
-	soup = BeautifulSoup(html, "html5lib")
-	main = soup.find("div",{"id":"main-article"})
-	soup.find("div",{"class":"wmglead"})
+	main = getMainArticle(parseHTML(charFile))
 	
 	links = [["VGDCName","TvTName","type","url","comment"]]
-	for link in main.find_all("a"):
-		if link["href"].count("Characters")>0:
+	for link in main.iterdescendants("a"):
+		if link.get("href","").count("Characters")>0:
 			#VGDCName,TvTName,type,url,comment
-			links.append([link.text,link.text,"main","https://tvtropes.org"+link["href"],""])
+			linkText = getText(link)
+			links.append([linkText,linkText,"main","https://tvtropes.org"+link.get("href"),""])
 	with open(folder+"tropeSources.csv","w") as o:
 		csvwriter = csv.writer(o)
 		csvwriter.writerows(links)
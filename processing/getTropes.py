@@ -2,20 +2,28 @@
 # https://tvtropes.org/pmwiki/pmwiki.php/Characters/TheElderScrollsIIIMorrowind
 # Currently assuming one char per folder. Some pages have multiple characters per folder.
 
-import os,sys,json,csv,time,re
-from bs4 import BeautifulSoup
+# Pages are parsed with lxml, and the tropes from each page are cached
+#  in raw/tropes/tropeCache.json, keyed by the hash of the page file, so
+#  only new or changed pages are parsed again. Pages are downloaded first
+#  (one at a time), then games are processed in parallel.
+#  Run for all games, or just one game, e.g.
+#  > python3 getTropes.py
+#  > python3 getTropes.py ../data/MassEffect/MassEffect1B
+#  Check that the tropes extracted match the current tropeData.csv files,
+#  without writing anything (results in ../results/tropeDataCheck.csv):
+#  > python3 getTropes.py --check
+
+import os,sys,json,csv,time,re,io,hashlib,argparse
+from multiprocessing import Pool, cpu_count
+from lxml import etree
+from nameMatcher import NameMatcher
 
 from urllib.request import *
 
-gameFolders = [root+os.sep for root,dirs,files in os.walk("../data/") if "meta.json" in files]
+# Version of the trope extraction, stored in the page cache.
+#  Change this if the extraction changes, to re-parse all pages.
+tropeCacheVersion = 1
 
-# Allow parsing of just one game
-if len(sys.argv)>1:
-	fx = sys.argv[-1]
-	if not fx.endswith(os.sep):
-		fx += os.sep
-	gameFolders = [fx]
-	
 def parseTropeSource(filepath):
 	with open(filepath, 'r') as file:
 		reader = csv.reader(file)
@@ -75,108 +83,218 @@ def cleanTropeNotes(t):
 	return(t)
 	
 
-def parseUL(ul,gameFolder,gameName,VGDCName="",TvTName=""):
+# The trope notes were originally taken from BeautifulSoup's html output
+#  (with the html5lib parser), so elements are written out the same way:
+#  attributes in alphabetical order, void elements as "<br/>", classes
+#  separated by single spaces, and only &, < and > escaped.
+voidTags = set(['area', 'base', 'basefont', 'bgsound', 'br', 'col', 'command', 'embed',
+	'frame', 'hr', 'image', 'img', 'input', 'isindex', 'keygen', 'link', 'menuitem',
+	'meta', 'nextid', 'param', 'source', 'spacer', 'track', 'wbr'])
+listAttributes = set(['class', 'accesskey', 'dropzone', 'rel', 'rev', 'headers'])
+
+def escapeHTML(t):
+	return(t.replace("&","&amp;").replace("<","&lt;").replace(">","&gt;"))
+
+def quoteAttribute(v):
+	v = escapeHTML(v)
+	if '"' in v:
+		if "'" in v:
+			return('"'+v.replace('"',"&quot;")+'"')
+		return("'"+v+"'")
+	return('"'+v+'"')
+
+def writeHTML(el,parts):
+	if el.tag is etree.Comment:
+		parts.append("<!--"+(el.text or "")+"-->")
+		return
+	if not isinstance(el.tag,str):
+		return
+	attributes = ""
+	for k,v in sorted(el.attrib.items()):
+		if k in listAttributes:
+			v = " ".join(v.split())
+		attributes += " "+k+"="+quoteAttribute(v)
+	if el.tag in voidTags:
+		parts.append("<"+el.tag+attributes+"/>")
+		return
+	parts.append("<"+el.tag+attributes+">")
+	escape = escapeHTML
+	if el.tag in ["script","style"]:
+		escape = lambda x: x
+	if el.text:
+		parts.append(escape(el.text))
+	for child in el:
+		writeHTML(child,parts)
+		if child.tail:
+			parts.append(escape(child.tail))
+	parts.append("</"+el.tag+">")
+
+def toHTML(el):
+	parts = []
+	writeHTML(el,parts)
+	return("".join(parts))
+
+def getText(el):
+	return("".join(el.itertext()))
+
+def hasClass(el,className):
+	return(className in el.get("class","").split())
+
+def findAllByClass(el,tag,className):
+	# Descendants with a given tag and class, in document order
+	return([x for x in el.iterdescendants(tag) if hasClass(x,className)])
+
+def findByClass(el,tag,className):
+	found = findAllByClass(el,tag,className)
+	if len(found)==0:
+		return(None)
+	return(found[0])
+
+def parseHTML(fileName):
+	with open(fileName,'rb') as f:
+		return(etree.fromstring(f.read(), etree.HTMLParser(encoding="utf-8")))
+
+def getMainArticle(root):
+	for div in root.iterdescendants("div"):
+		if div.get("id")=="main-article":
+			return(div)
+	return(None)
+
+def parseUL(ul,charName=""):
+	# Returns a list of [charName,tropeName,subverted,tropeNotes,tropeURL]
 	tropes = []
-	for li in ul.find_all("li",recursive=False):
-		firstLink = li.find("a", {"class":"twikilink"})
+	for li in ul.iterchildren("li"):
+		firstLink = findByClass(li,"a","twikilink")
 		if not firstLink is None:
-			tropeName = firstLink.get_text()
-			tropeURL = firstLink['href']
+			tropeName = getText(firstLink)
+			tropeURL = firstLink.get('href')
 		else:
-			tropeName = li.text.replace(".",":")+":"
+			tropeName = getText(li).replace(".",":")+":"
 			tropeName = tropeName[:tropeName.index(":")].strip()
 			tropeURL = ""
 		tropeName = tropeName.strip()
-		#tropeNotes = li.get_text() # Just text
-		tropeNotes = str(li) # Full HTML
+		#tropeNotes = getText(li) # Just text
+		tropeNotes = toHTML(li) # Full HTML
 		tropeNotes = cleanTropeNotes(tropeNotes)
 		tnl = tropeNotes.lower()
 		subverted = 0 + any([tnl.count(x)>0 for x in ["subvert","subversion"]])
-		tropes.append([gameFolder,gameName,VGDCName,TvTName,tropeName,subverted,tropeNotes,tropeURL])
+		tropes.append([charName,tropeName,subverted,tropeNotes,tropeURL])
 	return(tropes)
-	
-def parseMainCharacterTropePage(charFile,gameFolder,pageDetails):
-	gameName = pageDetails["gameName"]
-	VGDCName = pageDetails["VGDCName"]
-	TvTName = pageDetails["TvTName"]
-	with open(charFile) as o:
-		html = o.read()
-	soup = BeautifulSoup(html, "html5lib")
-	mainArticle = soup.find("div",{"id": "main-article"})
-	folders = mainArticle.find_all("div",{"class": "folder"})
+
+def parseMainCharacterPage(charFile):
+	mainArticle = getMainArticle(parseHTML(charFile))
 	tropes = []
-	for folder in folders:
-		ul = folder.find("ul")
+	for folder in findAllByClass(mainArticle,"div","folder"):
+		ul = folder.find(".//ul")
 		if not ul is None:
-			tropes += parseUL(ul, gameFolder,gameName,VGDCName,TvTName)
+			tropes += parseUL(ul)
 	return(tropes)
-			
-def parseMinorCharacterTropePage(charFile,gameFolder,pageDetails):
+
+def parseMinorCharacterPage(charFile):
 	# NPC pages with multiple characters
-	gameName = pageDetails["gameName"]
-	with open(charFile) as o:
-		html = o.read()
-	soup = BeautifulSoup(html, "html5lib")
-	mainArticle = soup.find("div",{"id": "main-article"})
+	mainArticle = getMainArticle(parseHTML(charFile))
 	# Find character folder
 	# Some pages have multiple characters per folder.
 	# And some have no wmglead within the folder class.
-	# So iterate over items 
+	# So iterate over items
 	currentCharName = ""
 	tropes = []
-	for item in mainArticle:
-		if item.name == "div":
-			if "folderlabel" in item["class"]:
-				currentCharName = item.get_text().strip()
-			elif "folder" in item["class"]:
-				wmglead = item.find("div",{"class": "wmglead"})
-				if not wmglead is None:
-					currentCharName = wmglead.get_text().strip()
-				for part in item:
-					if part.name == "h2":
-						currentCharName = part.get_text().strip()
-					elif part.name == "ul":
-						tropes += parseUL(part, gameFolder,gameName,currentCharName,currentCharName)
-	
+	for item in mainArticle.iterchildren("div"):
+		if hasClass(item,"folderlabel"):
+			currentCharName = getText(item).strip()
+		elif hasClass(item,"folder"):
+			wmglead = findByClass(item,"div","wmglead")
+			if not wmglead is None:
+				currentCharName = getText(wmglead).strip()
+			for part in item.iterchildren("h2","ul"):
+				if part.tag == "h2":
+					currentCharName = getText(part).strip()
+				else:
+					tropes += parseUL(part,currentCharName)
 	return(tropes)
-	
+
+def toTropeRows(pageTropes,gameFolder,pageDetails):
+	gameName = pageDetails["gameName"]
+	rows = []
+	for charName,tropeName,subverted,tropeNotes,tropeURL in pageTropes:
+		if pageDetails["type"]=="main":
+			VGDCName = pageDetails["VGDCName"]
+			TvTName = pageDetails["TvTName"]
+		else:
+			VGDCName = charName
+			TvTName = charName
+		rows.append([gameFolder,gameName,VGDCName,TvTName,tropeName,subverted,tropeNotes,tropeURL])
+	return(rows)
+
+def parseMainCharacterTropePage(charFile,gameFolder,pageDetails):
+	return(toTropeRows(parseMainCharacterPage(charFile),gameFolder,pageDetails))
+
+def parseMinorCharacterTropePage(charFile,gameFolder,pageDetails):
+	return(toTropeRows(parseMinorCharacterPage(charFile),gameFolder,pageDetails))
+
+def hashFile(fileName):
+	h = hashlib.md5()
+	with open(fileName,'rb') as f:
+		for chunk in iter(lambda: f.read(1<<20), b""):
+			h.update(chunk)
+	return(h.hexdigest())
+
+def loadTropeCache(cacheFile):
+	if os.path.isfile(cacheFile):
+		with open(cacheFile) as f:
+			cache = json.load(f)
+		if cache.get("version")==tropeCacheVersion:
+			return(cache)
+	return({"version":tropeCacheVersion, "pages":{}})
+
+def getPageTropes(pageFilepath,pageType,cache):
+	# Tropes for a page, from the cache if the page hasn't changed
+	key = os.path.basename(pageFilepath)
+	pageHash = hashFile(pageFilepath)
+	cached = cache["pages"].get(key)
+	if not cached is None and cached["hash"]==pageHash and cached["type"]==pageType:
+		return(cached["tropes"])
+	if pageType=="main":
+		pageTropes = parseMainCharacterPage(pageFilepath)
+	else:
+		pageTropes = parseMinorCharacterPage(pageFilepath)
+	cache["pages"][key] = {"hash":pageHash, "type":pageType, "tropes":pageTropes}
+	cache["changed"] = True
+	return(pageTropes)
+
+
+# Corpus names that shouldn't be matched as part of a longer TV Tropes name
+genericNames = ["Guard","Girl","Boy","Man","Woman","Captain",
+				"Princess", "Prince", "King", "Queen", "Chocobo",
+				"Soldier", "Judge", "Shepard", "Mother", "Father", "Child"]
+
+def isSingleCharacterName(TvTName):
+	# (avoid multiple chars and posessives like "Johnny's parents")
+	return(len(TvTName) > 6 and all([TvTName.count(x)==0 for x in ["&"," and ","'s "]]))
+
 def autoMapCharNames(tropes, gameCharGroups):
 	VGDCCharNames = []
 	for group in gameCharGroups:
 		VGDCCharNames += gameCharGroups[group]
-	VGDCCharNames = list(set(VGDCCharNames))
+	matcher = NameMatcher(VGDCCharNames,genericNames)
 	
 	header = tropes[0]
 	
 	# Skip first line of tropes object, because it's a header
-	allTvTCharNames = list(set([x[header.index("TvTName")] for x in tropes[1:]]))
+	allTvTCharNames = sorted(set([x[header.index("TvTName")] for x in tropes[1:]]))
 	allTvTCharNames = [x.strip() for x in allTvTCharNames if len(x.strip())>0]
 	TvT_to_VGDC = {}
 	for TvTName in allTvTCharNames:
-		if TvTName in VGDCCharNames:
-			TvT_to_VGDC[TvTName] = TvTName
-		else:
-			# remove "Dr."
-			if TvTName.count("Dr.")>0:
-				x = TvTName.replace("Dr.","").strip()
-				if x in VGDCCharNames:
-					print(TvTName + " -> " + x)
-					TvT_to_VGDC[TvTName] = x
-					break
-			elif len(TvTName) > 6 and all([TvTName.count(x)==0 for x in ["&"," and ","'s "]]):
-				# (avoid multiple chars and posessives like "Johnny's parents")
-				# "Ambassador Donnel Udina" -> "Donnel Udina",
-				# TODO: really, this should split by names and find overlaps
-				# But either may confuse people with the same surname?
-				candidates = [x for x in VGDCCharNames if TvTName.count(x)>0]
-				candidates = sorted(candidates, key=len,reverse=True)
-				filterGenericNames = ["Guard","Girl","Boy","Man","Woman","Captain",
-										"Princess", "Prince", "King", "Queen", "Chocobo",
-										"Soldier", "Judge", "Shepard", "Mother", "Father", "Child"]
-				candidates = [x for x in candidates if not x in filterGenericNames]
-				if len(candidates)>0:
-					print(TvTName + " -> " + candidates[0])
-					TvT_to_VGDC[TvTName] = candidates[0]
+		# Exact match, then without titles like "Dr.", then the longest
+		#  corpus name within the TvT name:
+		# "Ambassador Donnel Udina" -> "Donnel Udina",
+		# TODO: really, this should split by names and find overlaps
+		# But either may confuse people with the same surname?
+		VGDCName = matcher.resolve(TvTName, substrings=isSingleCharacterName(TvTName))
+		if not VGDCName is None:
+			if VGDCName != TvTName:
+				print(TvTName + " -> " + VGDCName)
+			TvT_to_VGDC[TvTName] = VGDCName
 	
 	# Make replacements
 	for trope in tropes:
@@ -186,62 +304,124 @@ def autoMapCharNames(tropes, gameCharGroups):
 	
 	return(tropes)
 
-# These are game folders
-for gameFolder in gameFolders:
-	# Check if we have a tropesource file
-	tropeSourcePath = gameFolder+"tropeSources.csv"
-	if os.path.isfile(tropeSourcePath):
-		print("\n\n\n\n")
-		print(gameFolder)
-		with open(gameFolder+"meta.json") as json_file:
-			meta = json.load(json_file)
-		gameName = meta["game"]
-		tropes = [["folder","game","VGDCName","TvTName","tropeName","subverted","tropeNotes","tropeURL"]]
-		d = parseTropeSource(tropeSourcePath)
-		for page in d:
-			page["gameName"] = gameName
-			pageFilepath = downloadTropePage(gameFolder,page["url"])
-			if page["type"]=="main":
-				tropes += parseMainCharacterTropePage(pageFilepath,gameFolder,page)
-			elif page["type"]=="minor":
-				tropes += parseMinorCharacterTropePage(pageFilepath,gameFolder,page)
-		
-		# Attempt to automatically map character names
-		tropes = autoMapCharNames(tropes, meta["characterGroups"])
-		
-		# Change character names
-		charMapFile = gameFolder+"tropeCharMap.json"
-		if not os.path.isfile(charMapFile):
-			# No char map file yet - let's make a template
-			gameCharNames = []
-			for group in meta["characterGroups"]:
-				gameCharNames += meta["characterGroups"][group]
-		
-			charMap = {}
-			if len(tropes)>1:
-				for trope in tropes[1:]:
-					VGDCName = trope[2]
-					TvTName = trope[3]
-					if not VGDCName in gameCharNames:
-						VGDCName = "!"+VGDCName
-					if TvTName != VGDCName:
-						charMap[TvTName] = VGDCName
-				json_object = json.dumps(charMap, indent=4)
-				with open(charMapFile,'w') as o:
-					o.write(json_object)
-		else:
-			# Load a char map and apply the changes
-			with open(charMapFile) as json_file:
-				charMap = json.load(json_file)
+def getTropePages(gameFolder,gameName):
+	# Pages listed in tropeSources.csv, downloading any that are missing
+	pages = parseTropeSource(gameFolder+"tropeSources.csv")
+	for page in pages:
+		page["gameName"] = gameName
+		page["filepath"] = downloadTropePage(gameFolder,page["url"])
+	return(pages)
+
+def extractTropes(gameFolder,pages,characterGroups,writeCharMap=True):
+	tropes = [["folder","game","VGDCName","TvTName","tropeName","subverted","tropeNotes","tropeURL"]]
+	cacheFile = gameFolder+"raw/tropes/tropeCache.json"
+	cache = loadTropeCache(cacheFile)
+	for page in pages:
+		if page["type"] in ["main","minor"]:
+			tropes += toTropeRows(getPageTropes(page["filepath"],page["type"],cache),gameFolder,page)
+	if cache.pop("changed",False):
+		with open(cacheFile,'w') as o:
+			json.dump(cache,o)
+
+	# Attempt to automatically map character names
+	tropes = autoMapCharNames(tropes, characterGroups)
+
+	# Change character names
+	charMapFile = gameFolder+"tropeCharMap.json"
+	if not os.path.isfile(charMapFile):
+		if not writeCharMap:
+			return(tropes)
+		# No char map file yet - let's make a template
+		gameCharNames = []
+		for group in characterGroups:
+			gameCharNames += characterGroups[group]
+
+		charMap = {}
+		if len(tropes)>1:
 			for trope in tropes[1:]:
+				VGDCName = trope[2]
 				TvTName = trope[3]
-				if TvTName in charMap:
-					VGDCName = charMap[TvTName]
-					if not VGDCName.startswith("!"):
-						trope[2] = VGDCName
-		
-		# Write the data	
-		with open(gameFolder+"tropeData.csv","w") as o:
-			csvwriter = csv.writer(o)
-			csvwriter.writerows(tropes)
-		
\ No newline at end of file
+				if not VGDCName in gameCharNames:
+					VGDCName = "!"+VGDCName
+				if TvTName != VGDCName:
+					charMap[TvTName] = VGDCName
+			json_object = json.dumps(charMap, indent=4)
+			with open(charMapFile,'w') as o:
+				o.write(json_object)
+	else:
+		# Load a char map and apply the changes
+		with open(charMapFile) as json_file:
+			charMap = json.load(json_file)
+		for trope in tropes[1:]:
+			TvTName = trope[3]
+			if TvTName in charMap:
+				VGDCName = charMap[TvTName]
+				if not VGDCName.startswith("!"):
+					trope[2] = VGDCName
+	return(tropes)
+
+def toCSV(tropes):
+	o = io.StringIO()
+	csvwriter = csv.writer(o)
+	csvwriter.writerows(tropes)
+	return(o.getvalue())
+
+def processGame(job):
+	# Extract the tropes for one game, and either write tropeData.csv,
+	#  or (if check is True) compare them to the current tropeData.csv
+	#  Returns [gameFolder, seconds, identical]
+	gameFolder,pages,characterGroups,check = job
+	print(gameFolder)
+	startTime = time.perf_counter()
+	tropeData = toCSV(extractTropes(gameFolder,pages,characterGroups,writeCharMap=not check))
+	t = round(time.perf_counter()-startTime,3)
+	tropeDataFile = gameFolder+"tropeData.csv"
+	if not check:
+		# Write the data
+		with open(tropeDataFile,"w") as o:
+			o.write(tropeData)
+		return([gameFolder,t,"NA"])
+	identical = False
+	if os.path.isfile(tropeDataFile):
+		with open(tropeDataFile, newline='') as f:
+			identical = f.read()==tropeData
+	print("  "+gameFolder+": "+("identical" if identical else "DIFFERENT"))
+	return([gameFolder,t,identical])
+
+if __name__ == "__main__":
+	argParser = argparse.ArgumentParser(description="Extract character tropes from TV Tropes pages")
+	argParser.add_argument("folder", nargs="?", help="just process one game folder")
+	argParser.add_argument("--check", action="store_true", help="compare with the current tropeData.csv files instead of writing them")
+	argParser.add_argument("--processes", type=int, default=cpu_count())
+	args = argParser.parse_args()
+
+	gameFolders = [root+os.sep for root,dirs,files in os.walk("../data/") if "meta.json" in files]
+	# Allow parsing of just one game
+	if not args.folder is None:
+		fx = args.folder
+		if not fx.endswith(os.sep):
+			fx += os.sep
+		gameFolders = [fx]
+
+	# Download pages first (one at a time), then extract tropes for each game
+	jobs = []
+	for gameFolder in gameFolders:
+		# Check if we have a tropesource file
+		if os.path.isfile(gameFolder+"tropeSources.csv"):
+			with open(gameFolder+"meta.json") as json_file:
+				meta = json.load(json_file)
+			pages = getTropePages(gameFolder,meta["game"])
+			jobs.append((gameFolder,pages,meta["characterGroups"],args.check))
+
+	if args.processes>1 and len(jobs)>1:
+		with Pool(min(args.processes,len(jobs))) as pool:
+			results = pool.map(processGame,jobs)
+	else:
+		results = [processGame(job) for job in jobs]
+
+	if args.check:
+		os.makedirs("../results/", exist_ok=True)
+		with open("../results/tropeDataCheck.csv",'w') as o:
+			writer = csv.writer(o)
+			writer.writerow(["game","seconds","identical"])
+			writer.writerows(results)
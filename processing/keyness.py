@@ -4,6 +4,7 @@
 print("Loading libraries ...")
 import os, json, re, csv, sys
 #from corpusHelpers import *
+import dataStream
 # For log likelihood calculator
 from corpus_toolkit import corpus_tools as ct
 
@@ -33,6 +34,34 @@ def latex_float(f):
 	else:
 		return float_str
 
+def tokenise(charDialogue):
+	for k in charDialogue.keys():
+		# Tokenise: From Textatistic, also applies "punct_clean"
+		# (not just simple splitting by spaces)
+		# Also convert to lowercase
+		charDialogue[k] = [[wd.lower() for wd in word_array(line)] for line in charDialogue[k]]
+
+def countWordsByGroup(charDialogue):
+	# Make frequency dictionary
+	#  charDialogue keys are (folder,series,game,group,charName),
+	#  values are lists of tokenised lines
+	malefreq = {}
+	femalefreq = {}
+	for (folder,series,game,group,charName),lines in charDialogue.items():
+		for line in lines:
+			for word in line:
+				if group=="male":
+					try:
+						malefreq[word] += 1
+					except:
+						malefreq[word] = 1
+				elif group=="female":
+					try:
+						femalefreq[word] += 1
+					except:
+						femalefreq[word] = 1
+	return(malefreq,femalefreq)
+
 print("Collecting texts ...")
 allFolders = [root+os.sep for root,dirs,files in os.walk("../data/") if "meta.json" in files]
 
@@ -57,11 +86,9 @@ numGames =0
 		
 for folder in foldersToProcess:
 	print(folder)
-	if os.path.isfile(folder+"meta.json") and os.path.isfile(folder+"data.json"):
+	if os.path.isfile(folder+"meta.json") and dataStream.hasData(folder):
 		with open(folder+"meta.json") as json_file:
 			meta = json.load(json_file)
-		with open(folder+"data.json") as json_file:
-			d = json.load(json_file)["text"]
 		
 		includeGame = True
 		# alternativeMeasure is true if this parsing should not count 
@@ -78,22 +105,24 @@ for folder in foldersToProcess:
 			series = meta["series"]
 			game = meta["game"]
 			
-			for charName, dialogue in getAllCharacterTexts(d, getNames=True):
-				# remove text in parentheses
-				dialogue = re.sub("\(.+?\)"," ",dialogue)
-				# from corpusHelpers
-				dialogue = cleanText(dialogue)
-				group = ""
-				try:
-					group = name2Group[charName]
-				except:
-					pass
-				if group in ["male","female"]:
-					key = (folder,series,game,group,charName)
-					if key in charDialogue:
-						charDialogue[key].append(dialogue)
-					else:
-						charDialogue[key] = [dialogue]
+			# Stream the script one element at a time (see dataStream.py)
+			for element in dataStream.iterScript(folder):
+				for charName, dialogue in getAllCharacterTexts(element, getNames=True):
+					# remove text in parentheses
+					dialogue = re.sub("\(.+?\)"," ",dialogue)
+					# from corpusHelpers
+					dialogue = cleanText(dialogue)
+					group = ""
+					try:
+						group = name2Group[charName]
+					except:
+						pass
+					if group in ["male","female"]:
+						key = (folder,series,game,group,charName)
+						if key in charDialogue:
+							charDialogue[key].append(dialogue)
+						else:
+							charDialogue[key] = [dialogue]
 
 with open("../results/latexStats/numberOfGames.tex",'w') as o:
 	o.write(str(numGames))
@@ -117,30 +146,10 @@ o.close()
 ## (stats to latex is now moved to getStatistics.py)
 
 print("Tokenising ...")
-
-for k in charDialogue.keys():
-	# Tokenise: From Textatistic, also applies "punct_clean"
-	# (not just simple splitting by spaces)
-	# Also convert to lowercase
-	charDialogue[k] = [[wd.lower() for wd in word_array(line)] for line in charDialogue[k]]
+tokenise(charDialogue)
 	
 print("Counting words ...")
-# Make frequency dictionary
-malefreq = {}
-femalefreq = {}
-for (folder,series,game,group,charName),lines in charDialogue.items():
-	for line in lines:
-		for word in line:
-			if group=="male":
-				try:
-					malefreq[word] += 1
-				except:
-					malefreq[word] = 1
-			elif group=="female":
-				try:
-					femalefreq[word] += 1
-				except:
-					femalefreq[word] = 1
+malefreq,femalefreq = countWordsByGroup(charDialogue)
 				
 
 print("Filtering ...")
@@ -0,0 +1,118 @@
+# Match character names from other sources (TV Tropes, wikis) to the
+#  character names used in the corpus.
+#  The corpus names are compiled into an Aho-Corasick automaton, so all of
+#  the corpus names that appear inside a name are found in one pass over
+#  it, rather than checking each corpus name in turn. Names are also
+#  indexed by their normalised tokens (lower case, no punctuation or
+#  titles like "Dr."), so "Dr. Karin Chakwas" can match "Karin Chakwas".
+#  e.g.
+#  > matcher = NameMatcher(["Karin Chakwas","Donnel Udina","Guard"],genericNames=["Guard"])
+#  > matcher.resolve("Ambassador Donnel Udina")
+#  'Donnel Udina'
+
+import re
+
+# Only gender-neutral titles are ignored: "Mr. Smith" and "Mrs. Smith"
+#  are different characters
+titles = ["dr","doctor","prof","professor"]
+
+def normalizeName(name):
+	# Tuple of lower case tokens, without punctuation or titles
+	tokens = re.findall(r"[^\W_]+(?:'[^\W_]+)*", name.lower())
+	return(tuple([x for x in tokens if not x in titles]))
+
+class AhoCorasick:
+	# Automaton for finding all occurrences of a set of strings in a text
+	def __init__(self,patterns):
+		self.goto = [{}]     # state -> {character: next state}
+		self.fail = [0]      # state -> fallback state
+		self.output = [[]]   # state -> patterns that end at this state
+		for pattern in patterns:
+			self.addPattern(pattern)
+		self.buildFailLinks()
+
+	def addPattern(self,pattern):
+		if len(pattern)==0:
+			return
+		state = 0
+		for c in pattern:
+			if not c in self.goto[state]:
+				self.goto.append({})
+				self.fail.append(0)
+				self.output.append([])
+				self.goto[state][c] = len(self.goto)-1
+			state = self.goto[state][c]
+		if not pattern in self.output[state]:
+			self.output[state].append(pattern)
+
+	def buildFailLinks(self):
+		# Breadth-first, so each state's fail link is set before its children's
+		queue = list(self.goto[0].values())
+		i = 0
+		while i < len(queue):
+			state = queue[i]
+			i += 1
+			for c,nextState in self.goto[state].items():
+				queue.append(nextState)
+				f = self.fail[state]
+				while f>0 and not c in self.goto[f]:
+					f = self.fail[f]
+				self.fail[nextState] = self.goto[f].get(c,0)
+				self.output[nextState] += self.output[self.fail[nextState]]
+
+	def findAll(self,text):
+		# Returns a list of (end position, pattern) for every occurrence
+		found = []
+		state = 0
+		for i,c in enumerate(text):
+			while state>0 and not c in self.goto[state]:
+				state = self.fail[state]
+			state = self.goto[state].get(c,0)
+			for pattern in self.output[state]:
+				found.append((i+1,pattern))
+		return(found)
+
+class NameMatcher:
+	def __init__(self,names,genericNames=[]):
+		# names: names used in the corpus
+		# genericNames: names that are never matched as part of a longer name
+		self.names = set(names)
+		self.genericNames = set(genericNames)
+		self.automaton = AhoCorasick(sorted(self.names))
+		self.tokenIndex = {}
+		for name in self.names:
+			key = normalizeName(name)
+			if len(key)>0:
+				self.tokenIndex.setdefault(key,[]).append(name)
+
+	def exact(self,name):
+		if name in self.names:
+			return(name)
+		return(None)
+
+	def normalized(self,name):
+		# The name with the same normalised tokens, if there is only one
+		found = self.tokenIndex.get(normalizeName(name),[])
+		if len(found)==1:
+			return(found[0])
+		return(None)
+
+	def candidates(self,name):
+		# Corpus names that appear within the name, longest first
+		found = set([pattern for end,pattern in self.automaton.findAll(name)])
+		found = [x for x in found if not x in self.genericNames]
+		return(sorted(found, key=lambda x: (-len(x),x)))
+
+	def resolve(self,name,substrings=True):
+		# The best match for a name: an exact match, then a match of
+		#  normalised tokens, then (if substrings is True) the longest
+		#  corpus name within the name. Returns None if there is no match.
+		name = name.strip()
+		match = self.exact(name)
+		if match is None:
+			match = self.normalized(name)
+		if match is None and substrings:
+			candidates = self.candidates(name)
+			if len(candidates)>0:
+				match = candidates[0]
+		return(match)
@@ -0,0 +1,75 @@
+# Move a game's raw files into a compressed raw store (see parsers/rawStore.py),
+#  or back out again. Parsers read from the store without unpacking it.
+#  e.g.
+#  > python3 packRawStore.py ../data/FinalFantasy/FFXIV
+#  > python3 packRawStore.py --remove ../data/FinalFantasy/FFXIV
+#  > python3 packRawStore.py --list ../data/FinalFantasy/FFXIV
+#  > python3 packRawStore.py --unpack ../data/FinalFantasy/FFXIV
+#  Cached content files and string table indexes made by the parsers
+#  (see rawContent.py and stringTable.py) are not stored.
+
+import os, argparse
+from parsers import rawStore, rawContent, stringTable
+
+def rawFileNames(rawFolder):
+	# Names of all files in raw/ (and its subfolders), relative to raw/
+	names = []
+	for root,dirs,files in os.walk(rawFolder):
+		for f in files:
+			name = os.path.relpath(os.path.join(root,f),rawFolder).replace(os.sep,"/")
+			if not name.endswith((rawContent.contentSuffix,stringTable.indexSuffix)):
+				names.append(name)
+	return(sorted(names))
+
+def pack(folder,compression=None,remove=False):
+	rawFolder = folder+"raw/"
+	store = rawStore.RawStore(folder,create=True,compression=compression)
+	names = rawFileNames(rawFolder)
+	rawSize = 0
+	for name in names:
+		with open(rawFolder+name,'rb') as f:
+			data = f.read()
+		store.write(name,data)
+		rawSize += len(data)
+	# Check everything can be read back before removing anything
+	for name in names:
+		with open(rawFolder+name,'rb') as f:
+			if store.read(name)!=f.read():
+				raise ValueError("Raw store does not match "+rawFolder+name)
+	print("Packed "+str(len(names))+" files ("+str(len(store.blobs))+" distinct), "+
+		str(rawSize)+" bytes -> "+str(os.path.getsize(store.storePath))+" bytes ("+store.compression+")")
+	if remove:
+		for name in names:
+			os.remove(rawFolder+name)
+		print("Removed packed files from "+rawFolder)
+
+def unpack(folder):
+	store = rawStore.RawStore(folder)
+	for name in store.names():
+		fileName = folder+"raw/"+name
+		os.makedirs(os.path.dirname(fileName), exist_ok=True)
+		with open(fileName,'wb') as o:
+			o.write(store.read(name))
+	print("Unpacked "+str(len(store.names()))+" files to "+folder+"raw/")
+
+if __name__ == "__main__":
+	argParser = argparse.ArgumentParser(description="Pack a game's raw files into a compressed store")
+	argParser.add_argument("folder", help="game folder")
+	argParser.add_argument("--remove", action="store_true", help="remove the raw files once they are packed")
+	argParser.add_argument("--unpack", action="store_true", help="write the files in the store back to raw/")
+	argParser.add_argument("--list", action="store_true", help="list the files in the store")
+	argParser.add_argument("--compression", choices=["zstd","zlib"], help="default: zstd if the zstandard module is installed, otherwise zlib")
+	args = argParser.parse_args()
+
+	folder = args.folder
+	if not folder.endswith(os.sep):
+		folder += os.sep
+
+	if args.list:
+		store = rawStore.RawStore(folder)
+		for name in store.names():
+			print(name+"\t"+str(store.size(name)))
+	elif args.unpack:
+		unpack(folder)
+	else:
+		pack(folder,args.compression,args.remove)
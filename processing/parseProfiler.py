@@ -0,0 +1,182 @@
+# Timing and memory measurements for parseRawData.py.
+#  Each stage of parsing a game (parsing each raw file, postProcessing,
+#  aliases, writing) is timed (wall clock and CPU time), along with the
+#  peak memory use (RSS) during the stage. Parsers that use a process pool
+#  (e.g. Dragon Age Inquisition, Disco Elysium, BG3) do most of their work
+#  in worker processes, which process_time and the peak RSS don't include,
+#  so the CPU time of finished child processes is recorded separately
+#  (childCPU), along with the peak RSS of the largest child so far
+#  (childPeakRSS; this can't be reset, so it is only given for stages
+#  where child processes ran). A report for the run is written
+#  to ../results/parsePerformance.csv (one row per game and stage) and
+#  ../results/parsePerformance.json (with details for each raw file).
+#  A whole game can also be profiled with cProfile (or pyinstrument, if
+#  installed), see parseRawData.py --profile
+
+import os, sys, time, json, csv, platform
+from contextlib import contextmanager
+
+try:
+	import resource
+except ImportError:
+	resource = None
+
+reportFolder = "../results/"
+profileFolder = "../results/parseProfiles/"
+stageNames = ["parse","postProcessing","aliases","write"]
+
+def resetPeakRSS():
+	# On Linux, the peak RSS (VmHWM) can be reset, so it can be
+	#  measured for each stage rather than for the whole run
+	try:
+		with open("/proc/self/clear_refs",'w') as o:
+			o.write("5")
+		return(True)
+	except OSError:
+		return(False)
+
+def peakRSS():
+	# Peak resident memory in MB (since the last reset, where possible)
+	try:
+		with open("/proc/self/status") as f:
+			for line in f:
+				if line.startswith("VmHWM:"):
+					return(int(line.split()[1])/1024)
+	except OSError:
+		pass
+	if resource is None:
+		return(None)
+	maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	# (bytes on macOS, KB elsewhere)
+	if sys.platform=="darwin":
+		return(maxrss/(1024*1024))
+	return(maxrss/1024)
+
+def childUsage():
+	# (CPU seconds, peak RSS in MB) of the child processes that have finished
+	if resource is None:
+		return((0,None))
+	usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+	maxrss = usage.ru_maxrss/(1024*1024) if sys.platform=="darwin" else usage.ru_maxrss/1024
+	return((usage.ru_utime+usage.ru_stime,maxrss))
+
+def gameID(folder):
+	# e.g. ../data/FinalFantasy/FFVII/ -> FinalFantasy_FFVII
+	parts = [x for x in os.path.normpath(folder).split(os.sep) if len(x)>0 and x!=".."]
+	if "data" in parts:
+		parts = parts[parts.index("data")+1:]
+	return("_".join(parts))
+
+class GameProfile:
+	def __init__(self,folder,game="",parser=""):
+		self.folder = folder
+		self.game = game
+		self.parser = parser
+		self.stages = []
+
+	@contextmanager
+	def stage(self,name,fileName=""):
+		resetPeakRSS()
+		startWall = time.perf_counter()
+		startCPU = time.process_time()
+		startChildCPU = childUsage()[0]
+		try:
+			yield
+		finally:
+			childCPU,childRSS = childUsage()
+			childCPU -= startChildCPU
+			self.stages.append({"stage": name, "file": fileName,
+				"wall": time.perf_counter()-startWall,
+				"cpu": time.process_time()-startCPU,
+				"peakRSS": peakRSS(),
+				"childCPU": childCPU,
+				"childPeakRSS": childRSS if childCPU>0 else None})
+
+	def summary(self):
+		# Totals for each stage (parse time is summed over the raw files)
+		out = []
+		for name in stageNames + [x["stage"] for x in self.stages if not x["stage"] in stageNames]:
+			stages = [x for x in self.stages if x["stage"]==name]
+			if len(stages)==0 or name in [x["stage"] for x in out]:
+				continue
+			peaks = [x["peakRSS"] for x in stages if not x["peakRSS"] is None]
+			childPeaks = [x["childPeakRSS"] for x in stages if not x["childPeakRSS"] is None]
+			out.append({"stage": name, "files": len([x for x in stages if x["file"]!=""]),
+				"wall": sum(x["wall"] for x in stages),
+				"cpu": sum(x["cpu"] for x in stages),
+				"peakRSS": max(peaks) if len(peaks)>0 else None,
+				"childCPU": sum(x["childCPU"] for x in stages),
+				"childPeakRSS": max(childPeaks) if len(childPeaks)>0 else None})
+		return(out)
+
+	def printSummary(self):
+		total = sum(x["wall"] for x in self.stages)
+		bits = [x["stage"]+" "+str(round(x["wall"],2))+"s" for x in self.summary()]
+		peaks = [x["peakRSS"] for x in self.stages if not x["peakRSS"] is None]
+		peak = "" if len(peaks)==0 else ", peak RSS "+str(round(max(peaks)))+"MB"
+		childCPU = sum(x["childCPU"] for x in self.stages)
+		children = "" if childCPU==0 else ", child processes "+str(round(childCPU,2))+"s CPU"
+		print("  "+str(round(total,2))+"s ("+", ".join(bits)+")"+peak+children)
+
+@contextmanager
+def profileGame(folder,tool):
+	""" Profile everything in the block with cProfile or pyinstrument,
+		saving the results in ../results/parseProfiles/ """
+	if tool is None:
+		yield
+		return
+	os.makedirs(profileFolder, exist_ok=True)
+	fileName = profileFolder+gameID(folder)
+	if tool=="pyinstrument":
+		from pyinstrument import Profiler
+		profiler = Profiler()
+		profiler.start()
+		try:
+			yield
+		finally:
+			profiler.stop()
+			with open(fileName+".html",'w') as o:
+				o.write(profiler.output_html())
+	else:
+		import cProfile, pstats
+		profiler = cProfile.Profile()
+		profiler.enable()
+		try:
+			yield
+		finally:
+			profiler.disable()
+			profiler.dump_stats(fileName+".prof")
+			with open(fileName+".txt",'w') as o:
+				pstats.Stats(profiler,stream=o).sort_stats("cumulative").print_stats(40)
+
+def roundValue(x,digits=4):
+	if x is None:
+		return(None)
+	return(round(x,digits))
+
+def roundStage(s):
+	return(dict(s, wall=roundValue(s["wall"]), cpu=roundValue(s["cpu"]), peakRSS=roundValue(s["peakRSS"],1),
+		childCPU=roundValue(s["childCPU"]), childPeakRSS=roundValue(s["childPeakRSS"],1)))
+
+def writeReport(profiles,reportName="parsePerformance"):
+	""" Write the CSV and JSON reports for a list of GameProfiles. """
+	os.makedirs(reportFolder, exist_ok=True)
+	# (cpuSeconds and peakRSS_MB are for the main process only)
+	rows = [["gameID","game","parser","stage","files","wallSeconds","cpuSeconds","peakRSS_MB","childCpuSeconds","childPeakRSS_MB"]]
+	for p in profiles:
+		for s in p.summary():
+			rows.append([gameID(p.folder),p.game,p.parser,s["stage"],s["files"],
+				roundValue(s["wall"]),roundValue(s["cpu"]),roundValue(s["peakRSS"],1),
+				roundValue(s["childCPU"]),roundValue(s["childPeakRSS"],1)])
+	with open(reportFolder+reportName+".csv",'w') as o:
+		csvwriter = csv.writer(o)
+		csvwriter.writerows(rows)
+
+	report = {"python": platform.python_version(), "platform": platform.platform(),
+		"time": time.strftime("%Y-%m-%d %H:%M:%S"), "games": []}
+	for p in profiles:
+		report["games"].append({"gameID": gameID(p.folder), "game": p.game, "parser": p.parser,
+			"stages": [roundStage(s) for s in p.summary()],
+			"files": [roundStage(s) for s in p.stages if s["file"]!=""]})
+	with open(reportFolder+reportName+".json",'w') as o:
+		json.dump(report,o,indent="\t")
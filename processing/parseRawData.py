@@ -1,9 +1,12 @@
-import os, json, re, sys
+import os, json, re, sys, argparse
 import parsers
+from parsers import rawStore
+import dataStream
+import parseProfiler
 from copy import deepcopy
 
 
-def writeData(out,folder):
+def toJSON(out):
 	json_data = json.dumps({"text":out}, indent="\t",ensure_ascii=False)
 	# make a bit more compact
 	json_data = re.sub('{\n\t+','{',json_data)
@@ -12,6 +15,10 @@ def writeData(out,folder):
 	json_data = re.sub('\n\t+]',']',json_data)
 	# Non-dialogue info should not have its own line
 	json_data = re.sub('",\n\t+"_','", "_',json_data)
+	return(json_data)
+
+def writeData(out,folder):
+	json_data = toJSON(out)
 	o = open(folder+"data.json",'w')
 	o.write(json_data)
 	o.close()
@@ -93,34 +100,28 @@ def changeAliasMulitlevel_applyMetaFileOrder(lines,aliases):
 		lines = applyOneAlias(lines,target,replacement)
 	return(lines)
 	
-folders = [root+os.sep for root,dirs,files in os.walk("../data/") if "meta.json" in files]
-
-# Allow parsing of just one game
-if len(sys.argv)>1:
-	fx = sys.argv[-1]
-	if not fx.endswith(os.sep):
-		fx += os.sep
-	folders = [fx]
-
-for folder in folders:
-	with open(folder+"meta.json") as json_file:
-		meta = json.load(json_file)
+def parseGame(folder,meta,profile=None):
+	# profile (a parseProfiler.GameProfile) records the time taken by each stage
 	pp = meta["parserParameters"]
-	print("PARSING "+meta["game"])
-
-	parseMethod = getattr(getattr(parsers, pp["parser"]),"parseFile")
+	if profile is None:
+		profile = parseProfiler.GameProfile(folder,meta.get("game",""),pp["parser"])
+	parser = parsers.getParser(pp["parser"])
+	parseMethod = getattr(parser,"parseFile")
 	fileType = "html"
 	if "fileType" in pp:
 		fileType = pp["fileType"]
-	rawFiles = [x for x in os.listdir(folder+"raw/") if x.endswith(fileType)]
+	# (raw files can be on disk or in a raw store, see parsers/rawStore.py)
+	rawFiles = [x for x in rawStore.listRaw(folder+"raw/") if x.endswith(fileType)]
 	rawFiles.sort()
 	out = []
 	for rawFile in rawFiles:
-		out += parseMethod(folder+"raw/"+rawFile,pp)
+		with profile.stage("parse",rawFile):
+			out += parseMethod(folder+"raw/"+rawFile,pp)
 	
-	if hasattr(getattr(parsers, pp["parser"]), 'postProcessing'):
-		postProcessingMethod = getattr(getattr(parsers, pp["parser"]),"postProcessing")
-		out = postProcessingMethod(out)
+	if hasattr(parser, 'postProcessing'):
+		postProcessingMethod = getattr(parser,"postProcessing")
+		with profile.stage("postProcessing"):
+			out = postProcessingMethod(out)
 	
 	#altAliasOut = deepcopy(out)
 	if "aliases" in meta.keys():
@@ -128,7 +129,47 @@ for folder in folders:
 		#  However, coders were creating rules as if they iterated over rules, applying a rule to all lines.
 		#  So another algorithm was implemented
 		#out = changeAliasMulitlevel(out,meta["aliases"])
-		out = changeAliasMulitlevel_applyMetaFileOrder(out,meta["aliases"])
-	
-	writeData(out,folder)
+		with profile.stage("aliases"):
+			out = changeAliasMulitlevel_applyMetaFileOrder(out,meta["aliases"])
+	return(out)
+
+if __name__ == "__main__":
+	argParser = argparse.ArgumentParser(description="Parse the raw files for each game into data.json")
+	argParser.add_argument("folder", nargs="?", help="game folder (default: all games)")
+	argParser.add_argument("--jsonl", action="store_true", help="also write the line-delimited data.jsonl (see dataStream.py)")
+	argParser.add_argument("--profile", action="store_true", help="profile each game with cProfile, saving the results in ../results/parseProfiles/")
+	argParser.add_argument("--pyinstrument", action="store_true", help="profile each game with pyinstrument instead of cProfile")
+	argParser.add_argument("--report", default="parsePerformance", help="name of the performance report written to ../results/")
+	args = argParser.parse_args()
+
+	folders = [root+os.sep for root,dirs,files in os.walk("../data/") if "meta.json" in files]
+
+	# Allow parsing of just one game
+	if not args.folder is None:
+		fx = args.folder
+		if not fx.endswith(os.sep):
+			fx += os.sep
+		folders = [fx]
+
+	profileTool = None
+	if args.pyinstrument:
+		profileTool = "pyinstrument"
+	elif args.profile:
+		profileTool = "cProfile"
+
+	profiles = []
+	for folder in folders:
+		with open(folder+"meta.json") as json_file:
+			meta = json.load(json_file)
+		print("PARSING "+meta["game"])
+		profile = parseProfiler.GameProfile(folder,meta["game"],meta["parserParameters"]["parser"])
+		with parseProfiler.profileGame(folder,profileTool):
+			out = parseGame(folder,meta,profile)
+			with profile.stage("write"):
+				writeData(out,folder)
+				if args.jsonl:
+					dataStream.writeJSONL(out,folder)
+		profile.printSummary()
+		profiles.append(profile)
 
+	parseProfiler.writeReport(profiles,args.report)
@@ -0,0 +1,126 @@
+import sqlite3, hashlib
+from parsers import textPipeline
+
+# Index of the BG3 localisation files (e.g. raw/Localization/English/english.xml),
+#  which map content uuids to text.
+# The xml file is streamed once into an SQLite database, which is only
+#  rebuilt if the xml file changes. Lines are then looked up as they
+#  are needed, rather than holding the whole file in memory.
+# Each language is stored in the same database, so translations
+#  can be indexed alongside the English text.
+
+cleanLine = textPipeline.TextPipeline([
+	# Italics
+	("replace", "&lt;i&gt;", " # "),
+	("replace", "&lt;/i&gt;", " # "),
+	("replace", "&amp;", "&"),
+	("replace", "&lt;br&gt;", " \t "),
+	("replace", "[GEN_PlayerName_c11eee1e-7815-6143-7233-f2427799fa53]", "PLAYERNAME"),
+	("strip",)])
+
+def hashFile(fileName):
+	h = hashlib.md5()
+	with open(fileName,'rb') as f:
+		for chunk in iter(lambda: f.read(1<<20), b""):
+			h.update(chunk)
+	return(h.hexdigest())
+
+def iterContentEntries(xmlFileName,chunkSize=1<<20):
+	# Yield (uuid, text) for each <content> element, reading the file in chunks.
+	#  The text is kept in its escaped form so that cleanLine can
+	#  pick out the italics and line breaks.
+	delimiter = '<content contentuid="'
+	with open(xmlFileName, encoding = 'utf8') as f:
+		rest = ""
+		isHeader = True
+		for chunk in iter(lambda: f.read(chunkSize), ""):
+			bits = (rest+chunk).split(delimiter)
+			rest = bits.pop()
+			for bit in bits:
+				if isHeader:
+					isHeader = False
+				else:
+					yield(parseContentEntry(bit))
+		if not isHeader:
+			yield(parseContentEntry(rest))
+
+def parseContentEntry(line):
+	# e.g. 'h00a1...g4c2d" version="2">Text</content>'
+	line = line.replace(" ",">",1)
+	bits = line.split(">",2)
+	uuid = bits[0][:-1]
+	txt = bits[2].split('</content>')[0]
+	return((uuid,cleanLine(txt)))
+
+def buildIndex(dbFileName,language,xmlFileName):
+	sourceHash = hashFile(xmlFileName)
+	con = sqlite3.connect(dbFileName)
+	con.execute("CREATE TABLE IF NOT EXISTS localisation (language TEXT, uuid TEXT, text TEXT, PRIMARY KEY (language, uuid)) WITHOUT ROWID")
+	con.execute("CREATE TABLE IF NOT EXISTS sources (language TEXT PRIMARY KEY, sourceHash TEXT)")
+	row = con.execute("SELECT sourceHash FROM sources WHERE language=?",(language,)).fetchone()
+	if row is None or row[0]!=sourceHash:
+		print("Building "+language+" localisation index ...")
+		with con:
+			con.execute("DELETE FROM localisation WHERE language=?",(language,))
+			con.executemany("INSERT OR REPLACE INTO localisation VALUES (?,?,?)",
+				((language,uuid,txt) for uuid,txt in iterContentEntries(xmlFileName)))
+			con.execute("INSERT OR REPLACE INTO sources VALUES (?,?)",(language,sourceHash))
+	con.close()
+
+class LocalisationIndex:
+	# Read-only, dictionary-like access to one language in the index.
+	#  The connection is opened on first use. An open connection can't be
+	#  used after a fork, so close() the index before starting worker
+	#  processes (spawned workers get a copy without the connection).
+	def __init__(self,dbFileName,language="English"):
+		self.dbFileName = dbFileName
+		self.language = language
+		self.con = None
+		self.cache = {}
+
+	def __getstate__(self):
+		return({"dbFileName":self.dbFileName, "language":self.language})
+
+	def __setstate__(self,state):
+		self.__init__(state["dbFileName"],state["language"])
+
+	def connect(self):
+		if self.con is None:
+			self.con = sqlite3.connect("file:"+self.dbFileName+"?mode=ro", uri=True)
+		return(self.con)
+
+	def close(self):
+		# (it is opened again if needed)
+		if not self.con is None:
+			self.con.close()
+			self.con = None
+
+	def lookup(self,uuid):
+		if not uuid in self.cache:
+			row = self.connect().execute("SELECT text FROM localisation WHERE language=? AND uuid=?",(self.language,uuid)).fetchone()
+			self.cache[uuid] = None if row is None else row[0]
+		return(self.cache[uuid])
+
+	def get(self,uuid,default=None):
+		txt = self.lookup(uuid)
+		return(default if txt is None else txt)
+
+	def __contains__(self,uuid):
+		return(not self.lookup(uuid) is None)
+
+	def __getitem__(self,uuid):
+		txt = self.lookup(uuid)
+		if txt is None:
+			raise KeyError(uuid)
+		return(txt)
+
+	def __len__(self):
+		return(self.connect().execute("SELECT COUNT(*) FROM localisation WHERE language=?",(self.language,)).fetchone()[0])
+
+def getLocalisationFile(localisationFolder,language="English"):
+	return(localisationFolder+language+"/"+language.lower()+".xml")
+
+def loadLocalisation(localisationFolder,language="English"):
+	dbFileName = localisationFolder+"localisation.sqlite"
+	buildIndex(dbFileName,language,getLocalisationFile(localisationFolder,language))
+	return(LocalisationIndex(dbFileName,language))
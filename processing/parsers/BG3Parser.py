@@ -1,6 +1,13 @@
 import json,pathlib
-from bs4 import BeautifulSoup
-import re,os
+from lxml import etree
+from multiprocessing import Pool
+from functools import partial
+import re,os,hashlib
+try:
+	import orjson
+except ImportError:
+	orjson = None
+from parsers import BG3Localisation, dialogueGraph
 
 localisation = {}
 charData = {}
@@ -26,6 +33,443 @@ DCDict = {"e0a7c461-08bf-459d-9c9a-747008ced85c":50,
 			"00000000-0000-0000-0000-000000000000":"?",
 			"fa621d38-6f83-4e42-a55c-6aa651a75d46": "?"}
 
+bg3Folder = "../data/BaldursGate/BaldursGate3/"
+localisationFolder = bg3Folder+"raw/Localization/"
+
+# The character and flag data is read from thousands of .lsx files.
+#  These are read with iterparse (clearing elements as we go), spread
+#  over a pool of processes, and the results are cached in
+#  charData.json and flagData.json. The cache is rebuilt when a hash of
+#  the source files changes (stored beside the cache in a .hash file).
+
+def mapFiles(func,fileNames,parameters,initializer=None,initargs=()):
+	# Apply func to each file, keeping the file order.
+	#  The number of processes can be set with "numProcesses"
+	#  in the parserParameters
+	numProcesses = parameters.get("numProcesses",os.cpu_count())
+	if numProcesses is None or numProcesses<=1 or len(fileNames)<2:
+		return([func(x) for x in fileNames])
+	with Pool(numProcesses,initializer,initargs) as pool:
+		return(pool.map(func,fileNames))
+
+def hashSourceFiles(fileNames):
+	h = hashlib.md5()
+	for fileName in sorted(fileNames):
+		h.update(fileName.encode("utf8"))
+		with open(fileName,'rb') as f:
+			for chunk in iter(lambda: f.read(1<<20), b""):
+				h.update(chunk)
+	return(h.hexdigest())
+
+def loadCache(cacheFilePath,sourceFiles):
+	# Returns (data or None, hash of source files).
+	#  If the source files aren't available (sourceFiles is None),
+	#  any existing cache is used.
+	sourceHash = None
+	if not sourceFiles is None:
+		sourceHash = hashSourceFiles(sourceFiles)
+	if not os.path.isfile(cacheFilePath):
+		return(None,sourceHash)
+	if not sourceHash is None:
+		if not os.path.isfile(cacheFilePath+".hash"):
+			return(None,sourceHash)
+		with open(cacheFilePath+".hash") as f:
+			if f.read().strip()!=sourceHash:
+				return(None,sourceHash)
+	with open(cacheFilePath) as f:
+		return(json.load(f),sourceHash)
+
+def writeCache(cacheFilePath,data,sourceHash):
+	with open(cacheFilePath, "w") as outfile:
+		outfile.write(json.dumps(data))
+	if not sourceHash is None:
+		with open(cacheFilePath+".hash", "w") as outfile:
+			outfile.write(sourceHash)
+
+def clearParsed(el):
+	# Free memory used by elements that have been processed
+	el.clear()
+	while el.getprevious() is not None:
+		del el.getparent()[0]
+
+def readFirstAttributes(lsxFileName,attributeIDs):
+	# Return the xml attributes of the first <attribute> with each id
+	found = {}
+	for event,el in etree.iterparse(lsxFileName, events=("end",), tag="attribute"):
+		attrID = el.get("id")
+		if attrID in attributeIDs and not attrID in found:
+			found[attrID] = dict(el.attrib)
+			if len(found)==len(attributeIDs):
+				break
+		clearParsed(el)
+	return(found)
+
+def readCharacterFile(lsxFileName):
+	# For each GameObjects node, return the first MapKey, DisplayName handle,
+	#  Name, and the guid Object in the first SpeakerGroupList node.
+	gameObjects = []
+	openObjects = []
+	for event,el in etree.iterparse(lsxFileName, events=("start","end")):
+		nodeID = el.get("id")
+		if el.tag=="node" and nodeID=="GameObjects":
+			if event=="start":
+				gameObject = {"MapKey":None,"DisplayName":None,"Name":None,"SpeakerGroup":None,"speakerGroupList":None}
+				gameObjects.append(gameObject)
+				openObjects.append(gameObject)
+			else:
+				openObjects.pop()
+		elif el.tag=="node" and nodeID=="SpeakerGroupList":
+			for gameObject in openObjects:
+				if event=="start" and gameObject["speakerGroupList"] is None:
+					gameObject["speakerGroupList"] = el
+				elif event=="end" and gameObject["speakerGroupList"] is el:
+					gameObject["speakerGroupList"] = False
+		elif event=="end" and el.tag=="attribute":
+			for gameObject in openObjects:
+				if nodeID in ["MapKey","DisplayName","Name"] and gameObject[nodeID] is None:
+					gameObject[nodeID] = dict(el.attrib)
+				elif nodeID=="Object" and el.get("type")=="guid" and gameObject["SpeakerGroup"] is None:
+					if not gameObject["speakerGroupList"] in [None,False]:
+						gameObject["SpeakerGroup"] = el.get("value")
+		if event=="end" and len(openObjects)==0:
+			clearParsed(el)
+	
+	out = []
+	for gameObject in gameObjects:
+		charNameID = None
+		rawName = None
+		if not gameObject["DisplayName"] is None:
+			charNameID = gameObject["DisplayName"]["handle"]
+		else:
+			rawName = gameObject["Name"]["value"]
+		out.append((gameObject["MapKey"]["value"],charNameID,rawName,gameObject["SpeakerGroup"]))
+	return(out)
+
+
+def parseSpeakerList(speakerData):
+	speakerList = []
+	if "speaker" in speakerData[0]:
+		for speaker in speakerData[0]["speaker"]:
+			if "list" in speaker:
+				charID = speaker["list"]["value"]
+				charName = ""
+				if charID in charData:
+					charName = charData[charID]['charName']
+				else:
+					charName = charID
+				speakerList.append(charName)
+			else:
+				# TODO: e.g. CAMP_Bard_AD.lsj: no 'list' property for speaker list.
+				#  Something to do with mappipngs?
+				speakerList.append("")
+				pass
+	return(speakerList)
+
+def parseLSJ(data):	
+	nodeData = data["save"]["regions"]["dialog"]["nodes"]
+	if "RootNodes" in nodeData[0]:
+		rootNodes = nodeData[0]["RootNodes"]
+		rootNodes = [x["RootNodes"]["value"] for x in rootNodes]
+		nodes = nodeData[0]["node"]
+		speakerList = parseSpeakerList(data["save"]["regions"]["dialog"]["speakerlist"])
+		pnodes = [parseNode(node,speakerList) for node in nodes]
+		return(rootNodes,pnodes)
+	else:
+		print("\tError: no root nodes")
+		return([],[])
+	
+def getFlags(flags,flagType="CHECK"):
+	flagText = ""
+	for flag in flags:
+		for subflag in flag["flag"]:
+			flagUUID = subflag["UUID"]["value"]
+			if flagUUID in flagData:
+				flagDescription = flagData[flagUUID]
+			else:
+				flagDescription = flagUUID
+			if "paramval" in subflag:
+				paramval = subflag["paramval"]["value"]
+			else:
+				paramval = ""
+			pvalue = subflag["value"]["value"]
+			flagText += flagType + " FLAG: "+ flagDescription + " [" + str(paramval) + " / " + str(pvalue) + "]"  +"\n"
+	flagText = flagText.strip()
+	return(flagText)
+
+def parseNode(nx,speakerList):	
+	#print("\n\n\n\n")
+	#print(json.dumps(nx,indent=2))
+	
+	uuid = nx["UUID"]["value"]
+	constructor = nx["constructor"]["value"]
+	
+	speaker = ""
+	if "speaker" in nx:
+		speakerIndex = nx["speaker"]["value"]
+		if speakerIndex == -666:
+			speaker = "Narrator"		
+		elif speakerIndex >= 0 and speakerIndex < len(speakerList):
+			speaker = speakerList[speakerIndex]
+	#print(speaker)
+	
+	
+	txt = ""
+	if "TaggedTexts" in nx:
+		if "TaggedText" in nx["TaggedTexts"][0]:
+			tt = nx["TaggedTexts"][0]["TaggedText"]
+			# It's possible there are multiple texts,
+			#  often due to gender (he / her / they)
+			# So, collect texts and add rule note if there are any
+			txts = []
+			rules = []
+			for t in tt:
+				opTextID = t["TagTexts"][0]
+				if "TagText" in opTextID:
+					opTextID = t["TagTexts"][0]["TagText"][0]["TagText"]["handle"]
+					opText = ""
+					if opTextID in localisation:
+						opText = localisation[opTextID]
+					else:
+						print("   Error - no localisation id specified: " + t["TagTexts"][0]["TagText"][0]["LineId"]["value"])
+											  
+					txts.append(opText)
+					if "RuleGroup" in t:
+						rt = t["RuleGroup"][0]["Rules"][0]
+						if "Rule" in rt:
+							if "Tags" in rt["Rule"][0]:
+								ruleTags = rt["Rule"][0]["Tags"]
+								ruleTags = [tag["Tag"][0]["Object"]["value"] for tag in ruleTags if "Tag" in tag]
+								ruleDescriptions = [flagData.get(x,x) for x in ruleTags]
+								if len(ruleDescriptions)>0:
+									ruleText = " {" + "; ".join(["IF: "+x for x in ruleDescriptions]) + "}"
+									txts[-1]+= ruleText
+			txt = " /\n".join(txts)
+
+	children = []
+	jumptargetpoint = 0
+	if "child" in nx["children"][0]:
+		children = [x["UUID"]["value"] for x in nx["children"][0]["child"]]
+	elif nx["constructor"]["value"] == "Jump":
+		# If the jump value is 2, then this should connect
+		# to the CHILDREN of the jump target, not the jump target
+		#  (i.e. skips the jump target)
+		#  But we can't fix that here because we haven't loaded
+		#  all the child data, so leave till later
+		children = [nx["jumptarget"]["value"]]
+		jumptargetpoint = nx["jumptargetpoint"]["value"]
+	elif nx["constructor"]["value"] == "Alias":
+		children = [nx["SourceNode"]["value"]]
+
+	
+	roll = ""
+	if "RollType" in nx:
+		ability = nx["Ability"]["value"]
+		skill = nx["Skill"]["value"]
+		adv = ""
+		if nx["Advantage"]["value"]==1:
+			adv = " (ADV)"
+		DCID = nx["DifficultyClassID"]["value"]
+		if DCID in DCDict:
+			DCID = str(DCDict[DCID])
+		else:
+			print("    DC ERROR "+DCID)
+		# build roll
+		roll = ability
+		if nx["RollType"] in ["MeleeSpellAttack","MeleeUnarmedAttack","MeleeArmedAttack"]:
+			roll = nx["RollType"]
+		
+		if skill !="":
+			 roll += " (" + skill + ") " 
+		roll += adv + " DC "+DCID
+		if nx["constructor"]["value"] == "PassiveRoll":
+			roll += " (Passive)"
+	
+	success = ""	
+	if "Success" in nx:
+		if nx["Success"]["value"]:
+			success = "Pass"
+		else:
+			success = "Fail"
+			
+	approval = ""
+	if "ApprovalRatingID" in nx:
+		approvalID = nx["ApprovalRatingID"]["value"]
+		
+		
+	checkflags = ""
+	if "checkflags" in nx:
+		if "flaggroup" in nx["checkflags"][0]:
+			flags = nx["checkflags"][0]["flaggroup"]
+			checkflags = getFlags(flags)
+			
+	setflags = ""
+	if "setflags" in nx:
+		if "flaggroup" in nx["setflags"][0]:
+			flags = nx["setflags"][0]["flaggroup"]
+			setflags = getFlags(flags,"SET")
+			
+			
+	context = ""
+	if "editorData" in nx:
+		edDats = nx["editorData"][0]["data"]
+		contextDescriptions = [dat["val"]["value"] for dat in edDats if dat["key"]["value"] in ["AnimationTags","NodeContext","stateContext"]]
+		contextDescriptions = [x for x in contextDescriptions if len(x)>0]
+		if len(contextDescriptions)>0:
+			context = contextDescriptions[0]
+		
+			
+	label = str(speaker) + ": "+txt
+	if txt=="":
+		label = roll
+		if roll=="":
+			label = success
+			if success=="" and nx["constructor"]["value"] == "Jump":
+				label = "JUMP"
+			elif success=="" and nx["constructor"]["value"] == "Alias":
+				label = "ALIAS"
+	if checkflags!="":
+		label += "\n"+ checkflags
+	if setflags!="":
+		label += "\n"+ setflags
+	if context != "":
+		label += "\n"+ "ACTION: "+context
+				
+	
+	return({"uuid":uuid,
+			"constructor":constructor,
+			"children":	children,
+			"text":	txt,
+			"speaker":speaker,
+			"roll": roll,
+			"success": success,
+			"label":label,
+			"jumptargetpoint":jumptargetpoint,
+			"checkflags": checkflags,
+			"setflags": setflags,
+			"context": context})
+# END OF PARSE NODE
+
+def nodeToVGDCFormat(rootNodes,nodes,dialogTitle):
+	# Build a graph so we can look up jumps
+	graph = dialogueGraph.DialogueGraph()
+	for rootNode in rootNodes:
+		graph.addEdge("START",rootNode)
+	for node in nodes:
+		graph.addNode(node["uuid"])
+		for child in node["children"]:
+			graph.addEdge(node["uuid"],child)
+
+	out = []
+	# Add root nodes
+	out.append({"ACTION": "START", "_id":"START-"+dialogTitle, "_children":rootNodes})
+	
+	for node in nodes:
+		# 'TagCinematic', 'Visual State', 'PassiveRoll', 'RollResult', 
+		# 'Alias', 'ActiveRoll', 'Jump', 'TagQuestion', 'TagGreeting', 'TagAnswer'
+		# 'Nested Dialog'
+		line = {}
+		if node["constructor"] in ["TagAnswer","TagQuestion","TagGreeting"]:
+			line = {node["speaker"]: node["text"]}
+		elif node["constructor"] in ["ActiveRoll","PassiveRoll"]:
+			line = {node["speaker"]: node["text"], "_roll":node["roll"]}
+		elif node["constructor"] in ["RollResult","Jump","Alias"]:
+			line = {"ACTION": node["label"]}
+		elif node["constructor"] in ["Visual State"]:
+			line = {"ACTION": node["context"]}
+		elif node["constructor"] == "TagCinematic":
+			line = {"ACTION": "CINEMATIC"}
+			if len(node["context"])>0:
+				line["_context"]= node["context"]
+		else:
+			line = {"ACTION": node["text"]}
+	
+		line["_id"] = node["uuid"]
+		line["_checkflags"] = node["checkflags"]
+		line["_setflags"] = node["setflags"]
+		line["_lt"] = node["constructor"]
+	
+		if node["jumptargetpoint"]==2:
+			# Jump to children of target
+			line["_children"] = graph.childKeys(node["children"][0])
+		else:
+			line["_children"] = node["children"]
+		out.append(line)
+	
+	return(out)
+		
+def nodesToGraphVis(rootNodes,nodes):
+	
+	# Build a child dictionary so we can look up jumps
+	childDict = {"START":[]}
+	for rootNode in rootNodes:
+		childDict["START"].append(rootNode.replace("-",""))
+	for node in nodes:
+		uuid = node["uuid"].replace("-","")
+		childDict[uuid] = []
+		for child in node["children"]:
+			childDict[uuid].append(child.replace("-",""))
+
+	out = 'digraph G {\nrankdir="LR"\nnode [shape=box]\n START [label="START"];\n'
+	
+	for rootNode in rootNodes:
+		rid = rootNode.replace("-","")
+		out += f'START -> I{rid}\n'
+	
+	for node in nodes:
+		uuid = node["uuid"].replace("-","")
+		lab = node["label"]
+		lab = lab.replace('"',"'")
+		out += f'I{uuid} [label="{lab}"];\n'
+		children = node["children"]
+		if node["jumptargetpoint"]==2:
+			#print(children)
+			# Jump to destinations of children
+			children = childDict[node["children"][0].replace("-","")]
+		for child in children:
+			cid = child.replace("-","")
+			out += f'I{uuid} -> I{cid}\n'
+	out += "\n}"
+	print(out)
+	return(out)
+
+def loadDialogFile(fileNameToProcess):
+	if orjson is None:
+		with open(fileNameToProcess) as f:
+			return(json.load(f))
+	with open(fileNameToProcess,'rb') as f:
+		return(orjson.loads(f.read()))
+
+def getDialogTitle(fileNameToProcess):
+	#dialogTitle = os.path.basename(fileNameToProcess).replace(".lsj","")
+	return("/".join(fileNameToProcess.split("/")[-2:]).replace(".lsj",""))
+
+def parseDialogFile(fileNameToProcess):
+	# Convert one .lsj dialog file. Each file is independent,
+	#  so these can be processed in parallel (see mapFiles)
+	dialogTitle = getDialogTitle(fileNameToProcess)
+	data = loadDialogFile(fileNameToProcess)
+	synopsis = data["save"]["regions"]["editorData"].get("synopsis",{"value":""}).get("value","")
+	rootNodes,pnodes = parseLSJ(data)
+	#print(list(set([p["constructor"] for p in pnodes])))
+	#nodesToGraphVis(rootNodes,pnodes)
+	
+	out = []
+	out.append({"LOCATION": dialogTitle})
+	out.append({"ACTION": synopsis})
+	out += nodeToVGDCFormat(rootNodes,pnodes,dialogTitle)
+	return(out)
+
+def initDialogWorker(localisationIndex,charDataTable,flagDataTable):
+	# Set the lookup tables in worker processes
+	#  (not needed when processes are forked, but keeps spawned workers working.
+	#  The localisation index is closed before the workers start, so each
+	#  worker opens its own connection)
+	global localisation, charData, flagData
+	localisation = localisationIndex
+	charData = charDataTable
+	flagData = flagDataTable
+
+
 # TODO: approvalID - what is this?
 # TODO: add localisation handles
 # TODO: Some lines include variables which are stored in GustavDev/Story/Diaogs/DialogVariables
@@ -40,89 +484,55 @@ def parseFile(fileName,parameters={},asJSON=False):
 	
 	def loadLocalisation():
 		global localisation
-		
-		def cleanLine(txt):
-			# Italics
-			for targ,repl in [
-				("&lt;i&gt;"," # "),
-				("&lt;/i&gt;"," # "), 
-				("&amp;","&"),
-				("&lt;br&gt;"," \t ")]:
-				txt = txt.replace(targ,repl)
-			txt = txt.replace("[GEN_PlayerName_c11eee1e-7815-6143-7233-f2427799fa53]","PLAYERNAME")
-			txt = txt.strip()
-			return(txt)
-		
-		d = open("../data/BaldursGate/BaldursGate3/raw/Localization/English/english.xml").read()
-		d = d.split('<content contentuid="')[1:-1]
-		for line in d:
-			line = line.replace(" ",">",1)
-			bits = line.split(">",2)
-			uuid = bits[0][:-1]
-			version = bits[1]
-			txt = bits[2].replace('</content>','')
-			localisation[uuid] = cleanLine(txt)
+		localisation = BG3Localisation.loadLocalisation(localisationFolder,parameters.get("language","English"))
 
 	def loadCharacterData():
 		global charData
-		charDataFilePath = "../data/BaldursGate/BaldursGate3/charData.json"
-		if os.path.isfile(charDataFilePath):
-			f = open(charDataFilePath)
-			charData = json.load(f)
+		charDataFilePath = bg3Folder+"charData.json"
+		sourceFiles = None
+		if os.path.isdir(bg3Folder+"raw/lsxMODS/"):
+			baseFolders = [bg3Folder+"raw/lsxMODS/GustavDev/Globals/",
+							bg3Folder+"raw/lsxMODS/Gustav/Globals/"]
+			characterFiles = []
+			for baseFolder in baseFolders:
+				for settingFolder in [x for x in os.listdir(baseFolder) if os.path.isdir(baseFolder+x)]:
+					subfolders = os.listdir(baseFolder+settingFolder)
+					if "Characters" in subfolders:
+						characterFiles.append(baseFolder+settingFolder+"/Characters/_merged.lsx")
+					if "Items" in subfolders:
+						characterFiles.append(baseFolder+settingFolder+"/Items/_merged.lsx")
+			# Some character names are in Marker files?
+			markerFolder = bg3Folder+"raw/lsxMODS/GustavDev/Story/Journal/Markers/"
+			markerFiles = [markerFolder+f for f in os.listdir(markerFolder) if f.endswith(".lsx")]
+			# Names come from the localisation file, so changes there also invalidate the cache
+			localisationFile = BG3Localisation.getLocalisationFile(localisationFolder,parameters.get("language","English"))
+			sourceFiles = characterFiles + markerFiles + [localisationFile]
+		
+		cached,sourceHash = loadCache(charDataFilePath,sourceFiles)
+		if not cached is None:
+			charData = cached
 		else:
 			charData["e0d1ff71-04a8-4340-ae64-9684d846eb83"] = {'charName':"PC"}
-			# -------------------
-			def parseCharacterFile(lsxFileName):
-				global charData
-				xml = open(lsxFileName,'r', encoding = 'utf8')
-				soup = BeautifulSoup(xml, "lxml")
-				gameObjects = soup.find_all("node",{"id":"GameObjects"})
-				for gameObject in gameObjects:
-					charID = gameObject.find("attribute",{"id":"MapKey"})["value"]
-					charName = ""
-					dispName = gameObject.find("attribute",{"id":"DisplayName"})
-					if not dispName is None:
-						charNameID = dispName["handle"]
+			for gameObjects in mapFiles(readCharacterFile,characterFiles,parameters):
+				for charID,charNameID,rawName,speakerGroupID in gameObjects:
+					if not charNameID is None:
 						charName = localisation[charNameID]
 					else:
-						rawName = gameObject.find("attribute",{"id":"Name"})
-						charName = rawName["value"]
-						charName = charName.replace("S_Player_","").strip()
+						charName = rawName.replace("S_Player_","").strip()
 					charData[charID] = {"charName":charName}
 					# Add another link to the peanut speakers?
 					# e.g. Auntie Ethel's name is linked only in a "speakergrouplist" contained inside an "Item" file.
-					cnode = gameObject.find("node",{"id":"SpeakerGroupList"})
-					if not cnode is None:
-						guid = cnode.find("attribute",{"id":"Object","type":"guid"})
-						if not guid is None:
-							charData[guid["value"]] = {"charName":charName}
-
-						
-			# -------------------
-		
-			baseFolders = ["../data/BaldursGate/BaldursGate3/raw/lsxMODS/GustavDev/Globals/",
-							"../data/BaldursGate/BaldursGate3/raw/lsxMODS/Gustav/Globals/"]
-			for baseFolder in baseFolders:
-				for settingFolder in [x for x in os.listdir(baseFolder) if os.path.isdir(baseFolder+x)]:
-					subfolders = os.listdir(baseFolder+settingFolder)
-					if "Characters" in subfolders:
-						lsxFileName = baseFolder+settingFolder+"/Characters/_merged.lsx"
-						parseCharacterFile(lsxFileName)
-					if "Items" in subfolders:
-						lsxFileName = baseFolder+settingFolder+"/Items/_merged.lsx"
-						parseCharacterFile(lsxFileName)						
-						
-			# Some character names are in Marker files?
-			markerFolder = "../data/BaldursGate/BaldursGate3/raw/lsxMODS/GustavDev/Story/Journal/Markers/"
-			for markerFile in [f for f in os.listdir(markerFolder) if f.endswith(".lsx")]:
-				xml = open(markerFolder+markerFile,'r', encoding = 'utf8')
-				soup = BeautifulSoup(xml, "lxml")
-				markerType = soup.find("attribute",{"id":"MarkerTargetObjectType"})["value"]
+					if not speakerGroupID is None:
+						charData[speakerGroupID] = {"charName":charName}
+			
+			markerAttributes = ["MarkerTargetObjectType","DisplayText","MarkerTargetObjectUUID"]
+			for marker in mapFiles(partial(readFirstAttributes,attributeIDs=markerAttributes),markerFiles,parameters):
+				markerType = marker["MarkerTargetObjectType"]["value"]
 				if markerType == "Character":
-					displayTextID = soup.find("attribute",{"id":"DisplayText"})["handle"]
+					displayTextID = marker["DisplayText"]["handle"]
 					if displayTextID in localisation:
 						displayText = localisation[displayTextID]
-						uuid = soup.find("attribute",{"id":"MarkerTargetObjectUUID"})["value"]
+						uuid = marker["MarkerTargetObjectUUID"]["value"]
 						if displayText=="Track the Serial Killer":
 							displayText = "Dolor Amarus"
 						charData[uuid] = {"charName":displayText}
@@ -136,340 +546,52 @@ def parseFile(fileName,parameters={},asJSON=False):
 			#for voice in soup.find_all("node",{"id":"Voice"}):
 			#	voice.find("attribute")
 			
-					
 			# Write out to save time
-			with open(charDataFilePath, "w") as outfile:
-				outfile.write(json.dumps(charData))
+			writeCache(charDataFilePath,charData,sourceHash)
 		print("CHAR DATA")
 		print(len(charData))
 		
 	def loadFlagData():
 		global flagData
-		flagDataFilePath = "../data/BaldursGate/BaldursGate3/flagData.json"
-		if os.path.isfile(flagDataFilePath):
-			f = open(flagDataFilePath)
-			flagData = json.load(f)
-		else:
+		flagDataFilePath = bg3Folder+"flagData.json"
+		sourceFiles = None
+		if os.path.isdir(bg3Folder+"raw/lsxPUBLIC/"):
 			# Treat Flags and Tags as the same
-			baseFolders = ["../data/BaldursGate/BaldursGate3/raw/lsxPUBLIC/GustavDev/Flags/",
-							"../data/BaldursGate/BaldursGate3/raw/lsxPUBLIC/Gustav/Flags/",
-							"../data/BaldursGate/BaldursGate3/raw/lsxPUBLIC/GustavDev/Tags/",
-							"../data/BaldursGate/BaldursGate3/raw/lsxPUBLIC/Gustav/Tags/"]
+			baseFolders = [bg3Folder+"raw/lsxPUBLIC/GustavDev/Flags/",
+							bg3Folder+"raw/lsxPUBLIC/Gustav/Flags/",
+							bg3Folder+"raw/lsxPUBLIC/GustavDev/Tags/",
+							bg3Folder+"raw/lsxPUBLIC/Gustav/Tags/"]
+			flagFiles = []
 			for baseFolder in baseFolders:
-				files = os.listdir(baseFolder)
-				files = [x for x in files if x.endswith(".lsx")]
-				for file in files:
-					xml = open(baseFolder+file,'r', encoding = 'utf8')
-					soup = BeautifulSoup(xml, "lxml")
-					description = soup.find("attribute",{"id":"Description"})["value"]
-					uuid = soup.find("attribute",{"id":"UUID"})["value"]
-					name = soup.find("attribute",{"id":"Name"})["value"]
-					if name.endswith("description"):
-						name = name[:-11]
-					if description.strip()=="":
-						description = name
-					flagData[uuid] = description
+				flagFiles += [baseFolder+x for x in os.listdir(baseFolder) if x.endswith(".lsx")]
+			sourceFiles = flagFiles + [bg3Folder+"globalFlags.csv"]
+		
+		cached,sourceHash = loadCache(flagDataFilePath,sourceFiles)
+		if not cached is None:
+			flagData = cached
+		else:
+			flagAttributes = ["Description","UUID","Name"]
+			for flag in mapFiles(partial(readFirstAttributes,attributeIDs=flagAttributes),flagFiles,parameters):
+				description = flag["Description"]["value"]
+				uuid = flag["UUID"]["value"]
+				name = flag["Name"]["value"]
+				if name.endswith("description"):
+					name = name[:-11]
+				if description.strip()=="":
+					description = name
+				flagData[uuid] = description
 				
 			# Global flags
-			d = open("../data/BaldursGate/BaldursGate3/globalFlags.csv").read()
+			d = open(bg3Folder+"globalFlags.csv").read()
 			for line in [x for x in d.split("\n") if len(x)>0]:
 				cat,lab,idx = line.split(",")
 				flagData[idx] = lab
 			# Write out
-			with open(flagDataFilePath, "w") as outfile:
-				outfile.write(json.dumps(flagData))
+			writeCache(flagDataFilePath,flagData,sourceHash)
 			
 	
-	def parseSpeakerList(speakerData):
-		speakerList = []
-		if "speaker" in speakerData[0]:
-			for speaker in speakerData[0]["speaker"]:
-				if "list" in speaker:
-					charID = speaker["list"]["value"]
-					charName = ""
-					if charID in charData:
-						charName = charData[charID]['charName']
-					else:
-						charName = charID
-					speakerList.append(charName)
-				else:
-					# TODO: e.g. CAMP_Bard_AD.lsj: no 'list' property for speaker list.
-					#  Something to do with mappipngs?
-					speakerList.append("")
-					pass
-		return(speakerList)
-
-	def parseLSJ(data):	
-		nodeData = data["save"]["regions"]["dialog"]["nodes"]
-		if "RootNodes" in nodeData[0]:
-			rootNodes = nodeData[0]["RootNodes"]
-			rootNodes = [x["RootNodes"]["value"] for x in rootNodes]
-			nodes = nodeData[0]["node"]
-			speakerList = parseSpeakerList(data["save"]["regions"]["dialog"]["speakerlist"])
-			pnodes = [parseNode(node,speakerList) for node in nodes]
-			return(rootNodes,pnodes)
-		else:
-			print("\tError: no root nodes")
-			return([],[])
-		
-	def getFlags(flags,flagType="CHECK"):
-		flagText = ""
-		for flag in flags:
-			for subflag in flag["flag"]:
-				flagUUID = subflag["UUID"]["value"]
-				if flagUUID in flagData:
-					flagDescription = flagData[flagUUID]
-				else:
-					flagDescription = flagUUID
-				if "paramval" in subflag:
-					paramval = subflag["paramval"]["value"]
-				else:
-					paramval = ""
-				pvalue = subflag["value"]["value"]
-				flagText += flagType + " FLAG: "+ flagDescription + " [" + str(paramval) + " / " + str(pvalue) + "]"  +"\n"
-		flagText = flagText.strip()
-		return(flagText)
-
-	def parseNode(nx,speakerList):	
-		#print("\n\n\n\n")
-		#print(json.dumps(nx,indent=2))
-		
-		uuid = nx["UUID"]["value"]
-		constructor = nx["constructor"]["value"]
-		
-		speaker = ""
-		if "speaker" in nx:
-			speakerIndex = nx["speaker"]["value"]
-			if speakerIndex == -666:
-				speaker = "Narrator"		
-			elif speakerIndex >= 0 and speakerIndex < len(speakerList):
-				speaker = speakerList[speakerIndex]
-		#print(speaker)
-		
-		
-		txt = ""
-		if "TaggedTexts" in nx:
-			if "TaggedText" in nx["TaggedTexts"][0]:
-				tt = nx["TaggedTexts"][0]["TaggedText"]
-				# It's possible there are multiple texts,
-				#  often due to gender (he / her / they)
-				# So, collect texts and add rule note if there are any
-				txts = []
-				rules = []
-				for t in tt:
-					opTextID = t["TagTexts"][0]
-					if "TagText" in opTextID:
-						opTextID = t["TagTexts"][0]["TagText"][0]["TagText"]["handle"]
-						opText = ""
-						if opTextID in localisation:
-							opText = localisation[opTextID]
-						else:
-							print("   Error - no localisation id specified: " + t["TagTexts"][0]["TagText"][0]["LineId"]["value"])
-												  
-						txts.append(opText)
-						if "RuleGroup" in t:
-							rt = t["RuleGroup"][0]["Rules"][0]
-							if "Rule" in rt:
-								if "Tags" in rt["Rule"][0]:
-									ruleTags = rt["Rule"][0]["Tags"]
-									ruleTags = [tag["Tag"][0]["Object"]["value"] for tag in ruleTags if "Tag" in tag]
-									ruleDescriptions = [flagData.get(x,x) for x in ruleTags]
-									if len(ruleDescriptions)>0:
-										ruleText = " {" + "; ".join(["IF: "+x for x in ruleDescriptions]) + "}"
-										txts[-1]+= ruleText
-				txt = " /\n".join(txts)
-
-		children = []
-		jumptargetpoint = 0
-		if "child" in nx["children"][0]:
-			children = [x["UUID"]["value"] for x in nx["children"][0]["child"]]
-		elif nx["constructor"]["value"] == "Jump":
-			# If the jump value is 2, then this should connect
-			# to the CHILDREN of the jump target, not the jump target
-			#  (i.e. skips the jump target)
-			#  But we can't fix that here because we haven't loaded
-			#  all the child data, so leave till later
-			children = [nx["jumptarget"]["value"]]
-			jumptargetpoint = nx["jumptargetpoint"]["value"]
-		elif nx["constructor"]["value"] == "Alias":
-			children = [nx["SourceNode"]["value"]]
-
-		
-		roll = ""
-		if "RollType" in nx:
-			ability = nx["Ability"]["value"]
-			skill = nx["Skill"]["value"]
-			adv = ""
-			if nx["Advantage"]["value"]==1:
-				adv = " (ADV)"
-			DCID = nx["DifficultyClassID"]["value"]
-			if DCID in DCDict:
-				DCID = str(DCDict[DCID])
-			else:
-				print("    DC ERROR "+DCID)
-			# build roll
-			roll = ability
-			if nx["RollType"] in ["MeleeSpellAttack","MeleeUnarmedAttack","MeleeArmedAttack"]:
-				roll = nx["RollType"]
-			
-			if skill !="":
-				 roll += " (" + skill + ") " 
-			roll += adv + " DC "+DCID
-			if nx["constructor"]["value"] == "PassiveRoll":
-				roll += " (Passive)"
-		
-		success = ""	
-		if "Success" in nx:
-			if nx["Success"]["value"]:
-				success = "Pass"
-			else:
-				success = "Fail"
-				
-		approval = ""
-		if "ApprovalRatingID" in nx:
-			approvalID = nx["ApprovalRatingID"]["value"]
-			
-			
-		checkflags = ""
-		if "checkflags" in nx:
-			if "flaggroup" in nx["checkflags"][0]:
-				flags = nx["checkflags"][0]["flaggroup"]
-				checkflags = getFlags(flags)
-				
-		setflags = ""
-		if "setflags" in nx:
-			if "flaggroup" in nx["setflags"][0]:
-				flags = nx["setflags"][0]["flaggroup"]
-				setflags = getFlags(flags,"SET")
-				
-				
-		context = ""
-		if "editorData" in nx:
-			edDats = nx["editorData"][0]["data"]
-			contextDescriptions = [dat["val"]["value"] for dat in edDats if dat["key"]["value"] in ["AnimationTags","NodeContext","stateContext"]]
-			contextDescriptions = [x for x in contextDescriptions if len(x)>0]
-			if len(contextDescriptions)>0:
-				context = contextDescriptions[0]
-			
-				
-		label = str(speaker) + ": "+txt
-		if txt=="":
-			label = roll
-			if roll=="":
-				label = success
-				if success=="" and nx["constructor"]["value"] == "Jump":
-					label = "JUMP"
-				elif success=="" and nx["constructor"]["value"] == "Alias":
-					label = "ALIAS"
-		if checkflags!="":
-			label += "\n"+ checkflags
-		if setflags!="":
-			label += "\n"+ setflags
-		if context != "":
-			label += "\n"+ "ACTION: "+context
-					
-		
-		return({"uuid":uuid,
-				"constructor":constructor,
-				"children":	children,
-				"text":	txt,
-				"speaker":speaker,
-				"roll": roll,
-				"success": success,
-				"label":label,
-				"jumptargetpoint":jumptargetpoint,
-				"checkflags": checkflags,
-				"setflags": setflags,
-				"context": context})
-	# END OF PARSE NODE
-
-	def nodeToVGDCFormat(rootNodes,nodes,dialogTitle):
-		# Build a child dictionary so we can look up jumps
-		childDict = {"START":[]}
-		for rootNode in rootNodes:
-			childDict["START"].append(rootNode)
-		for node in nodes:
-			uuid = node["uuid"]
-			childDict[uuid] = []
-			for child in node["children"]:
-				childDict[uuid].append(child)
-	
-		out = []
-		# Add root nodes
-		out.append({"ACTION": "START", "_id":"START-"+dialogTitle, "_children":rootNodes})
-		
-		for node in nodes:
-			# 'TagCinematic', 'Visual State', 'PassiveRoll', 'RollResult', 
-			# 'Alias', 'ActiveRoll', 'Jump', 'TagQuestion', 'TagGreeting', 'TagAnswer'
-			# 'Nested Dialog'
-			line = {}
-			if node["constructor"] in ["TagAnswer","TagQuestion","TagGreeting"]:
-				line = {node["speaker"]: node["text"]}
-			elif node["constructor"] in ["ActiveRoll","PassiveRoll"]:
-				line = {node["speaker"]: node["text"], "_roll":node["roll"]}
-			elif node["constructor"] in ["RollResult","Jump","Alias"]:
-				line = {"ACTION": node["label"]}
-			elif node["constructor"] in ["Visual State"]:
-				line = {"ACTION": node["context"]}
-			elif node["constructor"] == "TagCinematic":
-				line = {"ACTION": "CINEMATIC"}
-				if len(node["context"])>0:
-					line["_context"]= node["context"]
-			else:
-				line = {"ACTION": node["text"]}
-		
-			line["_id"] = node["uuid"]
-			line["_checkflags"] = node["checkflags"]
-			line["_setflags"] = node["setflags"]
-			line["_lt"] = node["constructor"]
-		
-			if node["jumptargetpoint"]==2:
-				# Jump to children of target
-				line["_children"] = childDict[node["children"][0]]
-			else:
-				line["_children"] = node["children"]
-			out.append(line)
-		
-		return(out)
-			
-	def nodesToGraphVis(rootNodes,nodes):
-		
-		# Build a child dictionary so we can look up jumps
-		childDict = {"START":[]}
-		for rootNode in rootNodes:
-			childDict["START"].append(rootNode.replace("-",""))
-		for node in nodes:
-			uuid = node["uuid"].replace("-","")
-			childDict[uuid] = []
-			for child in node["children"]:
-				childDict[uuid].append(child.replace("-",""))
-	
-		out = 'digraph G {\nrankdir="LR"\nnode [shape=box]\n START [label="START"];\n'
-		
-		for rootNode in rootNodes:
-			rid = rootNode.replace("-","")
-			out += f'START -> I{rid}\n'
-		
-		for node in nodes:
-			uuid = node["uuid"].replace("-","")
-			lab = node["label"]
-			lab = lab.replace('"',"'")
-			out += f'I{uuid} [label="{lab}"];\n'
-			children = node["children"]
-			if node["jumptargetpoint"]==2:
-				#print(children)
-				# Jump to destinations of children
-				children = childDict[node["children"][0].replace("-","")]
-			for child in children:
-				cid = child.replace("-","")
-				out += f'I{uuid} -> I{cid}\n'
-		out += "\n}"
-		print(out)
-		return(out)
-	
 	print(fileName)
 	loadLocalisation()
-	print(len(localisation))
 	loadCharacterData()
 	loadFlagData()
 
@@ -487,20 +609,13 @@ def parseFile(fileName,parameters={},asJSON=False):
 #						  '../data/BaldursGate/BaldursGate3/raw/Mods/GustavDev/Story/Dialogs/Companions/Scratch_SummonUnavailable_PAD.lsj',
 #						  '../data/BaldursGate/BaldursGate3/raw/lsxMODS/GustavDev/Story/Dialogs/Companions/Minsc_InParty_Nested_PersonalQuestions.lsj']
 	
-	for fileNameToProcess in fileNamesToProcess:
-		#dialogTitle = os.path.basename(fileNameToProcess).replace(".lsj","")
-		dialogTitle = "/".join(fileNameToProcess.split("/")[-2:]).replace(".lsj","")
-		print(dialogTitle)
-		f = open(fileNameToProcess)
-		data = json.load(f)
-		synopsis = data["save"]["regions"]["editorData"].get("synopsis",{"value":""}).get("value","")
-		rootNodes,pnodes = parseLSJ(data)
-		#print(list(set([p["constructor"] for p in pnodes])))
-		#nodesToGraphVis(rootNodes,pnodes)
-		
-		out.append({"LOCATION": dialogTitle})
-		out.append({"ACTION": synopsis})
-		out += nodeToVGDCFormat(rootNodes,pnodes,dialogTitle)
+	# Forked workers must not share this process's database connection
+	localisation.close()
+	dialogs = mapFiles(parseDialogFile,fileNamesToProcess,parameters,
+		initializer=initDialogWorker,initargs=(localisation,charData,flagData))
+	for fileNameToProcess,dialog in zip(fileNamesToProcess,dialogs):
+		print(getDialogTitle(fileNameToProcess))
+		out += dialog
 
 	if asJSON:
 		print(json.dumps({"text":out}, indent = 4))
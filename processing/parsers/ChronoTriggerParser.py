@@ -1,4 +1,6 @@
 from bs4 import BeautifulSoup
+from parsers import rawStore
+from parsers import parserBackend
 import json
 import re
 import xlrd
@@ -25,7 +27,7 @@ def parseFile(fileName,parameters={},asJSON=False):
 
 	avoidCharacters = ["these two telepod exhibit lines are unused", "ingthenwngerewess tw"]
 	
-	o = open(fileName)
+	o = rawStore.openRaw(fileName)
 	d = o.read()
 	o.close()
 	
@@ -37,7 +39,7 @@ def parseFile(fileName,parameters={},asJSON=False):
 		d = d.replace("Lost Lines","")
 	
 	
-	html = BeautifulSoup(d, 'lxml')
+	html = parserBackend.makeSoup(d, parameters, 'lxml')
 	#table = html.find("table")
  	
 	startParse = 2
@@ -1,4 +1,5 @@
 from bs4 import BeautifulSoup
+from parsers import rawStore
 from igraph import *
 import json, re, copy
 
@@ -206,7 +207,7 @@ def parseFile(fileName,parameters={},asJSON=False):
 
 	questID = fileName[fileName.rindex("/")+1:].replace(".txt","").replace("$","_")
 	
-	o = open(fileName)
+	o = rawStore.openRaw(fileName)
 	d = o.read()
 	o.close()
 
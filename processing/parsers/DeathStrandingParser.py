@@ -1,9 +1,10 @@
 import json, re
+from parsers import rawStore
 from bs4 import BeautifulSoup
 
 def parseFile(fileName,parameters={},asJSON=False):
 
-	o = open(fileName)
+	o = rawStore.openRaw(fileName)
 	d = o.read()
 	o.close()
 	
@@ -1,136 +1,170 @@
-import sqlite3, re
+import sqlite3, re, os, shutil, tempfile
+from multiprocessing import Pool
+from parsers import dialogueGraph, rawStore
 
 # TODO: Add checks and condition strings.
 # TODO: Remove redundant SYSTEM IDs
 
-def parseFile(fileName,parameters={},asJSON=False):
+# Conversations are read one at a time from the database, which is
+#  opened read-only. The raw database is never written to: if it doesn't
+#  have these indexes (or is only in the raw store), it's copied to a
+#  temporary file, which gets the indexes and is removed afterwards.
+conversationIndexes = [("dentries","conversationid"),("dlinks","originconversationid")]
 
-	def findStart(convo):
-		for lineID in convo:
-			lx = convo[lineID]
-			if lx["title"]=="START":
-				return(lineID)
-
-	def cleanLine(txt):
-		# There are some very long numbers, and these break the hyphenator!
-		txt = re.sub("([0-9]{10})[0-9]+","\\1...",txt)
-		return(txt)
-
-
-	def splitDialogueAndDescription(txt,charName,idx):
-		# "\"So, like...\" The girl on the ice looks up at you. \"Seriously, what's eating you, man?\""
-		parts = re.split('(".+?")',txt)
-		out = []
-		for part in parts:
-			if len(part)>0:
-				if part.startswith('"') or len(parts)<=3:
-					# includes dialogue and internal dialogue (with no quotes)
-					out.append({charName: part.replace('"',"").strip()})
-				else:
-					out.append({"Narrator": part.strip()})
-		out[0]["_ID"] = idx
-		return(out)
-			
-			
+# Read-only connection for each worker process
+readerConnection = None
 
-	def dentry2DialogueLine(dentry):
-		dTitle = dentry["title"]
-		charName = "SYSTEM"
-		if dTitle.count(":")>0:
-			charName = dTitle[:dTitle.index(":")].strip()
-		txt = dentry["dialoguetext"]
-		txt = cleanLine(txt)
-		#print(dentry)
-		idx = str(dentry["conversationid"]) + "_" + str(dentry["id"])
-		dialogueParts = splitDialogueAndDescription(txt,charName,idx)
-		return(dialogueParts)
-	
-	# Connect to database
-	temp_db = sqlite3.connect(fileName)
-	temp_db.row_factory = sqlite3.Row
-	dentries = temp_db.execute("SELECT * FROM dentries").fetchall()
-	
-	# List of dialogue entries (with dialogue text)
-	list_accumulator = []
-	for item in dentries:
-		list_accumulator.append({k: item[k] for k in item.keys()})
-	
-	convoDict = {}
-	for line in list_accumulator:
-		convoID = line["conversationid"]
-		lineID = line["id"]
-		if not convoID in convoDict:
-			convoDict[convoID] = {}
-		convoDict[convoID][lineID] = line
-
-	# List of links between dialogue entries
-	dlinks = temp_db.execute("SELECT * FROM dlinks").fetchall()
-
-	dlinks_accumulator = []
-	for item in dlinks:
-		dlinks_accumulator.append({k: item[k] for k in item.keys()})
-	
-	# Convert to dictionary of links, look up origin, get destinations
-	# convos can have destinations in other convos
-	dlinkDict = {}
-	for link in dlinks_accumulator:
-		convoID = link["originconversationid"]
-		originID = link["origindialogueid"]
-		if not convoID in dlinkDict:
-			dlinkDict[convoID] = {}
-		if originID in dlinkDict[convoID]:
-			dlinkDict[convoID][originID].append(link)
-		else:
-			dlinkDict[convoID][originID] = [link]
-	
-	# Build out, one conversation at a time
+def findStart(convo):
+	for lineID in convo:
+		lx = convo[lineID]
+		if lx["title"]=="START":
+			return(lineID)
+
+def cleanLine(txt):
+	# There are some very long numbers, and these break the hyphenator!
+	txt = re.sub("([0-9]{10})[0-9]+","\\1...",txt)
+	return(txt)
+
+
+def splitDialogueAndDescription(txt,charName,idx):
+	# "\"So, like...\" The girl on the ice looks up at you. \"Seriously, what's eating you, man?\""
+	parts = re.split('(".+?")',txt)
 	out = []
-	allConvoIDs = sorted([convoID for convoID in dlinkDict])
-	#allConvoIDs = [322]
-	for convoID in allConvoIDs:
-		# name local convo IDs, shortcut to convoLinks
-		convo = convoDict[convoID]
-		convoLinks = dlinkDict[convoID]
-		startID = findStart(convo)
-		convoSeenIDs = []	
-	
-		# Recursive walk. Given an origin line ID, provide next steps
-		def walkStructure(lineID):
-			originConvID = convo[lineID]["conversationid"]
-			idx = str(originConvID)+ "_"+ str(lineID)
-			# If already seen ...
-			if idx in convoSeenIDs:
-				# ... just add a GOTO
-				return([{"GOTO": idx}])
+	for part in parts:
+		if len(part)>0:
+			if part.startswith('"') or len(parts)<=3:
+				# includes dialogue and internal dialogue (with no quotes)
+				out.append({charName: part.replace('"',"").strip()})
 			else:
-				convoSeenIDs.append(idx)
-			# dialogue Line is always a list
-			dialogueLine = dentry2DialogueLine(convo[lineID])
-			if not lineID in convoLinks:
-				# end of the line
-				return(dialogueLine)
-			#print(convoLinks[lineID])
-			destIDs = [(x["destinationconversationid"], x["destinationdialogueid"]) for x in convoLinks[lineID]]
-			destinations = []
-			for destConvID,destDialogueID in destIDs:
-				if destConvID == convoID:
-					destinations.append(walkStructure(destDialogueID))
-				else:
-					# Link to another conversation
-					destinations.append([{"GOTO":str(destConvID) + "_" + str(destDialogueID)}])
-	
-			if len(destinations)==1:
-				return(dialogueLine + destinations[0])
-			elif len(destinations)>1:
-				return(dialogueLine + [{"CHOICE": destinations}])
+				out.append({"Narrator": part.strip()})
+	out[0]["_ID"] = idx
+	return(out)
+		
+		
+
+def dentry2DialogueLine(dentry):
+	dTitle = dentry["title"]
+	charName = "SYSTEM"
+	if dTitle.count(":")>0:
+		charName = dTitle[:dTitle.index(":")].strip()
+	txt = dentry["dialoguetext"]
+	txt = cleanLine(txt)
+	#print(dentry)
+	idx = str(dentry["conversationid"]) + "_" + str(dentry["id"])
+	dialogueParts = splitDialogueAndDescription(txt,charName,idx)
+	return(dialogueParts)
+
+def hasIndex(con,table,column):
+	for row in con.execute("PRAGMA index_list("+table+")"):
+		columns = [x[2] for x in con.execute("PRAGMA index_info('"+row[1]+"')")]
+		if len(columns)>0 and columns[0]==column:
+			return(True)
+	return(False)
+
+def hasIndexes(fileName):
+	con = sqlite3.connect("file:"+fileName+"?mode=ro", uri=True)
+	found = all([hasIndex(con,table,column) for table,column in conversationIndexes])
+	con.close()
+	return(found)
+
+def addIndexes(con):
+	added = []
+	for table,column in conversationIndexes:
+		if not hasIndex(con,table,column):
+			indexName = "tmp_"+table+"_"+column
+			try:
+				con.execute("CREATE INDEX "+indexName+" ON "+table+" ("+column+")")
+				added.append(indexName)
+			except sqlite3.OperationalError as e:
+				print("Could not add index to "+table+" ("+str(e)+"), reading will be slow")
+	con.commit()
+	return(added)
+
+def makeWorkingCopy(fileName):
+	# Copy the raw database (on disk or in the raw store) to a temporary file
+	fd,copyName = tempfile.mkstemp(suffix=".sqlite")
+	with os.fdopen(fd,'wb') as o, rawStore.openRaw(fileName,'rb') as f:
+		shutil.copyfileobj(f,o,1<<20)
+	return(copyName)
+
+def initConversationReader(fileName):
+	global readerConnection
+	readerConnection = sqlite3.connect("file:"+fileName+"?mode=ro", uri=True)
+
+def readConversation(convoID):
+	# Dialogue entries and links out of one conversation, in database order
+	convo = {}
+	for lineID,conversationID,title,dialogueText in readerConnection.execute(
+			"SELECT id, conversationid, title, dialoguetext FROM dentries WHERE conversationid=? ORDER BY rowid",(convoID,)):
+		convo[lineID] = {"id":lineID, "conversationid":conversationID, "title":title, "dialoguetext":dialogueText}
+	# Look up origin, get destinations
+	# convos can have destinations in other convos
+	convoLinks = {}
+	for originID,destConvID,destDialogueID in readerConnection.execute(
+			"SELECT origindialogueid, destinationconversationid, destinationdialogueid FROM dlinks WHERE originconversationid=? ORDER BY rowid",(convoID,)):
+		if originID in convoLinks:
+			convoLinks[originID].append((destConvID,destDialogueID))
+		else:
+			convoLinks[originID] = [(destConvID,destDialogueID)]
+	return((convo,convoLinks))
+
+def parseConversation(convoID):
+	convo,convoLinks = readConversation(convoID)
+	if len(convo)==0:
+		raise KeyError("No dialogue entries for conversation "+str(convoID))
+	startID = findStart(convo)
+	graph = dialogueGraph.DialogueGraph()
+	for lineID in convo:
+		graph.addNode(lineID,gotoLabel=str(convo[lineID]["conversationid"])+ "_"+ str(lineID))
+	for lineID in convoLinks:
+		for destConvID,destDialogueID in convoLinks[lineID]:
+			if destConvID == convoID:
+				graph.addEdge(lineID,destDialogueID)
 			else:
-				# No destinations (already dealt with?)
-				return(dialogueLine)
+				# Link to another conversation
+				graph.addGoto(lineID,str(destConvID) + "_" + str(destDialogueID))
+	convoSeenIDs = set()
+
+	return(graph.walk(startID,lambda lineID: dentry2DialogueLine(convo[lineID]),convoSeenIDs))
 
-		convoOut = walkStructure(startID)
+def parseFile(fileName,parameters={},asJSON=False):
+	
+	# Read the raw database directly if it has the indexes,
+	#  otherwise make an indexed copy
+	dbFileName = fileName
+	try:
+		if not (os.path.isfile(fileName) and hasIndexes(fileName)):
+			dbFileName = makeWorkingCopy(fileName)
+			temp_db = sqlite3.connect(dbFileName)
+			addIndexes(temp_db)
+			temp_db.close()
+		
+		temp_db = sqlite3.connect("file:"+dbFileName+"?mode=ro", uri=True)
+		# Build out, one conversation at a time
+		#  (only conversations with links)
+		allConvoIDs = [row[0] for row in temp_db.execute("SELECT DISTINCT originconversationid FROM dlinks ORDER BY originconversationid")]
+		#allConvoIDs = [322]
+		temp_db.close()
+		
+		# Conversations can be read in parallel, each process with its own read-only connection.
+		#  Set "numProcesses" to 1 to read them in this process.
+		numProcesses = parameters.get("numProcesses",os.cpu_count())
+		if numProcesses is None or numProcesses<=1 or len(allConvoIDs)<2:
+			initConversationReader(dbFileName)
+			convoOuts = [parseConversation(convoID) for convoID in allConvoIDs]
+			readerConnection.close()
+		else:
+			with Pool(numProcesses,initConversationReader,(dbFileName,)) as pool:
+				convoOuts = pool.map(parseConversation,allConvoIDs,chunksize=8)
+	finally:
+		if dbFileName!=fileName:
+			os.remove(dbFileName)
+	
+	out = []
+	for convoOut in convoOuts:
 		out += convoOut
 			
 
 	if asJSON:
 		return(json.dumps({"text":out}, indent = 4))
-	return(out)
\ No newline at end of file
+	return(out)
@@ -1,4 +1,6 @@
 from bs4 import BeautifulSoup
+from parsers import rawStore
+from parsers import parserBackend, stringTable
 import re, csv
 
 DA2_existingTalkstringIDs = ""
@@ -33,8 +35,8 @@ def parseFile(fileName,parameters={},asJSON=False):
 	print(fileName)
 	# input is an unencoded dlg file
 	
-	xml = open(fileName,'r', encoding = 'utf8')
-	soup = BeautifulSoup( xml, "lxml")
+	xml = rawStore.openRaw(fileName,'r', encoding = 'utf8')
+	soup = parserBackend.makeSoup(xml, parameters, "lxml")
 	
 	# Load ids
 	if len(DA2_existingTalkstringIDs)==0:
@@ -151,11 +153,7 @@ def parseFile(fileName,parameters={},asJSON=False):
 def postProcessing(out):
 	
 	# Get dialogue text
-	talkStrings = {}
-	xml = open("../data/DragonAge/DragonAge2/raw/campaign_base_en-us.xml")
-	soup = BeautifulSoup( xml, "lxml")
-	for st in soup.find_all("string"):
-		talkStrings[st["id"]] = st.getText()
+	talkStrings = stringTable.loadStringTable("../data/DragonAge/DragonAge2/raw/campaign_base_en-us.xml",stringTable.readTalkTableXML)
 		
 	# Get character mappings
 	mappingFile = "../data/DragonAge/DragonAge2/tlkStringToCharName.csv"
@@ -16,13 +16,23 @@
 
 
 import json, csv, re,os
-from bs4 import BeautifulSoup
+from parsers import rawStore
+from lxml import etree
+from multiprocessing import Pool
+from parsers import dialogueGraph, stringTable
 
 da3 = {}
 lineDict = {}
 charDict = {}
+speakerDict = {}
 plotFlags = {}
-finalSeenIDs = []
+numProcesses = os.cpu_count()
+finalSeenIDs = set()
+# How shared lines in a conversation are written out (set by the
+#  "conversationFlattening" parser parameter):
+#   "expand": each path is written out in full, then duplicates are trimmed
+#   "merge": lines where branches join are written once after the CHOICE
+flattening = "expand"
 
 conditionDict = {
 	"e2c262e7-7591-481f-a5e5-297141f401d3": "PC is female"
@@ -31,8 +41,8 @@ conditionDict = {
 }
 
 def cleanString(txt):
-	txt = txt.replace("\x19s","'")
-	txt = txt.replace("\u0014"," - ")
+	txt = txt.replace("\u2019","'")
+	txt = txt.replace("\u2014"," - ")
 	# TODO: deal with multiple quotes properly.
 	txt = re.sub('^"(.+)"$', "\\1",txt)
 	txt = txt.strip()
@@ -40,25 +50,18 @@ def cleanString(txt):
 		txt = ""
 	return(txt)
 
-def parseFile(fileName,fileType,asJSON=False):
+def parseFile(fileName,parameters={},asJSON=False):
+	global da3, flattening, numProcesses
+	if "conversationFlattening" in parameters:
+		flattening = parameters["conversationFlattening"]
+	# The conversation files are parsed in parallel, set "numProcesses" to 1 to turn this off
+	numProcesses = parameters.get("numProcesses",os.cpu_count())
 	# This method just loads the text strings
 	# from the StringList_en.csv file
 	#see post processing for recursive search 
 	#  through the conversation files
-
-
-
-
-	firstLine=True
-	for line in open(fileName, encoding='latin-1'):
-		if firstLine:
-			line = "."+line
-			firstLine = False
-		line = line[1::2].strip()
-		if len(line)>0:
-			stringID,text = line.split(",",1)
-			text = cleanString(text)
-			da3[stringID] = text
+	# (the strings are indexed once, and looked up as they're needed)
+	da3 = stringTable.loadStringTable(fileName,stringTable.readStringList)
 	
 	plotFlags = loadPlotFlags('../data/DragonAge/DragonAgeInquisition_B/plotFlagsA.csv')
 	plotFlagsB = loadPlotFlags('../data/DragonAge/DragonAgeInquisition_B/plotFlagsB.csv')
@@ -76,54 +79,87 @@ def parseFile(fileName,fileType,asJSON=False):
 
 def postProcessing(out):
 	
-	files = [os.path.join(dp, f) for dp, dn, fn in os.walk(os.path.expanduser("../data/DragonAge/DragonAgeInquisition_B/raw/Conversations/")) for f in fn]
+	files = rawStore.walkRaw("../data/DragonAge/DragonAgeInquisition_B/raw/Conversations/")
 	
 	files = [x for x in files if x.endswith(".xml")]
 	
-	for file in files:
+	# Files are parsed in parallel, then merged in the original order
+	#  (the string table and plot flags are passed to each worker once)
+	results = mapFiles(processConversationFile,files,initConversationWorker,(da3,plotFlags,flattening))
+	for file,(fileOut,speakers,characters) in zip(files,results):
 		#print(">>>")
 		print(file)
-		txt = open(file).read()
-		out += processXMLFile(txt)
+		# Remove duplicates, assuming local constraints
+		#  (this is done here, as seen IDs are shared between files)
+		out += replaceDuplicateLinesWithGOTO(fileOut)
+		mergeSpeakerData(speakers)
+		mergeCharacterData(characters)
 		
 	writeCharData()
 	
 	return out
 
 
+def mapFiles(func,fileNames,initializer=None,initargs=()):
+	# Apply func to each file, keeping the file order.
+	if numProcesses is None or numProcesses<=1 or len(fileNames)<2:
+		return([func(x) for x in fileNames])
+	with Pool(numProcesses,initializer,initargs) as pool:
+		return(pool.map(func,fileNames))
+
+def initConversationWorker(strings,flags,flatteningMode):
+	global da3, plotFlags, flattening
+	da3 = strings
+	plotFlags = flags
+	flattening = flatteningMode
+
+def processConversationFile(fileName):
+	# Returns the lines for one file, along with the speakers
+	#  and characters found, to be merged by postProcessing
+	global speakerDict
+	speakerDict = {}
+	out,characters = processXMLFile(rawStore.openRaw(fileName).read())
+	return((out,speakerDict,characters))
+
+def parseXML(txt):
+	# The files are parsed as html (as they were with BeautifulSoup),
+	#  so tag names are lower case
+	return(etree.fromstring(txt.encode("utf8"), etree.HTMLParser(encoding="utf8")))
+
+def getText(el):
+	return("".join(el.itertext()))
+
 def processXMLFile(txt):
 	global lineDict
-	soup = BeautifulSoup(txt, "lxml")
+	root = parseXML(txt)
 	
-	lines = soup.find_all("conversationline")
-	plines = processLines(lines)
-	
-	links = soup.find_all("conversationlink")
-	plines += processLines(links)
+	plines = processLines(root.iter("conversationline"))
+	plines += processLines(root.iter("conversationlink"))
 	
 	# Make a dictionary for easy reference
 	lineDict = {}
 	for lx in plines:
 		lineDict[lx["id"]] = lx
+	graph = buildGraph(lineDict)
 	
 	# "Conversation" tags start conversation
-	conversations = soup.find_all("conversation")
+	conversations = root.iter("conversation")
 	
 	out = []
-	#seenIDs = []
+	seenIDs = set()
 	
 	# Build the conversation structure 
 	# (need recursive function)
 	for conv in conversations:
-		out.append({"LOCATION": conv.find("name").get_text() })
+		out.append({"LOCATION": getText(conv.find(".//name")) })
 		primarySpeaker = ""
-		ps = conv.find("primaryspeaker")
-		if ps:
-			primarySpeaker = ps.get_text()
+		ps = conv.find(".//primaryspeaker")
+		if not ps is None:
+			primarySpeaker = getText(ps)
 		#print(conv["guid"])
 		childIDs = getChildNodes(conv)
 		for childID in childIDs:
-			out += walkStructure(lineDict[childID],primarySpeaker)
+			out += walkStructure(graph,childID,primarySpeaker,seenIDs)
 	
 	
 # 	out = [{"CHOICE": [
@@ -146,18 +182,17 @@ def processXMLFile(txt):
 
 	
 	# Re-sort to find common codas
-	out = depthFirstToBreadthFirst(out)
-	# Remove duplicates, assuming local constraints
-	out = replaceDuplicateLinesWithGOTO(out)
+	if flattening == "expand":
+		out = depthFirstToBreadthFirst(out)
 	# Parse <LocalizedCharacter> tags (see Cre_keep_spy_09.xml)
-	parseCharacterData(soup)
+	characters = parseCharacterData(root)
 	
 	#return(plines)  # return the parsed line chunks
-	return(out)
+	return((out,characters))
 
 
 def dataToDialogue(line,primarySpeaker):
-	global charDict
+	global speakerDict
 	
 		# replace link with the full line
 	if line["type"] == "conversationlink":
@@ -191,53 +226,33 @@ def dataToDialogue(line,primarySpeaker):
 			out.append({"ACTION":act})
 	
 	# Keep track of character data
-	if not speakerID in charDict:
-		charDict[speakerID] = {
+	if not speakerID in speakerDict:
+		speakerDict[speakerID] = {
 			"name":speakerName, 
 			"gender":line["speakergender"]}
 	
 	return(out)
 
-def walkStructure(line,primarySpeaker,seenIDs=[]):
-	# (lineDict is global)
-#	if line["id"] in seenIDs:
-#		return([{"GOTO": line["id"]}])
+def buildGraph(lineDict):
+	graph = dialogueGraph.DialogueGraph()
+	for lineID in lineDict:
+		childIDs = lineDict[lineID]["childIDs"]
+		graph.addNode(lineID,alwaysChoice=len(childIDs)>1)
+		for childID in childIDs:
+			graph.addEdge(lineID,childID)
+	return(graph)
 
-	
-	out = dataToDialogue(line,primarySpeaker)
-#	if line["id"] == "f536bca2-9aa3-4cf5-ad2d-6028ec1046c0":
-#		print("YES1")
-	while True:
-		childIDs = line["childIDs"]
-		if len(childIDs)==1:
-			line = lineDict[childIDs[0]]
-			# If we swap the link line with its referent here,
-			#    then there is infinite recursion?
-#			if line["type"] == "conversationlink":
-#				linkID = re.sub("\\[.+?\\]","",line["linkedline"]).strip()
-#				line = lineDict[linkID]
-			#if line["id"] in seenIDs:
-			#	nextID = line["childIDs"][0]
-			#	out.append({"GOTO":nextID})
-			#	break
-			#seenIDs.append(line["id"])
-			out += dataToDialogue(line,primarySpeaker)
-		elif len(childIDs)>1:
-			childLines = []
-			for childID in childIDs:
-				#if childID in seenIDs:
-				#	childLines.append({"GOTO":childID})
-				#else:
-				#	seenIDs.append(childID)
-					childLines.append(walkStructure(lineDict[childID],primarySpeaker,seenIDs))
-			childLines = [x for x in childLines if len(x)>0]
-			if len(childLines)>0:
-				out.append({"CHOICE":childLines})
-			break
-		elif len(childIDs)==0:
-			break
-	#seenIDs.append(line["id"])
-	return(out)
+def walkStructure(graph,lineID,primarySpeaker,seenIDs):
+	# (lineDict is global)
+	# Lines with more than one child start a CHOICE, and empty branches are dropped.
+	render = lambda lid: dataToDialogue(lineDict[lid],primarySpeaker)
+	if flattening == "merge":
+		# Each line is written once: branches stop where they join again,
+		#  and other lines that are reached again become GOTOs
+		return(graph.walkMerged(lineID,render,seenIDs,dropEmptyBranches=True))
+	# Shared lines are written out again on every path (duplicates are
+	#  replaced with GOTOs at the end by replaceDuplicateLinesWithGOTO)
+	return(graph.walk(lineID,render,dropEmptyBranches=True))
 	
 			
 def cleanName(txt):
@@ -253,30 +268,35 @@ def processLines(data):
 	# the actual line that is spoken by the character
 	out = []
 	for line in data:
-		lx = {"id":line["guid"],"type":line.name}
+		lx = {"id":line.attrib["guid"],"type":line.tag}
+		# Find the first of each field in one pass through the line
+		fields = {}
+		for el in line.iterdescendants(*lineFieldTags):
+			if not el.tag in fields:
+				fields[el.tag] = el
 		# Add dialogue line
-		dt = line.find("conversationstringreference")
-		if dt:
-			stringID = dt.find("stringid").get_text().replace("0x","").strip().upper()
+		dt = fields.get("conversationstringreference")
+		if not dt is None:
+			stringID = getText(dt.find(".//stringid")).replace("0x","").strip().upper()
 			if stringID in da3:
-				lx["dialogue"] = da3[stringID]
+				lx["dialogue"] = cleanString(da3[stringID])
 			else:
 				lx["dialogue"] = "(MISSING "+stringID+")"
 		
 		# Add other attributes
-		for tag in ["ParaphraseReference","Speaker","SpeakerGender"]:
-			addNodeData(line,tag.lower(),lx)
+		for tag in ["paraphrasereference","speaker","speakergender"]:
+			addNodeData(fields.get(tag),tag,lx)
 		if "paraphrasereference" in lx:
-			lx["paraphrasereference"] = da3[lx["paraphrasereference"].upper()]
+			lx["paraphrasereference"] = cleanString(da3[lx["paraphrasereference"].upper()])
 		
 		# Add child ids
-		lx["childIDs"] = getChildNodes(line)
-		addNodeData(line,"linkedline",lx)	
+		lx["childIDs"] = childNodeIDs(fields.get("childnodes"))
+		addNodeData(fields.get("linkedline"),"linkedline",lx)	
 		
-		plotConditions = parsePlotConditions(line)
+		plotConditions = parsePlotConditions(fields.get("plotconditions"))
 		if plotConditions:
 			lx["plotconditions"] = plotConditions
-		plotActions = parsePlotActions(line)
+		plotActions = parsePlotActions(fields.get("plotactions"))
 		if plotActions:
 			lx["plotactions"] = plotActions
 
@@ -284,61 +304,78 @@ def processLines(data):
 	return(out)
 	
 
-def addNodeData(soup,tag,d):
-	t = soup.find(tag)
-	if t:
-		txt = t.get_text().replace("0x","").strip()
+lineFieldTags = ["conversationstringreference","paraphrasereference","speaker","speakergender",
+	"childnodes","linkedline","plotconditions","plotactions"]
+
+def addNodeData(t,tag,d):
+	if not t is None:
+		txt = getText(t).replace("0x","").strip()
 		if txt!="00000000":
 			d[tag] = txt
 
-def getChildNodes(soup):
-	cn = soup.find("childnodes")
-	childIDs = [member.get_text() for member in cn.find_all("member")]
+def childNodeIDs(cn):
+	childIDs = [getText(member) for member in cn.iter("member")]
 	childIDs = [re.sub("\\[.+?\\]","",x).strip() for x in childIDs]
 	return(childIDs)
+
+def getChildNodes(el):
+	return(childNodeIDs(el.find(".//childnodes")))
 	
-def parsePlotConditions(soup):
-	pc = soup.find("plotconditions")
-	if not pc or len(pc)==0:
+def parsePlotConditions(pc):
+	if pc is None or (len(pc)==0 and not pc.text):
 		return(None)
-	members = pc.find_all("member")
-	if not members or len(members)==0:
+	members = list(pc.iter("member"))
+	if len(members)==0:
 		return(None)
 	out = []
 	for mem in members:
-		schematic = mem.find("conditionschematic").get_text().strip()
-		mid = mem.find("plotflagid").get_text().strip()
+		schematic = getText(mem.find(".//conditionschematic")).strip()
+		mid = getText(mem.find(".//plotflagid")).strip()
 		#print(mid)
 		if mid in plotFlags:
 			mid = plotFlags[mid]
-		val = mem.find("desiredvalue").get_text().strip()
+		val = getText(mem.find(".//desiredvalue")).strip()
 		out.append(mid + " # "+schematic+ " = " + val)
 	return("IF " + " AND ".join(["("+x+")" for x in out]))
 
-def parsePlotActions(soup):
-	pa = soup.find("plotactions")
-	if not pa:
+def parsePlotActions(pa):
+	if pa is None:
 		return(None)
-	if pa["count"]=="0":
+	if pa.attrib["count"]=="0":
 		return(None)
-	members = pa.find_all("member")
+	members = pa.iter("member")
 	out = []
 	for mem in members:
-		actionType = mem.find("actiontype").get_text().strip()
-		actionSchem = mem.find("actionschematic").get_text().strip()
-		fid = mem.find("plotflagid").get_text().strip()
+		actionType = getText(mem.find(".//actiontype")).strip()
+		actionSchem = getText(mem.find(".//actionschematic")).strip()
+		fid = getText(mem.find(".//plotflagid")).strip()
 		out.append("SET "+ actionType + " [" + fid+"] "+ actionSchem)
 	return(out)
 
 
-def parseCharacterData(soup):
-	global charDict
-	charData = soup.find_all("localizedcharacter")
-	for cd in charData:
-		cid = cd["guid"]
+def parseCharacterData(root):
+	# Returns a list of (guid, {tag: text})
+	out = []
+	for cd in root.iter("localizedcharacter"):
+		cid = cd.attrib["guid"]
 		elements = {}
-		for elem in cd.findChildren():
-			elements[elem.name] = elem.get_text()
+		for elem in cd.iterdescendants(etree.Element):
+			elements[elem.tag] = getText(elem)
+		out.append((cid,elements))
+	return(out)
+
+def readCharacterFile(fileName):
+	return(parseCharacterData(parseXML(rawStore.openRaw(fileName).read())))
+
+def mergeSpeakerData(speakers):
+	global charDict
+	for speakerID in speakers:
+		if not speakerID in charDict:
+			charDict[speakerID] = speakers[speakerID]
+
+def mergeCharacterData(characters):
+	global charDict
+	for cid,elements in characters:
 		if not cid in charDict:
 			charDict[cid] = elements
 		else:
@@ -349,12 +386,10 @@ def writeCharData():
 	# (some character data is in the conversation folders)
 	
 	# Load extra character data:
-	files = [os.path.join(dp, f) for dp, dn, fn in os.walk(os.path.expanduser("../data/DragonAge/DragonAgeInquisition_B/raw/Characters/")) for f in fn]	
+	files = rawStore.walkRaw("../data/DragonAge/DragonAgeInquisition_B/raw/Characters/")	
 	files = [x for x in files if x.endswith(".xml")]
-	for file in files:
-		txt = open(file).read()
-		soup = BeautifulSoup(txt, "lxml")
-		parseCharacterData(soup)
+	for characters in mapFiles(readCharacterFile,files):
+		mergeCharacterData(characters)
 	
 	# output full character data
 	headers = ["id"]
@@ -426,7 +461,7 @@ def replaceDuplicateLinesWithGOTO(lines):
 				out.append({"GOTO":line["_ID"]})
 				break # (or return(out)??)
 			else:
-				finalSeenIDs.append(line["_ID"])
+				finalSeenIDs.add(line["_ID"])
 				out.append(line)
 		else:
 			out.append(line)
@@ -1,4 +1,6 @@
 from bs4 import BeautifulSoup
+from parsers import rawStore
+from parsers import parserBackend, stringTable
 import re
 
 # TODO:
@@ -16,8 +18,8 @@ def parseFile(fileName,parameters={},asJSON=False):
 	print(fileName)
 	# input is an unencoded dlg file
 	
-	xml = open(fileName,'r', encoding = 'utf8')
-	soup = BeautifulSoup( xml, "lxml")
+	xml = rawStore.openRaw(fileName,'r', encoding = 'utf8')
+	soup = parserBackend.makeSoup(xml, parameters, "lxml")
 	
 	# Load ids
 	if len(DAI_existingTalkstringIDs)==0:
@@ -92,11 +94,7 @@ def parseFile(fileName,parameters={},asJSON=False):
 
 def postProcessing(out):
 
-	talkStrings = {}
-	xml = open("../data/DragonAge/DragonAgeOrigins_B/raw/singleplayer_en-us.xml")
-	soup = BeautifulSoup( xml, "lxml")
-	for st in soup.find_all("string"):
-		talkStrings[st["id"]] = st.getText()
+	talkStrings = stringTable.loadStringTable("../data/DragonAge/DragonAgeOrigins_B/raw/singleplayer_en-us.xml",stringTable.readTalkTableXML)
 	
 	def getText(line):
 		k = [x for x in line if not x.startswith("_")][0]
@@ -1,4 +1,5 @@
 import json, csv, re
+from parsers import rawStore
 
 # Creatures have a "gender" property: http://www.datoolset.net/wiki/Creature
 # Characters have "male", "female" or "neutral"  http://www.datoolset.net/wiki/Character
@@ -121,7 +122,7 @@ def parseFile(fileName,parameters={"characterClassIdentifier":"DAI"},asJSON=Fals
 	# ResourceName,ModuleResRefVersionID,StringID,VoiceOverComment,Text,Speaker
 	lineDirectory = {}
 	header = []
-	with open(fileName) as csvfile:
+	with rawStore.openRaw(fileName) as csvfile:
 		csvreader = csv.reader(csvfile)
 		for row in csvreader:
 			if len(header)==0:
@@ -1,11 +1,13 @@
 from bs4 import BeautifulSoup
+from parsers import rawStore
+from parsers import parserBackend
 import json
 
 
 def parseFile(fileName,parameters={"characterClassIdentifier":"DAI"},asJSON=False):
 		
-	html_= open(fileName,'r', encoding = 'utf8')
-	soup = BeautifulSoup( html_, "html.parser")
+	html_= rawStore.openRaw(fileName,'r', encoding = 'utf8')
+	soup = parserBackend.makeSoup(html_, parameters, "html.parser")
 	posts = soup.find('div', class_='posts')
 
 	
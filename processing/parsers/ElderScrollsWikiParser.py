@@ -1,16 +1,18 @@
 from bs4 import BeautifulSoup
+from parsers import rawStore
+from parsers import parserBackend
 import json, re
+from parsers import textPipeline
 
-def cleanLine(txt):
-	txt = txt.replace('"',"")
-	txt = txt.replace('\n'," ")
-	txt = txt.replace("Nerevarine (Player name)","")
-	txt = re.sub("\(.+?\)"," ",txt)
-	txt = re.sub(" +"," ",txt)
-	txt = txt.strip()
-	txt = txt.replace("[PC Name]","Indoril")
-	txt = re.sub("\[(.+?)\]", "(\\1)",txt)
-	return(txt)
+cleanLine = textPipeline.TextPipeline([
+	("replace", '"', ""),
+	("replace", '\n', " "),
+	("replace", "Nerevarine (Player name)", ""),
+	("sub", r"\(.+?\)", " "),
+	("sub", " +", " "),
+	("strip",),
+	("replace", "[PC Name]", "Indoril"),
+	("sub", r"\[(.+?)\]", "(\\1)")])
 
 
 def parseDialogue(child, charName):
@@ -101,7 +103,7 @@ def postProcessing(out):
 
 def parseFile(fileName,parameters={},asJSON=False):
 
-	o = open(fileName)
+	o = rawStore.openRaw(fileName)
 	d = o.read()
 	o.close()
 	
@@ -109,7 +111,7 @@ def parseFile(fileName,parameters={},asJSON=False):
 	
 	out = []
 	if len(d)>4:
-		script = BeautifulSoup(d, 'html.parser')
+		script = parserBackend.makeSoup(d, parameters, 'html.parser')
 	
 		dialogue = script.find_all("div",{"class":["diabox","diabox-half"]})
 		genderDiv = script.find("div",{"data-source":"gender"})
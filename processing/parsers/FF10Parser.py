@@ -35,6 +35,8 @@
 
 
 from bs4 import BeautifulSoup, NavigableString, Tag
+from parsers import rawStore
+from parsers import parserBackend
 import json, re
 import bs4
 
@@ -42,10 +44,10 @@ def parseFile(fileName,parameters={},asJSON=False):
 
 
 	print(fileName)
-	html = open(fileName, 'r')
+	html = rawStore.openRaw(fileName, 'r')
 	html = html.read().replace('<span class="mov">(Whistles.)</span>','<span class="mov">(Whistles.)</span></span>')
 	
-	soup = BeautifulSoup(html, 'html5lib')
+	soup = parserBackend.makeSoup(html, parameters, 'html5lib')
 	try:
 		soup.find("a",{"target":"screencap","href":"../characters/noy.jpg"})["class"] = 'who'
 	except:
@@ -35,6 +35,8 @@
 
 
 from bs4 import BeautifulSoup, NavigableString, Tag
+from parsers import rawStore
+from parsers import parserBackend
 import json, re
 import bs4
 from urllib.request import urlopen
@@ -47,7 +49,7 @@ def parseFile(fileName,parameters={},asJSON=False):
 
 
 	print(fileName)
-	html = open(fileName, 'r')
+	html = rawStore.openRaw(fileName, 'r')
 	html = html.read().replace('<span class="mov">(Whistles.)</span>','<span class="mov">(Whistles.)</span></span>')
 	html = html.replace('div stage="sc"','div class="sc"')
 	html = re.sub('M<(.+?)>other','<\\1>Mother',html )
@@ -134,7 +136,7 @@ def parseFile(fileName,parameters={},asJSON=False):
 	
 	html = html.replace('in order from the right:','in order from the right-')
 	
-	soup = BeautifulSoup(html, 'html5lib')
+	soup = parserBackend.makeSoup(html, parameters, 'html5lib')
 	try:
 		soup.find("a",{"target":"screencap","href":"../characters/noy.jpg"})["class"] = 'who'
 	except:
@@ -1,4 +1,5 @@
 import json, re
+from parsers import rawStore
 
 def parseFile(fileName,parameters={},asJSON=False):
 
@@ -54,7 +55,7 @@ def parseFile(fileName,parameters={},asJSON=False):
 
 
 	print(fileName)
-	txt = open(fileName, 'r').read()
+	txt = rawStore.openRaw(fileName, 'r').read()
 	
 	txt = txt[txt.index("We begin this game"):]
 	
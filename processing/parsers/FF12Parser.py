@@ -7,6 +7,8 @@
 
 
 from bs4 import BeautifulSoup, NavigableString, Tag
+from parsers import rawStore
+from parsers import parserBackend
 import json, re
 import bs4
 import cssutils
@@ -18,13 +20,13 @@ def parseFile(fileName,parameters={},asJSON=False):
 	#global ffxii_PhrasesThatLookLikeNamesButAreActions
 	#ffxii_PhrasesThatLookLikeNamesButAreActions = parameters["PhrasesThatLookLikeNamesButAreActions"]
 	
-	html = open(fileName, 'r').read()
+	html = rawStore.openRaw(fileName, 'r').read()
 	html = html.replace("Nutsy: Nutsy:","Nutsy: ")
 #	html = html.replace('The only factor that actually changes based on where you talk to her is the price </span><span class="c9">[n]</span><span class="c1">',
 #						'The only factor that actually changes based on where you talk to her is the price "n"')
 	html = html.replace('</span><span class="c0">[#]</span><span class="c4 c6">&nbsp;', " N ")
 	html = html.replace("[n]",'"n"')
-	soup = BeautifulSoup(html, 'html5lib')
+	soup = parserBackend.makeSoup(html, parameters, 'html5lib')
 	#html.close()
 	css = soup.find('head').find('style')
 	css = cssutils.parseString(css.string)
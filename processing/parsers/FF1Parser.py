@@ -1,4 +1,5 @@
 import json,re
+from parsers import rawStore
 
 def parseFile(fileName,parameters={},asJSON=False):
 
@@ -36,7 +37,7 @@ def parseFile(fileName,parameters={},asJSON=False):
 	global genericCharCounter
 	genericCharCounter = {"Person":0, "Guard":0, "Woman":0, "Man":0,"Citizen":0, "Mermaid":0}
 
-	o = open(fileName)
+	o = rawStore.openRaw(fileName)
 	d = o.read()
 	o.close()
 		
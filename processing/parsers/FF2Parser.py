@@ -1,5 +1,7 @@
 import json,re
+from parsers import rawStore
 from bs4 import BeautifulSoup, NavigableString, Tag
+from parsers import parserBackend
 def parseFile(fileName,parameters={},asJSON=False):
 
 	def cleanName(charName):
@@ -51,7 +53,7 @@ def parseFile(fileName,parameters={},asJSON=False):
 		]}],
 	]
 
-	o = open(fileName)
+	o = rawStore.openRaw(fileName)
 	html = o.read()
 	o.close()
 	
@@ -99,7 +101,7 @@ Yes
 
 	
 	
-	soup = BeautifulSoup(html, 'html5lib')
+	soup = parserBackend.makeSoup(html, parameters, 'html5lib')
 	
 	d = soup.find("pre",{"id":"faqspan-1"}).get_text()
 	d += "\n\n" + soup.find("pre",{"id":"faqspan-2"}).get_text() 
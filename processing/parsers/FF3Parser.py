@@ -1,5 +1,7 @@
 import json,re
+from parsers import rawStore
 from bs4 import BeautifulSoup, NavigableString, Tag
+from parsers import parserBackend
 
 def parseFile(fileName,parameters={},asJSON=False):
 
@@ -29,11 +31,11 @@ def parseFile(fileName,parameters={},asJSON=False):
 		txt = re.sub("\)$","",txt)
 		return(txt.strip())
 
-	o = open(fileName)
+	o = rawStore.openRaw(fileName)
 	html = o.read()
 	o.close()
 	
-	soup = BeautifulSoup(html, 'html5lib')
+	soup = parserBackend.makeSoup(html, parameters, 'html5lib')
 	
 	d = soup.find("pre",{"id":"faqspan-1"}).get_text()
 	d += "\n\n" + soup.find("pre",{"id":"faqspan-2"}).get_text() 
@@ -1,4 +1,5 @@
 import json,re
+from parsers import rawStore
 from bs4 import BeautifulSoup, NavigableString, Tag
 
 def parseFile(fileName,parameters={},asJSON=False):
@@ -48,7 +49,7 @@ def parseFile(fileName,parameters={},asJSON=False):
 		txt = re.sub("\)$","",txt)
 		return(txt.strip())
 
-	o = open(fileName)
+	o = rawStore.openRaw(fileName)
 	txt = o.read()
 	o.close()
 	
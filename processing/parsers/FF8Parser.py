@@ -1,4 +1,6 @@
 from bs4 import BeautifulSoup, NavigableString
+from parsers import rawStore
+from parsers import parserBackend
 import json,re,copy
 
 
@@ -228,14 +230,14 @@ def parseFile(fileName,pp,asJSON=False):
 		
 ################
 ### Main loop		
-	o = open(fileName)
+	o = rawStore.openRaw(fileName)
 	d = o.read()
 	o.close()
 	
 
 	#soup = BeautifulSoup(d, 'html.parser')
 	# Parsing with html5lib so that p tags are closed
-	soup = BeautifulSoup(d, "html5lib")
+	soup = parserBackend.makeSoup(d, pp, "html5lib")
 	script = soup.find('div', id='faqtxt')
 	
 	script = script.getText()
@@ -1,5 +1,8 @@
 from bs4 import BeautifulSoup, NavigableString
+from parsers import rawStore
 import json,re,copy,csv
+from parsers import textPipeline
+from parsers import sourcePatches
 from os.path import exists
 
 # TODO
@@ -44,25 +47,25 @@ from os.path import exists
 # ----
 
 
-def parseFile(fileName,asJSON=False):
+cleanLine = textPipeline.TextPipeline([
+	("replace", "#", ""),
+	("sub", r"\.\.\.([A-Za-z])", "... \\1"),
+	("sub", "^:", ""),
+	("replace", "_", " "),
+	("replace", '"', ""),
+	("replace", '\n', " "),
+	("sub", " +", " "),
+	("replace", "\\", ""),
+	("replace", "<", "("),
+	("replace", ">", ")"),
+	("replace", "{", "("),
+	("replace", "}", ")"),
+	# replace square brackets with round brackets
+	("replace", "[", "("),
+	("replace", "]", ")"),
+	("strip",)])
 
-	def cleanLine(txt):
-		txt = txt.replace("#","")
-		txt = re.sub("\.\.\.([A-Za-z])","... \\1",txt)
-		txt = re.sub("^:","",txt)
-		txt = txt.replace("_"," ")
-		txt = txt.replace('"',"")
-		txt = txt.replace('\n'," ")
-		txt = re.sub(" +"," ",txt)
-		txt = txt.replace("\\","")
-		txt = txt.replace("<","(")
-		txt = txt.replace(">",")")
-		txt = txt.replace("{","(")
-		txt = txt.replace("}",")")
-		# replace square brackets with round brackets
-		txt = txt.replace("[","(").replace("]",")")
-		txt = txt.strip()
-		return(txt)
+def parseFile(fileName,asJSON=False):
 		
 	def cleanCharName(txt):
 		txt = txt.strip()
@@ -319,7 +322,7 @@ def parseFile(fileName,asJSON=False):
 		
 ################
 ### Main loop		
-	o = open(fileName)
+	o = rawStore.openRaw(fileName)
 	d = o.read()
 	o.close()
 	
@@ -450,148 +453,9 @@ def parseFile(fileName,asJSON=False):
 	
 	#script = script.replace("[Receive: Kupo Nut] \"I\n", "[Receive: Kupo Nut] \n                 \"I")
 	
-	script = script.replace("I''ve","I've")
-	
-	goblins1a = """Goblin?: "Rally-ho!"
-Goblin?: "Rally-ho!"
-Goblin?: "Rally-ho!\""""
-	goblins1b = """Harold Pathknower: "Rally-ho!"
-Jenny Greeter: "Rally-ho!"
-Male Dwarf: "Rally-ho!\""""
-	script = script.replace(goblins1a,goblins1b)
-
-	goblins2a = """Goblin?: "Rally-ho!"
-Goblin?: "Rally-ho!\""""	
-	goblins2b = """Jenny Greeter: "Rally-ho!"
-Male Dwarf: "Rally-ho!\""""
-	script = script.replace(goblins2a,goblins2b)
-	
-	goblins3a = """Goblin?: "Rally-ho!\""""	
-	goblins3b = """Harold Pathknower: "Rally-ho!"
-Male Dwarf: "Rally-ho!\""""
-	script = script.replace(goblins3a,goblins3b)
-	
-	goblins4a = """Villager: "Rally-ho's oor sacred greetin'!"
-
-Villager: "If ye dinnae say Rally-Ho, then ye cannae enter Conde
-          Petie, hametoon o' the dwarves!"
-
-Zidane: "Now, wait just a minute here..."
-
-Villager: "Rally-ho!"
-Villager: "Rally-ho!\""""
-	goblins4b = """Harold Pathknower: "Rally-ho's oor sacred greetin'!"
-
-Jenny Greeter: "If ye dinnae say Rally-Ho, then ye cannae enter Conde
-          Petie, hametoon o' the dwarves!"
-
-Zidane: "Now, wait just a minute here..."
-
-Harold Pathknower: "Rally-ho!"
-Jenny Greeter: "Rally-ho!\""""
-	script = script.replace(goblins4a, goblins4b)
-	
-	manx1 = """R2: [You can change your party. Afterwards, the Crewman
-             will say: "Godspeed!"]"""
-	manx2 = """R2: [You can change your party.] "Godspeed!\""""
-	script = script.replace(manx1,manx2)
-	
-	script = script.replace("R1: - Chocobo Navigation -", "R1 (SYSTEM): - Chocobo Navigation -")
-	script = script.replace("\n\n            (O)","\n            (O)")
-	script = script.replace("\n\n            [SELECT]","\n            [SELECT]")
-	script = script.replace("\n\n            [L1][R1]","\n            [L1][R1]")
-	script = script.replace("\n\n            [L2]","\n            [L2]")
-	
-	script = script.replace("""[A mage outside yells: "The humans are here!"]""","""Friendly Black Mage: "The humans are here!\"""")
-
-	# Split identical lines
-	script = script.replace('\nWatchman: "Stop, thief!"','\nMatthew Watchman: "Stop, thief!"', 1)
-	script = script.replace('\nWatchman: "Stop, thief!"','\nRichard Watchman: "Stop, thief!"', 1)
-	
-	script = script.replace(' Oracle: "Aaaa!"\n Oracle: "Aaaa!"',' Flower Maiden Sharon: "Aaaa!"\n Water Maiden Shannon: "Aaaa!"')
-	
-	script = script.replace("  (Lisa)","\n      Lisa")
-	script = script.replace("same thing these days:","same thing these days-")
-	script = script.replace("Hint: ","Hint- ")
-	
-	# Moogle name fixes
-	
-	mn1a = """ Eiko: "Go, _______!
-
- Chosen Moogle: "Kupo!"
-
- Eiko: "Who should dig up potatoes?" {Options = unchosen moogles}
-
- [Eiko makes her choices.]
-
- Eiko: "Go, ______!"
-
- Chosen Moogle: "Kupo!"
-
- Eiko: "______, you help me in the kitchen.\""""
-	mn1b = """ Eiko: "Go, Momatose!
-
- Momatose: "Kupo!"
-
- Eiko: "Who should dig up potatoes?" {Options = unchosen moogles}
-
- [Eiko makes her choices.]
-
- Eiko: "Go, Mocha!"
-
- Mocha: "Kupo!"
-
- Eiko: "Chimomo, you help me in the kitchen.\""""
-	
-	script = script.replace(mn1a,mn1b)
-	
-	mn2a = """      all the people I listed? I'll get the ingredients."
-
- Moogle: "Kupo!\""""
-	mn2b = """      all the people I listed? I'll get the ingredients."
-
- Chimomo: "Kupo!\"""" 
-	script = script.replace(mn2a,mn2b)
-	
-	mn3a = """      R1: "______! Let go of that one and catch another one!"
-
-           Moogle: "Kupo!\""""
-	mn3b = """      R1: "Momatose! Let go of that one and catch another one!"
-
-           Momatose: "Kupo!\""""
-	script = script.replace(mn3a,mn3b)
-	
-	mn4a = """Moogle: "Kupo!"
-
- Mogrich: "W-We're really good friends! Can I help you, kupo?\""""
-	mn4b = """Mogrich: "Kupo!"
-
- Mogrich: "W-We're really good friends! Can I help you, kupo?\""""
-	script = script.replace(mn4a,mn4b)
-	
-	rx1a = """ Narrative: Choose option.
-
-            R1 --> Save
-
-            R2 --> Tent
-
-            R3 --> Select party members
-
-            R4 --> Cancel"""
-	rx1b = """ Narrative: Choose option- Save, Tent, Select Party Members, Cancel."""
-	script = script.replace(rx1a, rx1b)
-	
-	script = script.replace('R3 --> "There\'s a letter for Zidane!"','R3: "There\'s a letter for Zidane!"')
-	script = script.replace('R5 --> "A letter from Kupo?','R5: "A letter from Kupo?')
-	script = script.replace('R3 --> "Hey, you gotta deliver a letter', 'R3: "Hey, you gotta deliver a letter')
-	script = script.replace('R3 --> "What do you want to do?','R3: "What do you want to do?')
-	script = script.replace('R5 --> "A letter from Kupo?','R5: "A letter from Kupo?')
-	script = script.replace('R6 --> "I want mail! Kupo!','R6: "I want mail! Kupo!')
+	# Fixes for the source are in sourcePatches.json in the game folder
+	script = sourcePatches.patchSource(script,fileName)
 	script = re.sub('R([1-9]) --> "', 'R\\1: "',script)
-	script = script.replace("R6 --> How Ya Doin'?","R6: \"How Ya Doin'?")
-	
-	
-	open("../data/FinalFantasy/FFIX_B/raw/tmp.txt",'w').write(script)
 	
 	parts = re.split("\n\n ?([A-Za-z\[=\?])",script)
 	parts = parts[1:]
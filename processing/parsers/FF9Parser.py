@@ -1,6 +1,8 @@
 # TODO: choices are not being parsed correctly
 
 from bs4 import BeautifulSoup
+from parsers import rawStore
+from parsers import parserBackend
 import json,re
 
 def parseFile(fileName,parameters={"characterClassIdentifier":"ff7", "replaceFixes": []}, asJSON=False):
@@ -86,7 +88,7 @@ def parseFile(fileName,parameters={"characterClassIdentifier":"ff7", "replaceFix
 			choices.append(cx)
 		return({"CHOICE":choices})
 	
-	o = open(fileName)
+	o = rawStore.openRaw(fileName)
 	d = o.read()
 	o.close()
 	
@@ -94,7 +96,7 @@ def parseFile(fileName,parameters={"characterClassIdentifier":"ff7", "replaceFix
 		for rep in parameters["replaceFixes"]:
 			d = d.replace(rep[0],rep[1])
 
-	soup = BeautifulSoup(d, 'html.parser')
+	soup = parserBackend.makeSoup(d, parameters, 'html.parser')
 	html = list(soup.children)[2]
 	script = html.find('div', class_='happenings')
 
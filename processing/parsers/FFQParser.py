@@ -1,6 +1,8 @@
 # TODO: choices are not being parsed correctly
 
 from bs4 import BeautifulSoup
+from parsers import rawStore
+from parsers import parserBackend
 import json,re
 
 def parseFile(fileName,parameters={"characterClassIdentifier":"ff7", "replaceFixes": []}, asJSON=False):
@@ -76,7 +78,7 @@ def parseFile(fileName,parameters={"characterClassIdentifier":"ff7", "replaceFix
 			out.append(parseHappening(happening))
 		return({"CHOICE":out})
 	
-	o = open(fileName)
+	o = rawStore.openRaw(fileName)
 	d = o.read()
 	o.close()
 	
@@ -84,7 +86,7 @@ def parseFile(fileName,parameters={"characterClassIdentifier":"ff7", "replaceFix
 		for rep in parameters["replaceFixes"]:
 			d = d.replace(rep[0],rep[1])
 
-	soup = BeautifulSoup(d, 'html.parser')
+	soup = parserBackend.makeSoup(d, parameters, 'html.parser')
 	html = list(soup.children)[2]
 	script = html.find('div', class_='happenings')
 
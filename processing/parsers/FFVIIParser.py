@@ -1,4 +1,6 @@
 from bs4 import BeautifulSoup, NavigableString
+from parsers import rawStore
+from parsers import parserBackend
 import json,re,copy
 
 
@@ -201,7 +203,7 @@ def tableParser(bit):
 
 def parseFile(fileName,parameters={"characterClassIdentifier":"ff7"},asJSON=False):
 	
-	o = open(fileName)
+	o = rawStore.openRaw(fileName)
 	d = o.read()
 	o.close()
 	
@@ -219,7 +221,7 @@ def parseFile(fileName,parameters={"characterClassIdentifier":"ff7"},asJSON=Fals
 
 	#soup = BeautifulSoup(d, 'html.parser')
 	# Parsing with html5lib so that p tags are closed
-	soup = BeautifulSoup(d, "html5lib")
+	soup = parserBackend.makeSoup(d, parameters, "html5lib")
 	script = soup.find('div', class_='content')
 	
 	# Manual fix 1 (no longer needed due to html5lib parsing above)
@@ -1,4 +1,6 @@
 from bs4 import BeautifulSoup
+from parsers import rawStore
+from parsers import parserBackend
 import json, re
 
 def cleanLine(txt):
@@ -57,7 +59,7 @@ def parseFile(fileName,parameters={},asJSON=False):
 				exx[i+1].replace_with("")
 		return(exx)
 
-	o = open(fileName)
+	o = rawStore.openRaw(fileName)
 	d = o.read()
 	o.close()
 	
@@ -69,7 +71,7 @@ def parseFile(fileName,parameters={},asJSON=False):
 	
 	d =  d.replace("note 2","")
 	
-	all = BeautifulSoup(d,'html.parser')
+	all = parserBackend.makeSoup(d, parameters, 'html.parser')
 	toctext = [x.getText() for x in all.find_all("span",{"class":"toctext"})]
 	tocnumber = [x.getText() for x in all.find_all("span",{"class":"tocnumber"})]
 	
@@ -79,7 +81,7 @@ def parseFile(fileName,parameters={},asJSON=False):
 	
 	d = d[d.index(parameters["scriptStartCue"]):d.index(parameters["scriptEndCue"])]
 
-	script = BeautifulSoup(d, 'html.parser')
+	script = parserBackend.makeSoup(d, parameters, 'html.parser')
 	
 	sectionDialogue = {}
 	out = []
@@ -1,4 +1,6 @@
 from bs4 import BeautifulSoup
+from parsers import parserBackend
+from parsers import rawContent
 import json, re
 
 # TODO
@@ -146,10 +148,9 @@ def parseFile(fileName,parameters={},asJSON=False):
 
 	choiceStoppers = ["Alyssa: I think I'm a bit jealous of you, Serah."]
 
-	html = open(fileName,'r', encoding = 'utf8')
-	html = html.read()
+	html = rawContent.loadContent(fileName,parameters)
 	html = html.replace('</pre><pre id="faqspan-3">','</pre><pre id="faqspan-3">\n\n')
-	soup = BeautifulSoup( html, "html5lib")
+	soup = parserBackend.makeSoup(html, parameters, "html5lib")
 	text = soup.find("div", {"id": parameters["textDivId"]})
 	text = "".join([x.get_text() for x in text.children])
 	text = text[text.index(parameters["startText"]):text.index(parameters["endText"])]
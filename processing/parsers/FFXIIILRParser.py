@@ -1,4 +1,5 @@
 from bs4 import BeautifulSoup
+from parsers import rawStore
 import json, re
 
 
@@ -18,7 +19,7 @@ def cleanName(txt):
 
 def parseFile(fileName,parameters={},asJSON=False):
 
-	script = open(fileName,'r', encoding = 'utf8').read()
+	script = rawStore.openRaw(fileName,'r', encoding = 'utf8').read()
 	out= []
 	
 	lines = [x for x in script.split("\n\n") if len(x.strip())>0]
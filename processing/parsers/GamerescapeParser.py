@@ -5,17 +5,19 @@
 #  single copy of the reaction.
 
 from bs4 import BeautifulSoup
+from parsers import rawStore
+from parsers import parserBackend
 import json,re
+from parsers import textPipeline
 
 
-def cleanText(txt):
-	txt = txt.strip()
-	txt = txt.replace("..."," ... ")
-	txt = re.sub("\n+"," ",txt)
-	txt = re.sub(" +"," ",txt)
-	txt = txt.replace('"',"")
-	txt = re.sub("<(.+?)>","(\\1)",txt)
-	return(txt)
+cleanText = textPipeline.TextPipeline([
+	("strip",),
+	("replace", "...", " ... "),
+	("sub", "\n+", " "),
+	("sub", " +", " "),
+	("replace", '"', ""),
+	("sub", "<(.+?)>", "(\\1)")])
 	
 def cleanName(txt):
 	txt = txt.replace("(-","")
@@ -181,7 +183,7 @@ def choiceParser(choice):
 
 def parseFile(fileName,parameters={},asJSON=False):
 	print(fileName)
-	o = open(fileName)
+	o = rawStore.openRaw(fileName)
 	d = o.read()
 	o.close()
 	
@@ -243,7 +245,7 @@ def parseFile(fileName,parameters={},asJSON=False):
 
 	out = []
 	if len(d)>2:
-		soup = BeautifulSoup(d,'html5lib')
+		soup = parserBackend.makeSoup(d, parameters, 'html5lib')
 		questDetails = getQuestDetails(soup)
 		out.append({"ACTION":"---"})
 		out.append(questDetails)
@@ -1,4 +1,5 @@
 import json, re,hjson
+from parsers import rawStore
 
 # TODO
 # Extract comment/Cue pairs
@@ -58,7 +59,7 @@ def parseFile(fileName,parameters={},asJSON=False):
 		line = {charName:cleanLine(txt)}
 		return(line)
 
-	o = open(fileName)
+	o = rawStore.openRaw(fileName)
 	d = o.read()
 	o.close()
 	
@@ -1,4 +1,5 @@
 import json, re,hjson
+from parsers import rawStore
 
 
 def parseFile(fileName,parameters={},asJSON=False):
@@ -55,7 +56,7 @@ def parseFile(fileName,parameters={},asJSON=False):
 			line["_preLineAnim"] = preLineAnim
 		return(line)
 
-	o = open(fileName)
+	o = rawStore.openRaw(fileName)
 	d = o.read()
 	o.close()
 	
@@ -1,4 +1,6 @@
 from bs4 import BeautifulSoup
+from parsers import rawStore
+from parsers import parserBackend
 import json, re
 
 # TODO
@@ -7,8 +9,8 @@ import json, re
 
 def parseFile(fileName,parameters={},asJSON=False):
 
-	d = open(fileName).read()
-	html = BeautifulSoup(d, 'html.parser')
+	d = rawStore.openRaw(fileName).read()
+	html = parserBackend.makeSoup(d, parameters, 'html.parser')
 	script = html.find("div",{"id":"post-toc"})
 	script = script.get_text()
 	
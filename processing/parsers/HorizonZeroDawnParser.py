@@ -1,4 +1,6 @@
 from bs4 import BeautifulSoup
+from parsers import rawStore
+from parsers import parserBackend
 import json, re
 
 # TODO
@@ -74,7 +76,7 @@ def parseFile(fileName,parameters={},asJSON=False):
 		return(parts)
 
 
-	o = open(fileName)
+	o = rawStore.openRaw(fileName)
 	d = o.read()
 	o.close()
 	
@@ -102,7 +104,7 @@ def parseFile(fileName,parameters={},asJSON=False):
 	d = d.replace("Mad King Jiran's summer palate","Mad King Jiran's summer palace")
 	d = d.replace("Kill the all!","Kill them all!")
 		
-	script = BeautifulSoup(d, 'html.parser')
+	script = parserBackend.makeSoup(d, parameters, 'html.parser')
 	
 	script = script.find_all(["p","h2"],recursive=True)
 	
@@ -1,4 +1,6 @@
 import json,re,csv
+from parsers import rawStore
+from parsers import dialogueGraph
 
 
 #     id: unique numerical identifier (assigned during dataset creation, has no meaning in the game)
@@ -34,7 +36,7 @@ def parseFile(fileName,parameters={},asJSON=False):
 	header = []
 	lines = []
 	# id,speaker,listener,text,animation,comment,next,previous,source_dlg,audiofile
-	with open(fileName) as csvfile:
+	with rawStore.openRaw(fileName) as csvfile:
 		csvreader = csv.reader(csvfile)
 		for row in csvreader:
 			if len(header)==0:
@@ -121,28 +123,17 @@ def parseFile(fileName,parameters={},asJSON=False):
 			startLines.append(lineID)
 	
 	
-	def walkStructure(lineID):	
-		outx = []
-		if not lineID in seenIDs:
-			seenIDs.append(lineID)
-			outx += dialogueLines[lineID]
-			if lineID in dialogueMapping:
-				choices = []
-				for nextLine in dialogueMapping[lineID]:
-					choices.append(walkStructure(nextLine))
-				if len(choices)>1:
-					outx.append({"CHOICE": choices})
-				elif len(choices)==1:
-					outx += choices[0]
-		else:
-			outx.append({"GOTO":lineID})
-		return(outx)
+	graph = dialogueGraph.DialogueGraph()
+	for lineID in dialogueLines:
+		graph.addNode(lineID)
+		for nextLine in dialogueMapping.get(lineID,[]):
+			graph.addEdge(lineID,nextLine)
 
-	#seenIDs is global
-	seenIDs = []
+	# seenIDs is shared between start lines
+	seenIDs = set()
 	out = []
 	for	startLineID in startLines:
-		out += walkStructure(startLineID)
+		out += graph.walk(startLineID,lambda lineID: dialogueLines[lineID],seenIDs)
 		out.append({"ACTION": "---"})
 
 	#print(len(seenIDs))
@@ -1,10 +1,12 @@
 from bs4 import BeautifulSoup
+from parsers import rawStore
+from parsers import parserBackend
 import json
 import re
 
 def parseFile(fileName,parameters={},asJSON=False):
 	
-	o = open(fileName)
+	o = rawStore.openRaw(fileName)
 	d = o.read()
 	o.close()
 	
@@ -15,7 +17,7 @@ def parseFile(fileName,parameters={},asJSON=False):
 	d = d.replace("I can smell you there!", 'I can smell you there!"')
 	d = d.replace("Whaddaya tryin' to do, cheat me with that measly offering? What an insult.", "RAT: \"Whaddaya tryin' to do, cheat me with that measly offering? What an insult.\"")
 	
-	html = BeautifulSoup(d, 'html.parser')
+	html = parserBackend.makeSoup(d, parameters, 'html.parser')
 	
 	t = html.getText()
 
@@ -1,4 +1,6 @@
 from bs4 import BeautifulSoup, NavigableString, Tag
+from parsers import rawStore
+from parsers import parserBackend
 import json
 import re
 
@@ -34,7 +36,7 @@ def parseFile(fileName,parameters={},asJSON=False):
 		dx = dx.replace("\\","").strip()
 		return(dx)
 	
-	o = open(fileName)
+	o = rawStore.openRaw(fileName)
 	d = o.read()
 	o.close()
 	
@@ -79,7 +81,7 @@ I smell the blood of a..."<br />""",
 	d = d.replace('\\"mouse counsel\\"',"'mouse counsel'")
 
 		
-	html = BeautifulSoup(d, 'html.parser')
+	html = parserBackend.makeSoup(d, parameters, 'html.parser')
 	
 	# divide into logic files
 	logicFiles = []
@@ -1,4 +1,6 @@
 from bs4 import BeautifulSoup, NavigableString, Tag
+from parsers import rawStore
+from parsers import parserBackend
 import json
 import re
 
@@ -34,7 +36,7 @@ def parseFile(fileName,parameters={},asJSON=False):
 		dx = dx.replace("\\","").strip()
 		return(dx)
 	
-	o = open(fileName)
+	o = rawStore.openRaw(fileName)
 	d = o.read()
 	o.close()
 	
@@ -77,7 +79,7 @@ I smell the blood of a..."<br />""",
 
 
 		
-	html = BeautifulSoup(d, 'html.parser')
+	html = parserBackend.makeSoup(d, parameters, 'html.parser')
 	
 	out = []
 	
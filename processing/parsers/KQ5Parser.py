@@ -1,4 +1,6 @@
 from bs4 import BeautifulSoup
+from parsers import rawStore
+from parsers import parserBackend
 import json
 import re
 
@@ -16,7 +18,7 @@ def parseFile(fileName,parameters={},asJSON=False):
 	
 	skipLines = ["Mostly the same lines","The long drawn out moan","There are a few new","Note: As it would"]
 	
-	o = open(fileName)
+	o = rawStore.openRaw(fileName)
 	d = o.read()
 	o.close()
 	
@@ -29,7 +31,7 @@ def parseFile(fileName,parameters={},asJSON=False):
 	if "characterTags" in parameters:
 		characterTags = parameters["characterTags"]
 	
-	html = BeautifulSoup(d, 'html.parser')
+	html = parserBackend.makeSoup(d, parameters, 'html.parser')
 	
 	out = []
 	
@@ -1,4 +1,6 @@
 from bs4 import BeautifulSoup
+from parsers import rawStore
+from parsers import parserBackend
 import json
 import re
 
@@ -115,7 +117,7 @@ def parseByNumber(html, parameters, actionNumbers=["97"]):
 
 def parseFile(fileName,parameters={},asJSON=False):
 	
-	o = open(fileName)
+	o = rawStore.openRaw(fileName)
 	d = o.read()
 	o.close()
 	
@@ -123,7 +125,7 @@ def parseFile(fileName,parameters={},asJSON=False):
 	part2 = d[d.index(parameters["startTextPt2"]):d.index(parameters["endText"])]
 	
 			
-	html1 = BeautifulSoup(part1, 'html.parser')
+	html1 = parserBackend.makeSoup(part1, parameters, 'html.parser')
 	out = parseByNumber(html1,parameters)
 	
 	# Manually fix one error in the script
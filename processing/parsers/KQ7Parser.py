@@ -1,27 +1,39 @@
 from bs4 import BeautifulSoup
+from parsers import rawStore
+from parsers import parserBackend
 import json
 import re
+from parsers import textPipeline
+from parsers import sourcePatches
 from corpusHelpers import levenshtein_ratio_and_distance
 
 
+cleanQuotes = textPipeline.TextPipeline([
+	("replace", "::marker", ""),
+	("replace", "\n", " "),
+	("sub", '^ *"', ""),
+	("sub", ',([A-Za-z])', ", \1"),
+	("sub", '" *$', "")])
+
+# remove text within brackets
+removeBrackets = textPipeline.TextPipeline([
+	("sub", r"\(.+?\)", ""),
+	("strip",),
+	("sub", "<.+?>", ""),
+	("strip",),
+	("replace", "...", " ... "),
+	("sub", " +", " ")])
+
+def cleanText(dialogue):
+	dialogue = cleanQuotes(dialogue)
+	dCue = ""
+	if dialogue.startswith("("):
+		dCue = dialogue[1:dialogue.index(")")]
+	dialogue = removeBrackets(dialogue)
+	return((dialogue,dCue))
+
 def parseFile(fileName,parameters={},asJSON=False):
 
-	def cleanText(dialogue):
-		dialogue = dialogue.replace("::marker","")
-		dialogue = dialogue.replace("\n"," ")
-		dialogue = re.sub('^ *"',"",dialogue)
-		dialogue = re.sub(',([A-Za-z])',", \1",dialogue)
-		dialogue = re.sub('" *$',"",dialogue)
-		dCue = ""
-		if dialogue.startswith("("):
-			dCue = dialogue[1:dialogue.index(")")]
-		# remove text within brackets
-		dialogue = re.sub("\(.+?\)","",dialogue).strip()
-		dialogue = re.sub("<.+?>","",dialogue).strip()
-		dialogue = dialogue.replace("..."," ... ")
-		dialogue = re.sub(" +"," ",dialogue)
-		return((dialogue,dCue))
-		
 	def lineShouldBeAdded(dialogue,dataKey):
 		if dataKey in seenKeys:
 			# Check other bits of dialogue to see if they're similar
@@ -33,7 +45,7 @@ def parseFile(fileName,parameters={},asJSON=False):
 					return(False)
 		return(True)
 	
-	o = open(fileName)
+	o = rawStore.openRaw(fileName)
 	d = o.read()
 	o.close()
 	
@@ -42,15 +54,10 @@ def parseFile(fileName,parameters={},asJSON=False):
 	if "endText" in parameters:
 		d = d[:d.index(parameters["endText"])]
 	
-	# Individual fixes for source
-	d = d.replace('I should fin out',"I should find out")
-	d = d.replace("(MALICIA - FURIOUS, SHRIEKING) NOOOOOOO!", "\"\n0 0 2 6 12 \"(MALICIA - FURIOUS, SHRIEKING) NOOOOOOO!\"")
-	d = d.replace("EXTREMELY POLIT)","EXTREMELY POLITE)")
-	d = d.replace('"THINKS TO HERSELF)','"(THINKS TO HERSELF)')
-	d = d.replace('"CURIOUS)','"(CURIOUS)')
-	d = d.replace('"OVERCOME WITH GRIEF)','"(OVERCOME WITH GRIEF)')
+	# Fixes for the source are in sourcePatches.json in the game folder
+	d = sourcePatches.patchSource(d,fileName,parameters)
 
-	html = BeautifulSoup(d, 'html.parser')
+	html = parserBackend.makeSoup(d, parameters, 'html.parser')
 	
 	# replace <br> with space
 	for br in html.find_all("br"):
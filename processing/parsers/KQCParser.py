@@ -1,4 +1,6 @@
 from bs4 import BeautifulSoup
+from parsers import rawStore
+from parsers import parserBackend
 import json
 import re
 
@@ -30,7 +32,7 @@ def parseFile(fileName,parameters={},asJSON=False):
 	if not "reForDialogue" in parameters:
 		parameters["reForDialogue"] = "Text=\".+?\""
 	
-	o = open(fileName)
+	o = rawStore.openRaw(fileName)
 	d = o.read()
 	o.close()
 	
@@ -44,7 +46,7 @@ def parseFile(fileName,parameters={},asJSON=False):
 		d = d[:d.index(parameters["endText"])]
 		
 
-	html = BeautifulSoup(d, 'html.parser')
+	html = parserBackend.makeSoup(d, parameters, 'html.parser')
 	out = [{"ACTION":"---- Chapter "+fileNameEnd[5]}]
 	
 	htmlParts = list(html.children)
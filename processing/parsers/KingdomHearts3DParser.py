@@ -1,4 +1,5 @@
 from bs4 import BeautifulSoup
+from parsers import rawStore
 import json, re
 
 
@@ -49,7 +50,7 @@ def lineParser(line,param):
 def parseFile(fileName,parameters={},asJSON=False):
 
 
-	o = open(fileName)
+	o = rawStore.openRaw(fileName)
 	d = o.read()
 	o.close()
 	
@@ -4,7 +4,9 @@
 # TODO: ME1: something wrong with parsing file/conv names.
 
 from bs4 import BeautifulSoup
+from parsers import rawStore
 import json,re,csv,os
+from parsers import dialogueGraph, stringTable, MassEffectPlotDatabase
 
 
 # def cleanText(t):
@@ -27,63 +29,6 @@ def parseFile(fileName,parameters={},asJSON=False):
 
 
 
-	def loadPlotDatabase(folder):
-		o = open(folder + "/plotDatabase.txt")
-		txt = o.read()
-		o.close()
-		txt = txt.replace("/","/")
-	
-		condBits = txt.split("<conditional ")[1:-1]
-		condDatabase = {}
-		for condBit in condBits:
-			condID = condBit[condBit.index("=")+2:condBit.index(">")-1].strip()
-			condDesc = condBit[condBit.index("<description>")+13:condBit.index("</description")]
-			condDatabase[condID] = condDesc
-		
-		transBits = txt.split("<state_transition ")[1:-1]
-		transDatabase = {}
-		for transBit in transBits:
-			transID = transBit[transBit.index("=")+2:transBit.index(">")-1].strip()
-			transDesc = transBit[transBit.index("<description>")+13:transBit.index("</description")]
-			transDatabase[transID] = transDesc
-		
-		boolBits = txt.split("<value ")[1:-1]
-		boolDatabase = {}
-		for boolBit in boolBits:
-			boolID = boolBit[boolBit.index("=")+2:boolBit.index(">")-1].strip()
-			boolDesc = boolBit[boolBit.index("<description>")+13:boolBit.index("</description")]
-			boolDatabase[boolID] = boolDesc
-
-		# Character lists
-		charBits = txt.split("<character ")[1:]
-		charIDToFriendlyName = {}
-		for charBit in charBits:
-			friendlyName = charBit[charBit.index("=")+2:charBit.index(">")-1].strip()
-			friendlyName = friendlyName.replace("&quot;",'"')
-			tags = re.findall('<actor_tag>(.+?)</actor_tag>', charBit)
-			for tag in tags:
-				charIDToFriendlyName[tag] = friendlyName
-				
-		#allCharNames = list(set([x for x in charIDToFriendlyName.values()]))
-		#for ax in allCharNames:
-		#	print(ax)
-#		o = open(folder + "/../charIDs.txt",'w')
-#		o.write("\n".join(['\t"' + x + '":"' + charIDToFriendlyName[x] + '"' for x in charIDToFriendlyName]))
-#		o.close()
-
-		# extra parts:
-		# (Abandoned for now because the format is weird)
-# 		b2 = open(folder + "/bools.txt").read()
-# 		for x in ["name:","id:","categories:","Note:","ints:","bools:"]:
-# 			b2 = b2.replace(x,'"'+x[:-1]+'":')
-# 		b2 = b2.replace(",\n}","\n}")
-# 		bools2 = json.loads(b2)
-# 		print(bools2)
-# 		print(naskj)
-		
-
-		return((charIDToFriendlyName,condDatabase,transDatabase,boolDatabase))
-
 	def loadConversationOwnerData(folder):
 		convOwners = {}
 		with open(folder+"/../DialogueOwners.csv") as csvfile:
@@ -175,15 +120,39 @@ def parseFile(fileName,parameters={},asJSON=False):
 				return(huntNextSpeaker(links[0][0],lines,owner))
 			
 	
-	def followNode(node,lines,owner):
-		global visitedNodes
+	def getLinkCondition(link,lines,owner):
+		condition = []
+		if len(link)>1:
+			if link[1].count("REPLY_")>0:
+				# "Liara's mother\"(REPLY_CATEGORY_INVESTIGATE)"
+				#print(link)
+				# Some links have parentheses in the text, so need re
+				# '"(Shoot him.)"(REPLY_CATEGORY_DISAGREE)'
+				guiPrompt, replyCategory = re.split("\\(REPLY",link[1])
+				if guiPrompt != "No Data":
+					replyCategory = replyCategory.replace(")","")
+					# (the "REPLY" part should be cut by the split above)
+					replyCategory = replyCategory.replace("_CATEGORY_","")
+					condition = [{"ACTION":replyCategory,
+									"_PROMPT":guiPrompt}]
+			else:
+				condID,condVar = link[1].replace("(","").replace(")","").split("/")
+				condDescription = ""
+				if condID in condDatabase:
+					condDescription = condDatabase[condID]
+					if condDescription == "Speaker is in party":
+						nextSpeaker = huntNextSpeaker(link[0],lines,owner)
+						if nextSpeaker is None:
+							condDescription = "Next speaker is in party"
+						else:
+							condDescription = nextSpeaker + " is in party"
+				elif condID in boolDatabase:
+					condDescription = boolDatabase[condID]
+				condition = [{"STATUS": condDescription.strip() + " (" + condID + "/" + condVar.strip() + ")" }]
+		return(condition)
+	
+	def renderNode(node,owner):
 		global ownersNotFoundLines
-		
-		if node["LineStrRef"] in visitedNodes:
-			return([{"GOTO":node["LineStrRef"]}])
-		
-		visitedNodes.append(node["LineStrRef"])
-		
 		ret = []
 		dialogue = getDialogue(node,owner)
 		if not dialogue is None:
@@ -197,56 +166,42 @@ def parseFile(fileName,parameters={},asJSON=False):
 			# These are sometimes used as GOTO points in conditionals
 			# It's possible that not all of them are used, so could be post-processed
 			ret.append({"ACTION":"", "_ID":node["LineStrRef"]})
-		links = getLinks(node)
-		if len(links)==1:
-			nextNode = [x for x in lines if x["LineStrRef"]==links[0][0]]
-			if len(nextNode)>0:
-				ret += followNode(nextNode[0],lines,owner)
-		else:
-			choice = []
+		return(ret)
+	
+	def buildConvGraph(lines,owner):
+		# (if there are several lines with the same LineStrRef, the first is used)
+		nodes = {}
+		for node in lines:
+			if not node["LineStrRef"] in nodes:
+				nodes[node["LineStrRef"]] = node
+		# Only add lines that can be reached from a start node
+		graph = dialogueGraph.DialogueGraph()
+		toAdd = [n["LineStrRef"] for n in lines if n["NodeType"]=="start"]
+		added = set()
+		while len(toAdd)>0:
+			lineStrRef = toAdd.pop()
+			if lineStrRef in added:
+				continue
+			added.add(lineStrRef)
+			links = getLinks(nodes[lineStrRef])
+			# A single link continues the dialogue, otherwise the links are a CHOICE
+			graph.addNode(lineStrRef,alwaysChoice=len(links)!=1)
 			for link in links:
-				nextNode = [x for x in lines if x["LineStrRef"]==link[0]]
-				if len(nextNode)>0:
+				if link[0] in nodes:
 					condition = []
-					if len(link)>1:
-						if link[1].count("REPLY_")>0:
-							# "Liara's mother\"(REPLY_CATEGORY_INVESTIGATE)"
-							#print(link)
-							# Some links have parentheses in the text, so need re
-							# '"(Shoot him.)"(REPLY_CATEGORY_DISAGREE)'
-							guiPrompt, replyCategory = re.split("\\(REPLY",link[1])
-							if guiPrompt != "No Data":
-								replyCategory = replyCategory.replace(")","")
-								# (the "REPLY" part should be cut by the split above)
-								replyCategory = replyCategory.replace("_CATEGORY_","")
-								condition = [{"ACTION":replyCategory,
-												"_PROMPT":guiPrompt}]
-						else:
-							condID,condVar = link[1].replace("(","").replace(")","").split("/")
-							condDescription = ""
-							if condID in condDatabase:
-								condDescription = condDatabase[condID]
-								if condDescription == "Speaker is in party":
-									nextSpeaker = huntNextSpeaker(link[0],lines,owner)
-									if nextSpeaker is None:
-										condDescription = "Next speaker is in party"
-									else:
-										condDescription = nextSpeaker + " is in party"
-							elif condID in boolDatabase:
-								condDescription = boolDatabase[condID]
-							condition = [{"STATUS": condDescription.strip() + " (" + condID + "/" + condVar.strip() + ")" }]
-					choice.append(condition + followNode(nextNode[0],lines,owner))
-			if len(choice)>0:
-				ret.append({"CHOICE":choice})
-		return(ret)
+					if len(links)!=1:
+						condition = getLinkCondition(link,lines,owner)
+					graph.addEdge(lineStrRef,link[0],condition)
+					toAdd.append(link[0])
+		return(graph,nodes)
 		
 	def parseConv(lines,owner):
-		global visitedNodes
-		visitedNodes = []
+		graph,nodes = buildConvGraph(lines,owner)
+		visitedNodes = set()
 		startNodes = [n for n in lines if n["NodeType"]=="start"]
 		outx = []
 		for startNode in startNodes:
-			outx += followNode(startNode,lines,owner)
+			outx += graph.walk(startNode["LineStrRef"],lambda lineStrRef: renderNode(nodes[lineStrRef],owner),visitedNodes)
 			outx.append({"ACTION":"---"})
 		return(outx)
 		
@@ -271,14 +226,14 @@ def parseFile(fileName,parameters={},asJSON=False):
 		
 	folder = fileName[:fileName.rindex("/")]
 	global charIDToFriendlyName,condDatabase
-	charIDToFriendlyName,condDatabase,transDatabase,boolDatabase = loadPlotDatabase(folder)
+	charIDToFriendlyName,condDatabase,transDatabase,boolDatabase = MassEffectPlotDatabase.loadPlotDatabase(folder)
 	
 	global convOwners
 	convOwners = loadConversationOwnerData(folder)
 	
 	d = []
 	header = []
-	with open(fileName) as csvfile:
+	with rawStore.openRaw(fileName) as csvfile:
 		csvreader = csv.reader(csvfile,dialect=csv.excel)
 		for row in csvreader:
 			if len(header)==0:
@@ -310,8 +265,6 @@ def parseFile(fileName,parameters={},asJSON=False):
 #	print(ndsjnk)
 	
 	out = []
-	global visitedNodes
-	visitedNodes = []
 	
 	ownersNotFound = []
 	global ownersNotFoundLines
@@ -359,32 +312,47 @@ def parseFile(fileName,parameters={},asJSON=False):
 	## Attempt to add translations
 	
 	print("Adding translations ...")
-	def addTranslation(out, fileName,lang):
-		transDict = {}
-		header = []
-		with open(fileName) as csvfile:
-			xr = csv.reader(csvfile)
-			for row in xr:
-				if len(header)==0:
-					header=row
-				else:
-					idx = row[header.index("TLK StringRef")]
-					dlg = cleanDialogue(row[header.index("Line")])
-					if len(dlg)>0:
-						transDict[idx] = cleanDialogue(dlg)
-		
-		def walkTrans(lines,lang):
-			for line in lines:
-				k = [x for x in line if not x.startswith("_")][0]
-				if k=="CHOICE":
-					for choice in line["CHOICE"]:
-						walkTrans(choice,lang)
-				else:
-					if "_ID" in line:
-						outID = line["_ID"]
-						if outID in transDict:
-							line["_"+lang] = transDict[outID]
-		walkTrans(out,lang)
+	def loadTranslations(filePaths):
+		# One table of StringRef -> {lang: text} for all languages
+		translations = {}
+		for lang in filePaths:
+			print("   "+lang)
+			transDict = stringTable.loadStringTable(filePaths[lang],stringTable.readDialogueDump)
+			for outID,dlg in transDict.items():
+				dlg = cleanDialogue(dlg)
+				if len(dlg)>0:
+					if not outID in translations:
+						translations[outID] = {}
+					translations[outID][lang] = dlg
+		return(translations)
+	
+	def walkTrans(lines,langs,translations,found):
+		# Add translations to lines in one pass,
+		#  and keep a list of the translated IDs in order
+		for line in lines:
+			k = [x for x in line if not x.startswith("_")][0]
+			if k=="CHOICE":
+				for choice in line["CHOICE"]:
+					walkTrans(choice,langs,translations,found)
+			else:
+				if "_ID" in line:
+					outID = line["_ID"]
+					if outID in translations:
+						found.append(outID)
+						for lang in langs:
+							if lang in translations[outID]:
+								line["_"+lang] = translations[outID][lang]
+	
+	def writeTranslationSidecar(fileName,langs,translations,outIDs):
+		# One column per language, one row per translated line
+		with open(fileName,'w') as csvfile:
+			writer = csv.writer(csvfile)
+			writer.writerow(["_ID"]+langs)
+			seen = set()
+			for outID in outIDs:
+				if not outID in seen:
+					seen.add(outID)
+					writer.writerow([outID]+[translations[outID].get(lang,"") for lang in langs])
 	
 	MEVersion = "ME1"
 	if folder.count("MassEffect2")>0:
@@ -392,11 +360,21 @@ def parseFile(fileName,parameters={},asJSON=False):
 		MEVersion = "ME2"
 	if folder.count("MassEffect3")>0:
 		MEVersion = "ME3"
+	filePaths = {}
 	for fn in ["FRA","ESN","DEU","ITA","RUS","JPN","POL"]:
 		filePath = folder+"/"+MEVersion+"DialogueDump_"+fn+".csv"
 		if os.path.isfile(filePath):
-			print("   "+fn)
-			addTranslation(out,filePath,fn)
+			filePaths[fn] = filePath
+	if len(filePaths)>0:
+		langs = list(filePaths)
+		translations = loadTranslations(filePaths)
+		# Translations can be written to a separate file (translations.csv
+		#  in the game folder) instead of data.json with "translationSidecar"
+		sidecar = parameters.get("translationSidecar",False)
+		translatedIDs = []
+		walkTrans(out,[] if sidecar else langs,translations,translatedIDs)
+		if sidecar:
+			writeTranslationSidecar(folder + "/../translations.csv",langs,translations,translatedIDs)
 			
 	if asJSON:
 		return(json.dumps({"text":out}, indent = 4))
@@ -60,7 +60,9 @@
 #             +-*** see entry #73 ***
 
 from bs4 import BeautifulSoup
+from parsers import rawStore
 import json,re,csv
+from parsers import MassEffectPlotDatabase
 
 
 def cleanText(t):
@@ -81,63 +83,6 @@ def parseFile(fileName,parameters={},asJSON=False):
 # 			bitName,cond = bit.split("]\n",1)
 # 			conditions[bitName.strip()] = cond.strip()
 			
-	def loadPlotDatabase(folder):
-		o = open(folder + "/plotDatabase.txt")
-		txt = o.read()
-		o.close()
-		txt = txt.replace("/","/")
-	
-		condBits = txt.split("<conditional ")[1:-1]
-		condDatabase = {}
-		for condBit in condBits:
-			condID = condBit[condBit.index("=")+2:condBit.index(">")-1].strip()
-			condDesc = condBit[condBit.index("<description>")+13:condBit.index("</description")]
-			condDatabase[condID] = condDesc
-		
-		transBits = txt.split("<state_transition ")[1:-1]
-		transDatabase = {}
-		for transBit in transBits:
-			transID = transBit[transBit.index("=")+2:transBit.index(">")-1].strip()
-			transDesc = transBit[transBit.index("<description>")+13:transBit.index("</description")]
-			transDatabase[transID] = transDesc
-		
-		boolBits = txt.split("<value ")[1:-1]
-		boolDatabase = {}
-		for boolBit in boolBits:
-			boolID = boolBit[boolBit.index("=")+2:boolBit.index(">")-1].strip()
-			boolDesc = boolBit[boolBit.index("<description>")+13:boolBit.index("</description")]
-			boolDatabase[boolID] = boolDesc
-
-		# Character lists
-		charBits = txt.split("<character ")[1:]
-		charIDToFriendlyName = {}
-		for charBit in charBits:
-			friendlyName = charBit[charBit.index("=")+2:charBit.index(">")-1].strip()
-			friendlyName = friendlyName.replace("&quot;",'"')
-			tags = re.findall('<actor_tag>(.+?)</actor_tag>', charBit)
-			for tag in tags:
-				charIDToFriendlyName[tag] = friendlyName
-				
-		#allCharNames = list(set([x for x in charIDToFriendlyName.values()]))
-		#for ax in allCharNames:
-		#	print(ax)
-#		o = open(folder + "/../charIDs.txt",'w')
-#		o.write("\n".join(['\t"' + x + '":"' + charIDToFriendlyName[x] + '"' for x in charIDToFriendlyName]))
-#		o.close()
-
-		# extra parts:
-		# (Abandoned for now because the format is weird)
-# 		b2 = open(folder + "/bools.txt").read()
-# 		for x in ["name:","id:","categories:","Note:","ints:","bools:"]:
-# 			b2 = b2.replace(x,'"'+x[:-1]+'":')
-# 		b2 = b2.replace(",\n}","\n}")
-# 		bools2 = json.loads(b2)
-# 		print(bools2)
-# 		print(naskj)
-		
-
-		return((charIDToFriendlyName,condDatabase,transDatabase,boolDatabase))
-
 	def loadConversationOwnerData(folder):
 		convOwners = {}
 		with open(folder+"/../ME3_DialogueOwners.csv") as csvfile:
@@ -340,11 +285,11 @@ def parseFile(fileName,parameters={},asJSON=False):
 		return(outx)
 	
 	folder = fileName[:fileName.rindex("/")]
-	charIDToFriendlyName,condDatabase,transDatabase,boolDatabase = loadPlotDatabase(folder)
+	charIDToFriendlyName,condDatabase,transDatabase,boolDatabase = MassEffectPlotDatabase.loadPlotDatabase(folder)
 	
 	convOwners = loadConversationOwnerData(folder)
 	
-	o = open(fileName)
+	o = rawStore.openRaw(fileName)
 	d = o.read()
 	o.close()
 	
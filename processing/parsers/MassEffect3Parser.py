@@ -1,6 +1,8 @@
 # TODO: need to get around block on scraper
 
 from bs4 import BeautifulSoup
+from parsers import rawStore
+from parsers import parserBackend
 import json,re
 
 
@@ -11,7 +13,7 @@ def cleanText(t):
 
 def parseFile(fileName,parameters={},asJSON=False):
 	
-	o = open(fileName)
+	o = rawStore.openRaw(fileName)
 	d = o.read()
 	o.close()
 	
@@ -19,7 +21,7 @@ def parseFile(fileName,parameters={},asJSON=False):
 
 	#d = d[d.index('<a name="_6514z9385er8"></a>'):]
 	
-	html = BeautifulSoup(d, 'html.parser')
+	html = parserBackend.makeSoup(d, parameters, 'html.parser')
 	html = html.find("div",{"class":"c31"})
 
 	out = []
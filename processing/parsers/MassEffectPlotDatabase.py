@@ -0,0 +1,71 @@
+import json, os
+from lxml import etree
+from parsers import stringTable
+
+# Shared loader for the Mass Effect plot database (plotDatabase.txt in
+#  the raw folder, downloaded by the ME scrapers), which describes the
+#  conditionals, state transitions and bools used in conversations,
+#  and the actor tags for each character.
+# The file is read once with a streaming xml parser, and the result is
+#  stored in plotDatabase.index.json beside it, keyed by the hash of the
+#  file, so it's only parsed again if the file changes.
+
+indexVersion = 1
+
+# Databases already loaded in this process
+loaded = {}
+
+def firstAttribute(el):
+	return(list(el.attrib.values())[0].strip())
+
+def getDescription(el):
+	desc = el.find(".//description")
+	if desc is None:
+		return("")
+	return("".join(desc.itertext()))
+
+def parsePlotDatabase(fileName):
+	database = {"characters":{}, "conditionals":{}, "transitions":{}, "bools":{}}
+	sections = {"conditional":"conditionals", "state_transition":"transitions", "value":"bools"}
+	tags = ("conditional","state_transition","value","character")
+	for event,el in etree.iterparse(fileName, events=("end",), tag=tags, recover=True):
+		# (only elements with an id)
+		if len(el.attrib)>0:
+			if el.tag=="character":
+				friendlyName = firstAttribute(el)
+				for tag in el.iter("actor_tag"):
+					if not tag.text is None:
+						database["characters"][tag.text] = friendlyName
+			else:
+				database[sections[el.tag]][firstAttribute(el)] = getDescription(el)
+		# Free finished elements, but not ones inside another element
+		#  that is still to be read
+		if next(el.iterancestors(*tags),None) is None:
+			el.clear()
+			while not el.getprevious() is None:
+				del el.getparent()[0]
+	return(database)
+
+def loadIndex(indexFileName,sourceHash):
+	if not os.path.isfile(indexFileName):
+		return(None)
+	with open(indexFileName) as f:
+		index = json.load(f)
+	if index.get("sourceHash")!=sourceHash or index.get("version")!=indexVersion:
+		return(None)
+	return(index["database"])
+
+def loadPlotDatabase(folder):
+	# Returns (charIDToFriendlyName,condDatabase,transDatabase,boolDatabase)
+	fileName = folder + "/plotDatabase.txt"
+	sourceHash = stringTable.hashFile(fileName)
+	if not (fileName,sourceHash) in loaded:
+		indexFileName = folder + "/plotDatabase.index.json"
+		database = loadIndex(indexFileName,sourceHash)
+		if database is None:
+			database = parsePlotDatabase(fileName)
+			with open(indexFileName,'w') as o:
+				json.dump({"version":indexVersion, "sourceHash":sourceHash, "database":database}, o)
+		loaded[(fileName,sourceHash)] = database
+	database = loaded[(fileName,sourceHash)]
+	return((database["characters"],database["conditionals"],database["transitions"],database["bools"]))
@@ -1,11 +1,13 @@
 from bs4 import BeautifulSoup
+from parsers import parserBackend
+from parsers import rawContent
 import json, re
 
 
 def parseFile(fileName,parameters={},asJSON=False):
 
-	html_= open(fileName,'r', encoding = 'utf8')
-	soup = BeautifulSoup( html_, "html.parser")
+	html_ = rawContent.loadContent(fileName,parameters)
+	soup = parserBackend.makeSoup(html_, parameters, "html.parser")
 	text = soup.find("div", {"id": parameters["textDivId"]})
 	text = "\n\n".join([x.get_text() for x in text.children])
 	
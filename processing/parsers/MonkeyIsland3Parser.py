@@ -1,4 +1,6 @@
 from bs4 import BeautifulSoup
+from parsers import parserBackend
+from parsers import rawContent
 import json, re
 
 
@@ -112,8 +114,8 @@ def parseFile(fileName,parameters={},asJSON=False):
 				return({charName:cleanLine(dialogueText,True)})
 
 
-	html_= open(fileName,'r', encoding = 'utf8')
-	soup = BeautifulSoup( html_, "html.parser")
+	html_ = rawContent.loadContent(fileName,parameters)
+	soup = parserBackend.makeSoup(html_, parameters, "html.parser")
 	text = soup.find("div", {"id": parameters["textDivId"]})
 	text = "\n\n".join([x.get_text() for x in text.children])
 	text = text[text.index(parameters["startText"]):text.index(parameters["endText"])]
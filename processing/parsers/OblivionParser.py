@@ -1,10 +1,11 @@
 from bs4 import BeautifulSoup
+from parsers import rawStore
 import json
 
 
 def parseFile(fileName,parameters={"characterClassIdentifier":"DAI"},asJSON=False):
 		
-	o = open(fileName,encoding="latin-1")
+	o = rawStore.openRaw(fileName,encoding="latin-1")
 	d = o.read()
 	o.close()
 
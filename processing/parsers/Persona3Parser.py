@@ -1,4 +1,6 @@
 from bs4 import BeautifulSoup
+from parsers import rawStore
+from parsers import parserBackend
 import json, re, time, os
 import xlsxwriter
 from io import BytesIO
@@ -35,7 +37,7 @@ def parseFile(fileName,parameters={},asJSON=False):
 		else:
 			return(txt.getText())
 
-	o = open(fileName)
+	o = rawStore.openRaw(fileName)
 	d = o.read()
 	o.close()
 	
@@ -54,7 +56,7 @@ def parseFile(fileName,parameters={},asJSON=False):
 	
 	d = d.replace(r1,r2)
 	
-	soup = BeautifulSoup(d,'html.parser')
+	soup = parserBackend.makeSoup(d, parameters, 'html.parser')
 	script = soup.find("div")
 	
 	# Divide into lines
@@ -1,4 +1,6 @@
 from bs4 import BeautifulSoup
+from parsers import rawStore
+from parsers import parserBackend
 import json, re, time, os
 import xlsxwriter
 from io import BytesIO
@@ -105,7 +107,7 @@ def parseFile(fileName,parameters={},asJSON=False):
 		return(imageURL)
 
 
-	o = open(fileName)
+	o = rawStore.openRaw(fileName)
 	d = o.read()
 	o.close()
 	
@@ -115,7 +117,7 @@ def parseFile(fileName,parameters={},asJSON=False):
 	
 	#d = d.replace("<i>","*").replace("</i>","*")
 	
-	soup = BeautifulSoup(d,'html.parser')
+	soup = parserBackend.makeSoup(d, parameters, 'html.parser')
 	script = soup.find("div")
 	
 	# Divide into lines
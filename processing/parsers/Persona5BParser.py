@@ -1,4 +1,6 @@
 from bs4 import BeautifulSoup
+from parsers import rawStore
+from parsers import parserBackend
 import json, re, time, os
 import xlsxwriter
 from io import BytesIO
@@ -132,7 +134,7 @@ def parseFile(fileName,parameters={},asJSON=False):
 		return(imageURL)
 
 
-	o = open(fileName)
+	o = rawStore.openRaw(fileName)
 	d = o.read()
 	o.close()
 	
@@ -195,7 +197,7 @@ def parseFile(fileName,parameters={},asJSON=False):
 	for rex in removeColons:
 		d = d.replace(rex,rex.replace(":","-"))
 	
-	soup = BeautifulSoup(d,'html.parser')
+	soup = parserBackend.makeSoup(d, parameters, 'html.parser')
 	script = soup.find("div")
 	
 
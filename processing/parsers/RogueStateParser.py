@@ -1,4 +1,5 @@
 import json,re,os
+from parsers import rawStore
 
 def parseFile(fileName,parameters={},asJSON=False):
 
@@ -12,7 +13,7 @@ def parseFile(fileName,parameters={},asJSON=False):
 	
 
 	
-	o = open(fileName)
+	o = rawStore.openRaw(fileName)
 	d = o.read()
 	o.close()
 	
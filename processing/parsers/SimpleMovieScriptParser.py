@@ -1,4 +1,6 @@
 from bs4 import BeautifulSoup
+from parsers import parserBackend
+from parsers import rawContent
 import json, re
 
 
@@ -40,13 +42,12 @@ def lineParser(line,param):
 
 def parseFile(fileName,parameters={},asJSON=False):
 
-	html_= open(fileName,'r', encoding = 'utf8')
-	html_ = html_.read()
+	html_ = rawContent.loadContent(fileName,parameters)
 	# manual edits for KH3
 	html_ = html_.replace("Hiro: And the crime fighting team of Big Hero 6! Together, we're unstoppable.\n\nEveryone: Yeah!", "Hiro: And the crime fighting team of Big Hero 6! Together, we're unstoppable.\n\nDonald & Goofy & Fred: Yeah!")
 	html_ = html_.replace("Mickey: Right!\n\nEveryone: Yeah!", "Mickey: Right!\n\nDonald & Goofy & Roxas & Riku & Aqua & Kairi: Yeah!")
 	
-	soup = BeautifulSoup( html_, "html.parser")
+	soup = parserBackend.makeSoup(html_, parameters, "html.parser")
 	text = soup.find("div", {"id": parameters["textDivId"]})
 	text = "\n\n".join([x.get_text() for x in text.children])
 	text = text[text.index(parameters["startText"]):text.index(parameters["endText"])]
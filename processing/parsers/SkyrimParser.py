@@ -1,4 +1,8 @@
 from bs4 import BeautifulSoup
+from parsers import parserBackend
+from parsers import rawContent
+from parsers import textPipeline
+from parsers import sourcePatches
 import json,re,copy
 
 # TODO: Scene changes
@@ -35,16 +39,22 @@ import json,re,copy
 # The last line is not part of the choice
 
 
+cleanTextPipeline = textPipeline.TextPipeline([
+	("replace", "¯", ""),
+	("replace", "_", ""),
+	("replace", "|", ""),
+	("replace", "²", ""),
+	("replace", "¹", ""),
+	("replace", "#", ""),
+	("sub", " +", " "),
+	("strip",)])
+
+def cleanText(txt):
+	if txt.count("_______")>0:
+		return("")
+	return(cleanTextPipeline(txt))
+
 def parseFile(fileName,parameters={},asJSON=False):
-						
-	def cleanText(txt):
-		if txt.count("_______")>0:
-			return("")
-		txt = txt.replace("¯","").replace("_","").replace("|","")
-		txt = txt.replace("²","").replace("¹","")
-		txt = txt.replace("#","")
-		txt = re.sub(" +"," ",txt).strip()
-		return(txt)
 		
 	def getIndentLevel(line):
 		if line.startswith(" "):
@@ -52,49 +62,13 @@ def parseFile(fileName,parameters={},asJSON=False):
 		else:
 			return(0)
 	
-	html_= open(fileName,'r', encoding = 'utf8')
-	soup = BeautifulSoup( html_, "html.parser")
+	html_ = rawContent.loadContent(fileName,parameters)
+	soup = parserBackend.makeSoup(html_, parameters, "html.parser")
 	text = soup.find("div", {"id": parameters["textDivId"]})
 	text = text.get_text()
 	text = text[text.index(parameters["startText"]):text.index(parameters["endText"])]
-	text = text.replace("many people who've spoken to Hermaeus Mora.","many people who've spoken to Hermaeus Mora.\n\nSYSTEM: End")
-	text = text.replace("         You both agree to this?","Arngeir: You both agree to this?")
-	
-	text = text.replace("        So who was it? Who had the contract?", "Astrid: ? \n        So who was it? Who had the contract?")
-
-	text = text.replace("          A dragon destroyed Helgen. Gerdur/Alvor is afraid Riverwood is next.²\n          ¯¯¯¯¯¯¯¯¯¯¯¯¯¯¯¯¯¯¯¯¯¯¯¯¯¯¯¯¯¯¯¯¯¯¯¯¯¯¯¯¯¯¯¯¯¯¯¯¯¯¯¯¯¯¯¯¯¯¯¯¯¯¯¯¯¯¯¯¯",
-						"Dragonborn: A dragon destroyed Helgen. Gerdur/Alvor is afraid Riverwood is next.\n\n")
-	text = text.replace("          Not prone to flights of fancy...","Balgruuf: Not prone to flights of fancy...")
-	text = text.replace("          What do you say now, Proventus?", "Balgruuf: What do you say now, Proventus?",)
-	text = text.replace("          Yes. I had a great view while", "Balgruuf: ? \n\n          Yes. I had a great view while")
-	text = text.replace("   wait on your word.","wait on your word.\n\nBalgruuf: ? \n\n")
-	text = text.replace("No thanks to you.","No thanks to you.\n\nAela: ? \n\n")
-	text = text.replace("So why take chances...","So why take chances...\n\nAstrid: ? \n\n")
-	text = text.replace("What kind of business?","What kind of business?\n\nDelvin: ? \n\n")
-	text = text.replace('You know, because of your use of...','You know, because of your use of...\n\nGianna: ? \n\n')
-	text = text.replace("sending you to Windhelm. Deliver this axe to Ulfric Stormcloak.","sending you to Windhelm. Deliver this axe to Ulfric Stormcloak.\n\nBalgruuf: ? \n\n")
-	text = text.replace("protector in an effort to hunt me down.","protector in an effort to hunt me down.\n\nValerica: ? \n\n")
-	text = text.replace("   to be destroyed.", "   to be destroyed.\n\nValerica: ? \n\n")
-	text = text.replace("he'll keep chasing us for the rest of our lives.", "he'll keep chasing us for the rest of our lives.\n\nSerana: ? \n\n")
-	text = text.replace("        • your ambition outgrew your loyalty.","Harkon: • your ambition outgrew your loyalty.")
-	text = text.replace("        Of course, if you've got any more adventures planned...", "Serana: Of course, if you've got any more adventures planned...")
-	text = text.replace("               This is Apocrypha, where all knowledge is hoarded.","Hermaeus Mora: This is Apocrypha, where all knowledge is hoarded.")
-	text = text.replace("               • Perhaps you will prove clever enough","Hermaeus Mora: • Perhaps you will prove clever enough")
-	text = text.replace("        • your ambition outgrew your loyalty.","Harkon: • your ambition outgrew your loyalty.")
-	text = text.replace("she'd return with hatred in her heart.","she'd return with hatred in her heart.\n\nHarkon: ?\n\n")
-	text = text.replace("Your kind is a blight on this world.","Your kind is a blight on this world.\n\nDragonborn: ? \n\n")
-	text = text.replace("Is Valerica next? Is Serana?","Is Valerica next? Is Serana?\n\nHarkon: ? \n\n")
-	text = text.replace("will call you back. It is your fate.", "will call you back. It is your fate.\n\nHermaeus Mora: ? \n\n")
-	text = text.replace("to my realm, as I knew it would.", "to my realm, as I knew it would.\n\nHermaeus Mora: ? \n\n")
-
-	text = text.replace("          • Off to Bleak Falls Barrow with you.","[!]\n\nFarengar: • Off to Bleak Falls Barrow with you.")
-	text = text.replace("\n           • Ask around the Ragged Flagon", "           • Ask around the Ragged Flagon")
-
-	text = text.replace("           • You want me to let a dragon into the heart of the city","Balgruuf: • You want me to let a dragon into the heart of the city")
-
-	text = text.replace("         hard-fought.","         hard-fought.\n\nAela: ? \n\n")
-
-	text = text.replace("Ha! Not bloody\n          likely.","Ha! Not bloody likely.")
+	# Fixes for the source are in sourcePatches.json in the game folder
+	text = sourcePatches.patchSource(text,fileName,parameters)
 
 	# join "•" options into single lines.
 	# But need a re-joiner after?
@@ -170,8 +144,6 @@ def parseFile(fileName,parameters={},asJSON=False):
 # 		xx += line + "\n"
 	#text = xx
 
-
-	open("../data/ElderScrolls/Skyrim/raw/tmp.txt",'w').write(text)
 	
 	lines = text.split("\n")
 	
@@ -1,23 +1,25 @@
 import yaml,re
+from parsers import rawStore
+from parsers import textPipeline
 
 def readYAML(fileName):
-	o = open(fileName)
+	o = rawStore.openRaw(fileName)
 	d = o.read()
 	o.close()
 	txt = yaml.safe_load(d)
 	return(txt)
 	
-def cleanStardewDialogue(txt):
-	txt = txt.replace("#"," ")
-	txt = txt.replace('"'," ")
-	txt = txt.replace('%fork'," ")
-	txt = txt.replace('%'," ")
-	txt = txt.replace('\.\.\.'," ... ")
-	txt = txt.replace('<'," ")
-	txt = txt.replace('>'," ")
-	txt = re.sub("\$[a-z0-9][0-9]?"," ",txt)
-	txt = re.sub(" +"," ",txt)
-	return(txt.strip())
+cleanStardewDialogue = textPipeline.TextPipeline([
+	("replace", "#", " "),
+	("replace", '"', " "),
+	("replace", '%fork', " "),
+	("replace", '%', " "),
+	("replace", r'\.\.\.', " ... "),
+	("replace", '<', " "),
+	("replace", '>', " "),
+	("sub", r"\$[a-z0-9][0-9]?", " "),
+	("sub", " +", " "),
+	("strip",)])
 	
 def parseDialogue(txt,fileName,parameters):
 	characterName = fileName[fileName.rindex("/")+1:fileName.rindex(".yaml")]
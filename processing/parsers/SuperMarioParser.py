@@ -1,4 +1,6 @@
 from bs4 import BeautifulSoup
+from parsers import parserBackend
+from parsers import rawContent
 import json,re
 
 
@@ -19,8 +21,8 @@ def parseFile(fileName,parameters={},asJSON=False):
 			txt = txt.replace(title,"")
 		return(txt.strip())
 	
-	html_= open(fileName,'r', encoding = 'utf8')
-	soup = BeautifulSoup( html_, "html.parser")
+	html_ = rawContent.loadContent(fileName,parameters)
+	soup = parserBackend.makeSoup(html_, parameters, "html.parser")
 	text = soup.find("div", {"id": parameters["textDivId"]})
 	text = text.get_text()
 	text = text[text.index(parameters["startText"]):text.index(parameters["endText"])]
@@ -1,4 +1,6 @@
 from bs4 import BeautifulSoup, NavigableString, Tag
+from parsers import rawStore
+from parsers import parserBackend
 import json, re, csv
 import bs4
 from urllib.request import urlopen
@@ -11,8 +13,8 @@ def parseFile(fileName,parameters={},asJSON=False):
 	global versperiaSeenURLS
 
 	print(fileName)
-	html = open(fileName, 'r')
-	soup = BeautifulSoup(html, 'html5lib')
+	html = rawStore.openRaw(fileName, 'r')
+	soup = parserBackend.makeSoup(html, parameters, 'html5lib')
 	
 	scenario = soup.find("span",["scenario-selected"],recursive=True)
 	if scenario is None:
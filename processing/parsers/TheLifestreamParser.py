@@ -2,6 +2,8 @@
 # -*- coding: utf-8 -*-
 
 from bs4 import BeautifulSoup
+from parsers import rawStore
+from parsers import parserBackend
 import json, re
 
 
@@ -163,7 +165,7 @@ def parseFile(fileName,parameters={},asJSON=False):
 	#			[{"Cloud": "Buy one "}]
 	#       ]},
 
-	o = open(fileName)
+	o = rawStore.openRaw(fileName)
 	d = o.read()
 	o.close()
 
@@ -176,7 +178,7 @@ def parseFile(fileName,parameters={},asJSON=False):
 	#d = d.replace('he was right:','he was right-')
 	d = d.replace("Date of Publication:","Date of Publication-")
 
-	script = BeautifulSoup(d, 'html.parser')
+	script = parserBackend.makeSoup(d, parameters, 'html.parser')
 	script = script.find("div",{"class":"article-content"})
 	
 	out = []
@@ -1,18 +1,20 @@
 from bs4 import BeautifulSoup
+from parsers import rawStore
+from parsers import parserBackend
 import json,re
 
 # Intended for FFXIII
 
 def parseFile(fileName,parameters={},asJSON=False):
 
-	o = open(fileName)
+	o = rawStore.openRaw(fileName)
 	d = o.read()
 	o.close()
 
 	# Battle lines
 	d1 = d[d.index(parameters["scriptStartCue"]):d.index(parameters["scriptMidCue"])]
 	
-	battle = BeautifulSoup(d1, 'html.parser')
+	battle = parserBackend.makeSoup(d1, parameters, 'html.parser')
 	
 	battleLines = battle.find_all([parameters["lineNode"],"h2"])
 	battleLines = [x for x in battleLines if len(x.find_all("li"))==0]
@@ -42,7 +44,7 @@ def parseFile(fileName,parameters={},asJSON=False):
 	# Ordinary dialogue
 	d2 = d[d.index(parameters["scriptMidCue"]):d.index(parameters["scriptEndCue"])]
 
-	script = BeautifulSoup(d2, 'html.parser')
+	script = parserBackend.makeSoup(d2, parameters, 'html.parser')
 	
 	out = []
 
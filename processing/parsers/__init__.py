@@ -1,53 +1,81 @@
-from parsers import FFQParser, fandomParser, WikiquoteParser, GamerescapeParser, TheLifestreamParser, KQ1Parser, KQ5Parser, KQ7Parser, DragonAgeParser, KQCParser, StardewValleyParser, ChronoTriggerParser
-from parsers import SuperMarioParser
-from parsers import SkyrimParser
-from parsers import fandomParser2
-from parsers import SimpleMovieScriptParser
-from parsers import OblivionParser
-from parsers import ElderScrollsWikiParser
-from parsers import KQ6Parser
-from parsers import FF1Parser
-from parsers import DaggerfallParser3
-from parsers import FF10Parser,  FF10ParserB, FF10_2Parser
-from parsers import MassEffectAParser
-from parsers import MassEffect3Parser
-from parsers import MassEffect3GibbedParser
-from parsers import MassEffect3ExplorerParser
-from parsers import MonkeyIslandParser
-from parsers import MonkeyIsland2Parser
-from parsers import MonkeyIsland3Parser
-from parsers import FFVIIParser
-from parsers import FF2Parser
-from parsers import FF3Parser
-from parsers import FF4Parser
-from parsers import FF12Parser
-from parsers import KQ3Parser
-from parsers import KQ4Parser
-from parsers import KQ5ParserNES
-from parsers import HorizonZeroDawnParser
-from parsers import HorizonForbiddenWestParser
-from parsers import FF3TranslationParser
-from parsers import FFXIII2Parser
-from parsers import FFVII_RemakeParser
-from parsers import Persona3Parser
-from parsers import Persona4Parser
-from parsers import Persona5BParser
-from parsers import FF8Parser
-from parsers import KOTORParser
-from parsers import FF9Parser
-from parsers import FF9BParser
-from parsers import DragonAgeOriginsParser
-from parsers import FFXIIILRParser
-from parsers import DragonAgeOriginsGameDataParser
-from parsers import DragonAge2Parser
-from parsers import KingdomHeartsParser
-from parsers import TalesOfVesperiaParser
-from parsers import KingdomHearts3DParser
-from parsers import HadesParser2
-from parsers import DiscoElysiumParser
-from parsers import jsonCopier
-from parsers import YackParser
-from parsers import RogueStateParser
-from parsers import DragonAgeInqParser
-from parsers import BG3Parser
-from parsers import DeathStrandingParser
\ No newline at end of file
+# Registry of parsers, by the name used for "parser" in the parserParameters.
+#  Parser modules are only imported when they are first used
+#  (e.g. parsers.SkyrimParser, or parsers.getParser("SkyrimParser")),
+#  so scripts that parse one game don't pay for importing every parser
+#  and its dependencies. See benchmarkParserImports.py.
+#  When creating a parser, add its name to this list.
+
+import importlib
+
+parserNames = ["FFQParser", "fandomParser", "WikiquoteParser", "GamerescapeParser", "TheLifestreamParser",
+	"KQ1Parser", "KQ5Parser", "KQ7Parser", "DragonAgeParser", "KQCParser", "StardewValleyParser", "ChronoTriggerParser",
+	"SuperMarioParser",
+	"SkyrimParser",
+	"fandomParser2",
+	"SimpleMovieScriptParser",
+	"OblivionParser",
+	"ElderScrollsWikiParser",
+	"KQ6Parser",
+	"FF1Parser",
+	"DaggerfallParser3",
+	"FF10Parser", "FF10ParserB", "FF10_2Parser",
+	"MassEffectAParser",
+	"MassEffect3Parser",
+	"MassEffect3GibbedParser",
+	"MassEffect3ExplorerParser",
+	"MonkeyIslandParser",
+	"MonkeyIsland2Parser",
+	"MonkeyIsland3Parser",
+	"FFVIIParser",
+	"FF2Parser",
+	"FF3Parser",
+	"FF4Parser",
+	"FF12Parser",
+	"KQ3Parser",
+	"KQ4Parser",
+	"KQ5ParserNES",
+	"HorizonZeroDawnParser",
+	"HorizonForbiddenWestParser",
+	"FF3TranslationParser",
+	"FFXIII2Parser",
+	"FFVII_RemakeParser",
+	"Persona3Parser",
+	"Persona4Parser",
+	"Persona5BParser",
+	"FF8Parser",
+	"KOTORParser",
+	"FF9Parser",
+	"FF9BParser",
+	"DragonAgeOriginsParser",
+	"FFXIIILRParser",
+	"DragonAgeOriginsGameDataParser",
+	"DragonAge2Parser",
+	"KingdomHeartsParser",
+	"TalesOfVesperiaParser",
+	"KingdomHearts3DParser",
+	"HadesParser2",
+	"DiscoElysiumParser",
+	"jsonCopier",
+	"YackParser",
+	"RogueStateParser",
+	"DragonAgeInqParser",
+	"BG3Parser",
+	"DeathStrandingParser"]
+
+__all__ = list(parserNames)
+
+def getParser(name):
+	""" Return the parser module for a parser name, importing it if needed. """
+	if not name in parserNames:
+		raise ValueError("Unknown parser: "+str(name))
+	module = importlib.import_module(__name__+"."+name)
+	globals()[name] = module
+	return(module)
+
+def __getattr__(name):
+	if name in parserNames:
+		return(getParser(name))
+	raise AttributeError("module '"+__name__+"' has no attribute '"+name+"'")
+
+def __dir__():
+	return(sorted(list(globals().keys()) + parserNames))
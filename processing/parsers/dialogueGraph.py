@@ -0,0 +1,262 @@
+# Dialogue graph used by parsers whose sources are node/link structures
+#  (KOTOR, Disco Elysium, Dragon Age Inquisition, Mass Effect, BG3).
+# Nodes are given integer IDs as they are added, and children are kept
+#  in adjacency lists. walk() converts the graph from a start node to
+#  the nested VGDC format: a node with one child continues the current
+#  list, a node with several children adds a CHOICE, and nodes that
+#  have already been visited become a GOTO.
+# walkMerged() instead finds where the branches of a CHOICE join again
+#  (their post-dominator), and writes the shared lines once after the CHOICE.
+# The walks use an explicit stack, so long conversations don't hit
+#  the recursion limit.
+
+class DialogueGraph:
+	def __init__(self):
+		self.index = {}         # key -> node ID
+		self.keys = []          # node ID -> key
+		self.gotoLabels = []    # node ID -> value used in {"GOTO": x}
+		self.isExternal = []    # node ID -> True if the node is just a GOTO to somewhere outside the graph
+		self.alwaysChoice = []  # node ID -> True if children should be a CHOICE even if there's only one
+		self.children = []      # node ID -> list of child node IDs
+		self.edgeLines = []     # node ID -> list of lines to add before each child
+		self.ipdom = None       # node ID -> immediate post-dominator (see postDominators)
+
+	def nodeID(self,key):
+		# Return the ID for a key, adding a node if needed
+		#  (so links can be added before the node they point to)
+		if key in self.index:
+			return(self.index[key])
+		nid = len(self.keys)
+		self.ipdom = None
+		self.index[key] = nid
+		self.keys.append(key)
+		self.gotoLabels.append(key)
+		self.isExternal.append(False)
+		self.alwaysChoice.append(False)
+		self.children.append([])
+		self.edgeLines.append([])
+		return(nid)
+
+	def addNode(self,key,gotoLabel=None,alwaysChoice=False):
+		nid = self.nodeID(key)
+		if not gotoLabel is None:
+			self.gotoLabels[nid] = gotoLabel
+		self.alwaysChoice[nid] = alwaysChoice
+		return(nid)
+
+	def addEdge(self,fromKey,toKey,edgeLines=None):
+		fid = self.nodeID(fromKey)
+		self.children[fid].append(self.nodeID(toKey))
+		self.ipdom = None
+		self.edgeLines[fid].append([] if edgeLines is None else edgeLines)
+
+	def addGoto(self,fromKey,gotoLabel,edgeLines=None):
+		# Link to a node that is not walked (e.g. in another conversation)
+		nid = self.nodeID(("GOTO",gotoLabel))
+		self.gotoLabels[nid] = gotoLabel
+		self.isExternal[nid] = True
+		fid = self.nodeID(fromKey)
+		self.children[fid].append(nid)
+		self.ipdom = None
+		self.edgeLines[fid].append([] if edgeLines is None else edgeLines)
+
+	def has(self,key):
+		return(key in self.index)
+
+	def childKeys(self,key):
+		return([self.keys[cid] for cid in self.children[self.index[key]]])
+
+	def combine(self,nid,lines,branches,dropEmptyBranches,keepEmpty=None):
+		# keepEmpty[i] is True if branch i should be kept even if it's
+		#  empty (an option that goes straight to where the branches merge)
+		if dropEmptyBranches:
+			if keepEmpty is None:
+				keepEmpty = [False]*len(branches)
+			branches = [x for x,keep in zip(branches,keepEmpty) if len(x)>0 or keep]
+		if len(branches)==0:
+			return(lines)
+		if len(branches)==1 and not self.alwaysChoice[nid]:
+			return(lines + branches[0])
+		return(lines + [{"CHOICE": branches}])
+
+	def walk(self,startKey,render,visited=None,dropEmptyBranches=False):
+		# render(key) returns the list of lines for a node, and is
+		#  called in the same order as a recursive depth-first walk.
+		# visited is a set of node IDs, which can be shared between walks.
+		#  If it is None, shared nodes are written out again for each path
+		#  (only loops back to a node on the current path become GOTOs).
+		trackVisits = not visited is None
+		onPath = set()
+
+		def enter(nid):
+			# Returns lines if the node doesn't need expanding, otherwise None
+			if self.isExternal[nid]:
+				return([{"GOTO": self.gotoLabels[nid]}])
+			if trackVisits:
+				if nid in visited:
+					return([{"GOTO": self.gotoLabels[nid]}])
+				visited.add(nid)
+			elif nid in onPath:
+				return([{"GOTO": self.gotoLabels[nid]}])
+			onPath.add(nid)
+			return(None)
+
+		def newFrame(nid):
+			# Nodes with a single child are followed within the same frame,
+			#  adding to its lines in place, so long chains aren't copied
+			#  again at every step. The frame ends at a node with no children
+			#  or a choice, or at a node that doesn't need expanding.
+			frame = [nid, list(render(self.keys[nid])), 0, [], [nid]]
+			while len(self.children[nid])==1 and not self.alwaysChoice[nid]:
+				frame[1] += self.edgeLines[nid][0]
+				cid = self.children[nid][0]
+				done = enter(cid)
+				if not done is None:
+					frame[1] += done
+					frame[2] = 1
+					break
+				frame[1] += render(self.keys[cid])
+				frame[4].append(cid)
+				frame[0] = nid = cid
+			return(frame)
+
+		startID = self.nodeID(startKey)
+		done = enter(startID)
+		if not done is None:
+			return(done)
+		# Each frame is [last node ID, lines, next child position, finished branches, node IDs in the frame]
+		stack = [newFrame(startID)]
+		while True:
+			frame = stack[-1]
+			nid = frame[0]
+			if frame[2] < len(self.children[nid]):
+				pos = frame[2]
+				frame[2] += 1
+				cid = self.children[nid][pos]
+				done = enter(cid)
+				if done is None:
+					stack.append(newFrame(cid))
+				else:
+					frame[3].append(self.edgeLines[nid][pos] + done)
+			else:
+				stack.pop()
+				onPath.difference_update(frame[4])
+				out = self.combine(nid,frame[1],frame[3],dropEmptyBranches)
+				if len(stack)==0:
+					return(out)
+				parent = stack[-1]
+				parent[3].append(self.edgeLines[parent[0]][parent[2]-1] + out)
+
+	def postDominators(self):
+		# Immediate post-dominator of each node: the first node that every
+		#  path from the node passes through on the way to an end of the
+		#  conversation (i.e. where the branches of a CHOICE merge again).
+		#  None if the paths only meet at the end.
+		# Uses the iterative algorithm of Cooper, Harvey & Kennedy on the
+		#  reversed graph, with a virtual exit node joined to every end node.
+		n = len(self.keys)
+		exitID = n
+		parents = [[] for _ in range(n)]
+		ends = []
+		for nid in range(n):
+			if len(self.children[nid])==0:
+				ends.append(nid)
+			for cid in set(self.children[nid]):
+				parents[cid].append(nid)
+		# Postorder of the reversed graph, starting from the exit
+		order = [-1]*(n+1)
+		postorder = []
+		seen = set([exitID])
+		stack = [(exitID,iter(ends))]
+		while len(stack)>0:
+			nid,it = stack[-1]
+			for pid in it:
+				if not pid in seen:
+					seen.add(pid)
+					stack.append((pid,iter(parents[pid])))
+					break
+			else:
+				stack.pop()
+				order[nid] = len(postorder)
+				postorder.append(nid)
+		idom = [None]*(n+1)
+		idom[exitID] = exitID
+	
+		def intersect(a,b):
+			while a!=b:
+				while order[a]<order[b]:
+					a = idom[a]
+				while order[b]<order[a]:
+					b = idom[b]
+			return(a)
+	
+		changed = True
+		while changed:
+			changed = False
+			for nid in reversed(postorder[:-1]):
+				succs = self.children[nid] if len(self.children[nid])>0 else [exitID]
+				newIdom = None
+				for sid in succs:
+					if idom[sid] is None:
+						continue
+					newIdom = sid if newIdom is None else intersect(sid,newIdom)
+				if idom[nid]!=newIdom:
+					idom[nid] = newIdom
+					changed = True
+		return([None if x==exitID else x for x in idom[:n]])
+
+	def walkMerged(self,startKey,render,visited=None,dropEmptyBranches=False):
+		# Like walk(), but the branches of a CHOICE stop where they merge
+		#  again, and the shared part is written once after the CHOICE.
+		#  Any other line that is reached more than once becomes a GOTO,
+		#  so each node is written out once at most.
+		# An option that goes straight to the merge node is an empty branch,
+		#  but it is kept even with dropEmptyBranches (the shared lines
+		#  after it are optional), unlike empty branches that just end.
+		if visited is None:
+			visited = set()
+		startID = self.nodeID(startKey)
+		if self.ipdom is None:
+			self.ipdom = self.postDominators()
+		# Each frame is [next node ID, node ID to stop at, lines, current choice]
+		#  where the choice is [node ID, next child position, finished branches,
+		#  merge node ID, whether each branch reached the merge node]
+		stack = [[startID, None, [], None]]
+		while True:
+			frame = stack[-1]
+			choice = frame[3]
+			if not choice is None:
+				nid = choice[0]
+				if choice[1] < len(self.children[nid]):
+					cid = self.children[nid][choice[1]]
+					choice[1] += 1
+					stack.append([cid, choice[3], [], None])
+				else:
+					frame[2] = self.combine(nid,frame[2],choice[2],dropEmptyBranches,choice[4])
+					frame[0] = choice[3]
+					frame[3] = None
+				continue
+			nid = frame[0]
+			if nid is None or nid==frame[1]:
+				stack.pop()
+				if len(stack)==0:
+					return(frame[2])
+				parent = stack[-1][3]
+				parent[2].append(self.edgeLines[parent[0]][parent[1]-1] + frame[2])
+				parent[4].append(not nid is None and nid==frame[1])
+				continue
+			if self.isExternal[nid] or nid in visited:
+				frame[2] += [{"GOTO": self.gotoLabels[nid]}]
+				frame[0] = None
+				continue
+			visited.add(nid)
+			frame[2] += render(self.keys[nid])
+			children = self.children[nid]
+			if len(children)==0:
+				frame[0] = None
+			elif len(children)==1 and not self.alwaysChoice[nid]:
+				frame[2] += self.edgeLines[nid][0]
+				frame[0] = children[0]
+			else:
+				merge = self.ipdom[nid] if len(set(children))>1 else None
+				frame[3] = [nid, 0, [], merge, []]
@@ -1,4 +1,6 @@
 from bs4 import BeautifulSoup
+from parsers import rawStore
+from parsers import parserBackend
 import json, re
 # TODO: This site https://finalfantasy.fandom.com/wiki/Final_Fantasy_VII_Remake_script
 # has lines like "(Upon talk to X ...)", which suggest optionality.
@@ -43,11 +45,11 @@ def parseFile(fileName,parameters={},asJSON=False):
 	#			[{"Cloud": "Buy one "}]
 	#       ]},
 
-	o = open(fileName)
+	o = rawStore.openRaw(fileName)
 	d = o.read()
 	o.close()
 	
-	all = BeautifulSoup(d,'html.parser')
+	all = parserBackend.makeSoup(d, parameters, 'html.parser')
 	toctext = [x.getText() for x in all.find_all("span",{"class":"toctext"})]
 	tocnumber = [x.getText() for x in all.find_all("span",{"class":"tocnumber"})]
 	
@@ -57,7 +59,7 @@ def parseFile(fileName,parameters={},asJSON=False):
 	
 	d = d[d.index(parameters["scriptStartCue"]):d.index(parameters["scriptEndCue"])]
 
-	script = BeautifulSoup(d, 'html.parser')
+	script = parserBackend.makeSoup(d, parameters, 'html.parser')
 	
 	sectionDialogue = {}
 	out = []
@@ -1,4 +1,6 @@
 from bs4 import BeautifulSoup
+from parsers import rawStore
+from parsers import parserBackend
 import json, re
 
 
@@ -46,7 +48,7 @@ def lineParser(line,param):
 def parseFile(fileName,parameters={},asJSON=False):
 
 
-	o = open(fileName)
+	o = rawStore.openRaw(fileName)
 	d = o.read()
 	o.close()
 	
@@ -54,7 +56,7 @@ def parseFile(fileName,parameters={},asJSON=False):
 	d = d[d.index(parameters["scriptStartCue"]):d.index(parameters["scriptEndCue"])]
 
 	
-	script = BeautifulSoup(d, 'html.parser')
+	script = parserBackend.makeSoup(d, parameters, 'html.parser')
 	
 	out = []
 
@@ -1,9 +1,10 @@
 import json
+from parsers import rawStore
 
 
 def parseFile(fileName,parameters={},asJSON=False):
 		
-	jx = json.loads(open(fileName).read())
+	jx = json.loads(rawStore.openRaw(fileName).read())
 	out = jx["text"]
 
 	if asJSON:
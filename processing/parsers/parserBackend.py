@@ -0,0 +1,22 @@
+from bs4 import BeautifulSoup
+
+# Choose the BeautifulSoup tree builder for a game.
+#  Each parser passes the backend it was written against as the default,
+#  and this can be overridden per game with "htmlBackend" in the
+#  meta.json parserParameters, e.g.
+#    "htmlBackend": "lxml"
+#  Use compareParserBackends.py to check that a game's output is
+#  unchanged before switching its backend.
+
+backends = ["lxml", "html5lib", "html.parser"]
+
+def getBackend(parameters,default="html.parser"):
+	backend = default
+	if "htmlBackend" in parameters:
+		backend = parameters["htmlBackend"]
+	if not backend in backends:
+		raise ValueError("Unknown htmlBackend '"+backend+"', should be one of "+", ".join(backends))
+	return(backend)
+
+def makeSoup(markup,parameters={},default="html.parser"):
+	return(BeautifulSoup(markup, getBackend(parameters,default)))
@@ -0,0 +1,66 @@
+import os, gzip
+from parsers import rawStore
+
+# Many sources are long GameFAQs-style pages where the script is in a single
+#  div (given by "textDivId" in the parserParameters). Rather than parsing
+#  the whole page every time, pull out the content div once with a streaming
+#  lxml parser and store it beside the raw page as a compressed file.
+#  Parsers then load the (much smaller) content file.
+
+contentSuffix = ".content.gz"
+
+def contentFileName(fileName):
+	return(fileName + contentSuffix)
+
+def extractContent(fileName,divId):
+	from lxml import etree
+	found = None
+	inTarget = False
+	with rawStore.openRaw(fileName,'rb') as html_:
+		# (the raw pages are utf8, as when they were read with open(..., encoding='utf8'))
+		for event,el in etree.iterparse(html_, events=("start","end"), html=True, huge_tree=True, encoding="utf-8"):
+			if event=="start":
+				if el.tag=="div" and el.get("id")==divId:
+					inTarget = True
+			elif inTarget:
+				if el.tag=="div" and el.get("id")==divId:
+					found = etree.tostring(el, method="html", encoding="unicode", with_tail=False)
+					break
+			else:
+				# Discard anything outside the content div as we go
+				el.clear()
+	if found is None:
+		raise ValueError("Could not find div with id '"+divId+"' in "+fileName)
+	# Normalise line endings
+	found = found.replace("\r\n","\n").replace("\r","\n")
+	return(found)
+
+def writeContent(fileName,divId):
+	content = extractContent(fileName,divId)
+	if not os.path.isdir(os.path.dirname(contentFileName(fileName))):
+		# The raw file is only in a raw store, so there's nowhere to keep the content file
+		return(content)
+	with gzip.open(contentFileName(fileName),'wt', encoding = 'utf8') as o:
+		o.write(content)
+	return(content)
+
+def isContentFresh(fileName,divId):
+	cFile = contentFileName(fileName)
+	if not os.path.exists(cFile):
+		return(False)
+	rawTime = rawStore.rawModifiedTime(fileName)
+	if not rawTime is None and rawTime > os.path.getmtime(cFile):
+		return(False)
+	# Check the content file was made for the same div
+	with gzip.open(cFile,'rt', encoding = 'utf8') as f:
+		start = f.read(500)
+	return(start.startswith("<div") and start[:start.find(">")].count('id="'+divId+'"')>0)
+
+def loadContent(fileName,parameters):
+	""" Return the html of the content div of a raw page,
+		using the stored content file if it is up to date. """
+	divId = parameters["textDivId"]
+	if isContentFresh(fileName,divId):
+		with gzip.open(contentFileName(fileName),'rt', encoding = 'utf8') as f:
+			return(f.read())
+	return(writeContent(fileName,divId))
@@ -0,0 +1,256 @@
+import os, io, json, hashlib, threading
+
+# Optional compressed store for a game's raw files.
+#  Instead of many loose files in raw/, the game folder has:
+#  - raw.store: each distinct file content compressed on its own
+#    (zstd frames, or zlib if the zstandard module isn't installed),
+#    one after the other
+#  - raw.manifest.jsonl: a header line, then one line for each blob
+#    {"blob": sha256 of the content, "offset": ..., "length": ..., "size": ...}
+#    and for each file
+#    {"file": name within raw/, "blob": sha256}
+#    (later lines for a file replace earlier ones)
+#  Identical files are stored once, and any file can be read without
+#  decompressing the rest of the store. The manifest is only appended to,
+#  so an interrupted scraper doesn't lose what it has already saved.
+#
+# Parsers open raw files with openRaw(fileName), which reads the file
+#  from disk if it's there, and otherwise from the game's store.
+#  Scrapers save files with saveRaw("raw/page01.html", html), which writes
+#  to the store if the game has one, and otherwise to raw/ as before.
+#  Files in subfolders of raw/ are listed with walkRaw(folder).
+#  Use packRawStore.py to move a game's raw/ folder into a store (and back).
+
+storeFile = "raw.store"
+manifestFile = "raw.manifest.jsonl"
+storeVersion = 1
+
+try:
+	import zstandard
+except ImportError:
+	zstandard = None
+
+def defaultCompression():
+	if zstandard is None:
+		return("zlib")
+	return("zstd")
+
+def compressBytes(data,compression):
+	if compression=="zstd":
+		if zstandard is None:
+			raise ImportError("The zstandard module is needed for zstd raw stores: pip install zstandard")
+		return(zstandard.ZstdCompressor(level=19).compress(data))
+	if compression=="zlib":
+		import zlib
+		return(zlib.compress(data,9))
+	raise ValueError("Unknown raw store compression: "+str(compression))
+
+def decompressBytes(data,compression):
+	if compression=="zstd":
+		if zstandard is None:
+			raise ImportError("The zstandard module is needed for zstd raw stores: pip install zstandard")
+		return(zstandard.ZstdDecompressor().decompress(data))
+	if compression=="zlib":
+		import zlib
+		return(zlib.decompress(data))
+	raise ValueError("Unknown raw store compression: "+str(compression))
+
+class RawStore:
+	def __init__(self,gameFolder,create=False,compression=None):
+		self.gameFolder = gameFolder
+		self.storePath = os.path.join(gameFolder,storeFile)
+		self.manifestPath = os.path.join(gameFolder,manifestFile)
+		self.files = {}
+		self.blobs = {}
+		self.lock = threading.Lock()
+		self.partialLine = False
+		if os.path.isfile(self.manifestPath):
+			self.readManifest()
+		elif create:
+			self.compression = compression or defaultCompression()
+			with open(self.manifestPath,'w', encoding = 'utf8') as o:
+				o.write(json.dumps({"rawStore": storeVersion, "compression": self.compression})+"\n")
+			open(self.storePath,'ab').close()
+		else:
+			raise FileNotFoundError("No raw store in "+gameFolder)
+
+	def readManifest(self):
+		with open(self.manifestPath, encoding = 'utf8') as f:
+			header = json.loads(f.readline())
+			if header.get("rawStore")!=storeVersion:
+				raise ValueError("Unknown raw store version in "+self.manifestPath)
+			self.compression = header["compression"]
+			storeSize = os.path.getsize(self.storePath)
+			for line in f:
+				self.partialLine = not line.endswith("\n")
+				if len(line.strip())==0:
+					continue
+				try:
+					entry = json.loads(line)
+				except ValueError:
+					# A line cut short by an interrupted write
+					continue
+				if "file" in entry:
+					if entry["blob"] is None:
+						self.files.pop(entry["file"],None)
+					elif entry["blob"] in self.blobs:
+						self.files[entry["file"]] = entry["blob"]
+				elif entry["offset"]+entry["length"] <= storeSize:
+					self.blobs[entry["blob"]] = (entry["offset"],entry["length"],entry["size"])
+
+	def names(self):
+		return(sorted(self.files.keys()))
+
+	def __contains__(self,name):
+		return(name in self.files)
+
+	def size(self,name):
+		return(self.blobs[self.files[name]][2])
+
+	def read(self,name):
+		""" Return the contents of a file in the store, as bytes. """
+		if not name in self.files:
+			raise FileNotFoundError("No file '"+name+"' in raw store "+self.storePath)
+		offset,length,size = self.blobs[self.files[name]]
+		with open(self.storePath,'rb') as f:
+			f.seek(offset)
+			return(decompressBytes(f.read(length),self.compression))
+
+	def write(self,name,data):
+		""" Add a file to the store (bytes, or str which is stored as utf8). """
+		if isinstance(data,str):
+			data = data.encode("utf8")
+		blob = hashlib.sha256(data).hexdigest()
+		with self.lock:
+			lines = []
+			if not blob in self.blobs:
+				compressed = compressBytes(data,self.compression)
+				with open(self.storePath,'ab') as o:
+					offset = o.seek(0,os.SEEK_END)
+					o.write(compressed)
+				self.blobs[blob] = (offset,len(compressed),len(data))
+				lines.append({"blob": blob, "offset": offset, "length": len(compressed), "size": len(data)})
+			if self.files.get(name)!=blob:
+				self.files[name] = blob
+				lines.append({"file": name, "blob": blob})
+			if len(lines)>0:
+				self.appendToManifest(lines)
+
+	def remove(self,name):
+		with self.lock:
+			if name in self.files:
+				del self.files[name]
+				self.appendToManifest([{"file": name, "blob": None}])
+
+	def appendToManifest(self,entries):
+		with open(self.manifestPath,'a', encoding = 'utf8') as o:
+			if self.partialLine:
+				# Don't carry on from a line cut short by an interrupted write
+				o.write("\n")
+				self.partialLine = False
+			o.write("".join(json.dumps(x,ensure_ascii=False)+"\n" for x in entries))
+
+# Stores are kept open (with their manifests read) by game folder
+openStores = {}
+
+def hasStore(gameFolder):
+	return(os.path.isfile(os.path.join(gameFolder,manifestFile)))
+
+def getStore(gameFolder):
+	""" Return the raw store for a game folder, or None if it doesn't have one. """
+	key = os.path.abspath(gameFolder)
+	if not key in openStores:
+		if not hasStore(key):
+			return(None)
+		openStores[key] = RawStore(key)
+	return(openStores[key])
+
+def splitRawPath(fileName):
+	# [game folder]/raw/[name] -> (game folder, name),
+	#  or (None, None) if the file is not in a raw folder
+	parts = os.path.abspath(fileName).split(os.sep)
+	if not "raw" in parts:
+		return((None,None))
+	i = len(parts)-1-parts[::-1].index("raw")
+	return((os.sep.join(parts[:i]),"/".join(parts[i+1:])))
+
+def storedFile(fileName):
+	# (store, name) for a raw file that is in a store, otherwise (None, None)
+	gameFolder,name = splitRawPath(fileName)
+	if gameFolder is None:
+		return((None,None))
+	store = getStore(gameFolder)
+	if store is None or not name in store:
+		return((None,None))
+	return((store,name))
+
+def openRaw(fileName,mode='r',encoding=None,errors=None,newline=None):
+	""" Open a raw file for reading, from disk if it exists,
+		otherwise from the game's raw store. """
+	if os.path.exists(fileName) or mode.strip("rbt")!="":
+		return(open(fileName,mode,encoding=encoding,errors=errors,newline=newline))
+	store,name = storedFile(fileName)
+	if store is None:
+		# (raises the usual error)
+		return(open(fileName,mode,encoding=encoding,errors=errors,newline=newline))
+	data = io.BytesIO(store.read(name))
+	if "b" in mode:
+		return(data)
+	return(io.TextIOWrapper(data,encoding=encoding,errors=errors,newline=newline))
+
+def rawExists(fileName):
+	if os.path.exists(fileName):
+		return(True)
+	store,name = storedFile(fileName)
+	return(not store is None)
+
+def rawModifiedTime(fileName):
+	# Modification time of a raw file (or of the store it's in), or None if there is no file
+	if os.path.exists(fileName):
+		return(os.path.getmtime(fileName))
+	store,name = storedFile(fileName)
+	if store is None:
+		return(None)
+	return(os.path.getmtime(store.manifestPath))
+
+def listRaw(rawFolder):
+	""" Names of the files in a raw folder, on disk or in the game's store. """
+	names = set()
+	if os.path.isdir(rawFolder):
+		names.update(x for x in os.listdir(rawFolder) if os.path.isfile(os.path.join(rawFolder,x)))
+	store = getStore(os.path.dirname(os.path.normpath(rawFolder)))
+	if not store is None:
+		names.update(x for x in store.names() if not "/" in x)
+	return(sorted(names))
+
+def walkRaw(folder):
+	""" Paths of all files in a folder within raw/ (including subfolders),
+		on disk or in the game's store, like os.walk. """
+	files = [os.path.join(dp, f) for dp, dn, fn in os.walk(folder) for f in fn]
+	gameFolder,prefix = splitRawPath(folder)
+	store = None if gameFolder is None else getStore(gameFolder)
+	if not store is None:
+		prefix = prefix.strip("/")
+		if len(prefix)>0:
+			prefix += "/"
+		onDisk = set(os.path.abspath(x) for x in files)
+		for name in store.names():
+			fileName = os.path.join(folder,name[len(prefix):])
+			if name.startswith(prefix) and not os.path.abspath(fileName) in onDisk:
+				files.append(fileName)
+	return(files)
+
+def saveRaw(fileName,data):
+	""" Save a raw file (str or bytes), to the game's raw store if it
+		has one, otherwise to disk. """
+	gameFolder,name = splitRawPath(fileName)
+	store = None if gameFolder is None else getStore(gameFolder)
+	if store is None:
+		if isinstance(data,str):
+			with open(fileName,'w', encoding = 'utf8') as o:
+				o.write(data)
+		else:
+			with open(fileName,'wb') as o:
+				o.write(data)
+	else:
+		store.write(name,data)
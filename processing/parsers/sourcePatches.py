@@ -0,0 +1,133 @@
+import os, json
+
+# Fixes for errors in the source files (typos, missing speaker names,
+#  badly split lines etc.) are kept as data rather than chains of
+#  str.replace in the parsers. Each game can have a sourcePatches.json
+#  beside its meta.json (or another file given by "sourcePatchFile" in
+#  the parserParameters, or a "sourcePatches" list in the parserParameters
+#  themselves), with a list of patches:
+#  [
+#  	{"find": "I should fin out", "replace": "I should find out"},
+#  	{"find": "Watchman:", "replace": "Matthew Watchman:", "count": 1},
+#  	{"find": "Watchman:", "replace": "Richard Watchman:", "count": 1},
+#  	{"find": "...", "replace": "...", "file": "script.html"}
+#  ]
+#  "count" is the number of occurrences to replace (default: all of them),
+#  later patches with the same "find" take the following occurrences.
+#  "file" limits the patch to one raw file.
+#
+# The patches are applied in one pass over the text: all occurrences are
+#  found in the original text (with str.find, which is faster than a
+#  pure-python Aho-Corasick automaton or a regex alternation of all the
+#  patches for the source sizes here), longer matches win where one patch
+#  is inside another, and the new text is joined together once.
+#  The result is the same as applying the patches one by one, in order,
+#  with str.replace, as long as no patch creates the text of a later
+#  patch (which is checked).
+#
+# If a patch no longer matches (e.g. the source has been re-downloaded
+#  and fixed, or changed), a SourcePatchError is raised, rather than the
+#  fix quietly doing nothing.
+
+defaultPatchFile = "sourcePatches.json"
+
+class SourcePatchError(Exception):
+	pass
+
+def describe(patch):
+	find = patch["find"]
+	if len(find)>60:
+		find = find[:57]+"..."
+	return(json.dumps(find))
+
+def checkPatches(patches):
+	for i,patch in enumerate(patches):
+		for key in ["find","replace"]:
+			if not key in patch:
+				raise SourcePatchError("Source patch "+str(i)+" has no '"+key+"'")
+		if len(patch["find"])==0:
+			raise SourcePatchError("Source patch "+str(i)+" has an empty 'find'")
+		if "count" in patch and (not isinstance(patch["count"],int) or patch["count"]<1):
+			raise SourcePatchError("Source patch "+describe(patch)+" has a bad count: "+str(patch["count"]))
+	for i,patch in enumerate(patches):
+		for later in patches[i+1:]:
+			if later["find"] in patch["replace"]:
+				raise SourcePatchError("Source patch "+describe(patch)+" creates the text of a later patch "+describe(later))
+			if patch["find"]!=later["find"] and patch["find"] in later["find"]:
+				raise SourcePatchError("Source patch "+describe(patch)+" is inside a later patch "+describe(later)+" (put the longer patch first)")
+
+def loadPatches(fileName,parameters={}):
+	""" Return the source patches for a raw file, from the game folder's
+		patch file and the parserParameters. """
+	# Raw files are in [game folder]/raw/
+	gameFolder = os.path.dirname(os.path.dirname(os.path.abspath(fileName)))
+	patchFile = os.path.join(gameFolder, parameters.get("sourcePatchFile", defaultPatchFile))
+	patches = []
+	if os.path.isfile(patchFile):
+		with open(patchFile, encoding = 'utf8') as f:
+			patches = json.load(f)
+	elif "sourcePatchFile" in parameters:
+		raise SourcePatchError("Missing source patch file: "+patchFile)
+	patches += parameters.get("sourcePatches",[])
+	baseName = os.path.basename(fileName)
+	patches = [p for p in patches if p.get("file",baseName)==baseName]
+	checkPatches(patches)
+	return(patches)
+
+def applyPatches(text,patches,source="source"):
+	""" Apply the patches to the text in one pass.
+		Raises SourcePatchError if a patch doesn't match. """
+	if len(patches)==0:
+		return(text)
+	# Patches with the same "find" share its occurrences, in order
+	groups = {}
+	for i,patch in enumerate(patches):
+		if not patch["find"] in groups:
+			groups[patch["find"]] = []
+		groups[patch["find"]].append(i)
+
+	# All (non-overlapping) occurrences of each find string
+	matches = []
+	for find in groups:
+		start = text.find(find)
+		while start>=0:
+			matches.append((start,-len(find),find))
+			start = text.find(find,start+len(find))
+	matches.sort()
+
+	applied = [0]*len(patches)
+	current = dict((find,0) for find in groups)
+	pieces = []
+	pos = 0
+	lastMatch = None
+	for start,negLength,find in matches:
+		end = start-negLength
+		if start<pos:
+			if end>pos:
+				raise SourcePatchError("Source patches "+json.dumps(lastMatch)+" and "+json.dumps(find)+" overlap in "+source)
+			# Inside a longer match
+			continue
+		group = groups[find]
+		# Move on to the next patch for this text once one has used its count
+		while current[find]<len(group) and applied[group[current[find]]]==patches[group[current[find]]].get("count",-1):
+			current[find] += 1
+		if current[find]==len(group):
+			continue
+		i = group[current[find]]
+		applied[i] += 1
+		pieces.append(text[pos:start])
+		pieces.append(patches[i]["replace"])
+		pos = end
+		lastMatch = find
+	pieces.append(text[pos:])
+
+	for i,patch in enumerate(patches):
+		if applied[i]==0:
+			raise SourcePatchError("Source patch "+describe(patch)+" no longer matches "+source)
+		if "count" in patch and applied[i]!=patch["count"]:
+			raise SourcePatchError("Source patch "+describe(patch)+" matched "+str(applied[i])+" times in "+source+" (expected "+str(patch["count"])+")")
+	return("".join(pieces))
+
+def patchSource(text,fileName,parameters={}):
+	""" Apply the source patches for a raw file to its text. """
+	return(applyPatches(text,loadPatches(fileName,parameters),fileName))
@@ -0,0 +1,124 @@
+import sqlite3, hashlib, csv
+from parsers import rawStore
+from lxml import etree
+
+indexSuffix = ".sqlite"
+
+# Persistent index for string tables that come with game data dumps,
+#  which map string IDs to text, e.g.
+#    Dragon Age Inquisition: raw/StringList_en.csv (readStringList)
+#    Dragon Age 2 and Origins: raw/*_en-us.xml talk tables (readTalkTableXML)
+#    Mass Effect: *DialogueDump_*.csv (readDialogueDump)
+# Each source file is decoded once into an SQLite database beside it
+#  (<source file>.sqlite), which is only rebuilt if the file changes.
+#  (These aren't packed into raw stores, see packRawStore.py)
+#  The database is read through a memory map, so lookups don't need
+#  the whole table to be loaded on each run.
+
+def hashFile(fileName):
+	h = hashlib.md5()
+	with rawStore.openRaw(fileName,'rb') as f:
+		for chunk in iter(lambda: f.read(1<<20), b""):
+			h.update(chunk)
+	return(h.hexdigest())
+
+def readStringList(fileName):
+	# "id,text" lines in UTF-16 (little endian, with or without a BOM)
+	with rawStore.openRaw(fileName,'rb') as f:
+		hasBOM = f.read(2) in [b'\xff\xfe', b'\xfe\xff']
+	with rawStore.openRaw(fileName, encoding = 'utf-16' if hasBOM else 'utf-16-le') as f:
+		for line in f:
+			line = line.strip()
+			if len(line)>0:
+				stringID,text = line.split(",",1)
+				yield((stringID,text))
+
+def readTalkTableXML(fileName):
+	# <string id="...">text</string> elements, parsed as html
+	#  (as the parsers did with BeautifulSoup)
+	#  The files are utf8 (they were opened as text before), and finished
+	#  elements are removed as we go so memory use doesn't grow with the file.
+	with rawStore.openRaw(fileName,'rb') as f:
+		for event,el in etree.iterparse(f, events=("end",), tag="string", html=True, encoding="utf-8"):
+			yield((el.attrib["id"],"".join(el.itertext())))
+			el.clear()
+			while not el.getprevious() is None:
+				del el.getparent()[0]
+
+def readDialogueDump(fileName):
+	# csv with "TLK StringRef" and "Line" columns. Empty lines are skipped.
+	with rawStore.openRaw(fileName) as csvfile:
+		reader = csv.reader(csvfile)
+		header = next(reader)
+		idColumn = header.index("TLK StringRef")
+		textColumn = header.index("Line")
+		for row in reader:
+			if len(row[textColumn].strip())>0:
+				yield((row[idColumn],row[textColumn]))
+
+def buildIndex(dbFileName,sourceFileName,readEntries):
+	sourceHash = hashFile(sourceFileName)
+	con = sqlite3.connect(dbFileName)
+	con.execute("CREATE TABLE IF NOT EXISTS strings (id TEXT PRIMARY KEY, text TEXT) WITHOUT ROWID")
+	con.execute("CREATE TABLE IF NOT EXISTS source (sourceHash TEXT)")
+	row = con.execute("SELECT sourceHash FROM source").fetchone()
+	if row is None or row[0]!=sourceHash:
+		print("Building string table index for "+sourceFileName+" ...")
+		with con:
+			con.execute("DELETE FROM strings")
+			# (later entries replace earlier ones with the same id, like a dictionary)
+			con.executemany("INSERT OR REPLACE INTO strings VALUES (?,?)",readEntries(sourceFileName))
+			con.execute("DELETE FROM source")
+			con.execute("INSERT INTO source VALUES (?)",(sourceHash,))
+	con.close()
+
+class StringTable:
+	# Read-only, dictionary-like access to an index.
+	#  The connection is opened on first use, so the table can be
+	#  passed to worker processes.
+	def __init__(self,dbFileName):
+		self.dbFileName = dbFileName
+		self.con = None
+		self.cache = {}
+
+	def __getstate__(self):
+		return({"dbFileName":self.dbFileName})
+
+	def __setstate__(self,state):
+		self.__init__(state["dbFileName"])
+
+	def connect(self):
+		if self.con is None:
+			self.con = sqlite3.connect("file:"+self.dbFileName+"?mode=ro", uri=True)
+			self.con.execute("PRAGMA mmap_size=1073741824")
+		return(self.con)
+
+	def lookup(self,stringID):
+		if not stringID in self.cache:
+			row = self.connect().execute("SELECT text FROM strings WHERE id=?",(stringID,)).fetchone()
+			self.cache[stringID] = None if row is None else row[0]
+		return(self.cache[stringID])
+
+	def get(self,stringID,default=None):
+		txt = self.lookup(stringID)
+		return(default if txt is None else txt)
+
+	def __contains__(self,stringID):
+		return(not self.lookup(stringID) is None)
+
+	def __getitem__(self,stringID):
+		txt = self.lookup(stringID)
+		if txt is None:
+			raise KeyError(stringID)
+		return(txt)
+
+	def __len__(self):
+		return(self.connect().execute("SELECT COUNT(*) FROM strings").fetchone()[0])
+
+	def items(self):
+		return(self.connect().execute("SELECT id, text FROM strings"))
+
+def loadStringTable(sourceFileName,readEntries):
+	dbFileName = sourceFileName+indexSuffix
+	buildIndex(dbFileName,sourceFileName,readEntries)
+	return(StringTable(dbFileName))
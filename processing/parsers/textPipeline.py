@@ -0,0 +1,114 @@
+import re
+from functools import partial
+try:
+	import re._parser as sre_parse
+except ImportError:
+	import sre_parse
+
+# Text cleaning pipelines for parsers.
+#  Many parsers clean each line with a long chain of str.replace and
+#  re.sub calls. A pipeline is defined once (at module level) from a
+#  list of rules, which are applied in order:
+#    ("replace", old, new)    literal replacement
+#    ("sub", pattern, repl)   regular expression substitution (re.sub)
+#    ("sub", pattern, repl, flags)
+#    ("strip",)               strip whitespace from both ends
+#  e.g.
+#  cleanLine = textPipeline.TextPipeline([
+#  	("replace", "#", ""),
+#  	("sub", " +", " "),
+#  	("strip",)])
+#  > cleanLine("  Hi #there  ")
+#  'Hi there'
+#
+# When the pipeline is compiled, each regular expression is compiled
+#  once, and given a guard: a literal string that any match must contain
+#  (e.g. "(" for "\(.+?\)"). The substitution is skipped if the guard is
+#  not in the text, which is a fast check. Most lines don't contain most
+#  of the things the rules clean up, so most substitutions are skipped.
+#  Literal replacements stay as str.replace, which is already faster
+#  than merging them (into a str.translate table or an alternation regex)
+#  for lines of dialogue. The rules are then turned into a single
+#  function, so there is no overhead for each rule.
+#  See benchmarkTextPipelines.py for timings.
+
+def requiredLiteral(pattern,repl,flags=0):
+	# A string that must be in the text for the substitution to change it,
+	#  or None if there isn't a simple one.
+	parsed = sre_parse.parse(pattern,flags)
+	if (parsed.state.flags | flags) & re.IGNORECASE:
+		return(None)
+	items = list(parsed)
+	# e.g. " +" -> " " only changes the text if there are two spaces
+	if len(items)==1 and items[0][0]==sre_parse.MAX_REPEAT:
+		low,high,sub = items[0][1]
+		sub = list(sub)
+		if low==1 and len(sub)==1 and sub[0][0]==sre_parse.LITERAL and repl==chr(sub[0][1]):
+			return(repl*2)
+	# Longest run of literal characters in the top level of the pattern
+	best = ""
+	run = ""
+	for op,av in items:
+		if op==sre_parse.LITERAL:
+			run += chr(av)
+		else:
+			if op in [sre_parse.MAX_REPEAT,sre_parse.MIN_REPEAT]:
+				low,high,sub = av
+				sub = list(sub)
+				if low>0 and len(sub)==1 and sub[0][0]==sre_parse.LITERAL and len(best)==0:
+					best = chr(sub[0][1])
+			run = ""
+		if len(run)>len(best):
+			best = run
+	if len(best)==0:
+		return(None)
+	return(best)
+
+def compileRules(rules):
+	# Generates a single function that applies the rules in order,
+	#  so there is no per-rule function call overhead.
+	#  Returns (function, number of operations)
+	namespace = {}
+	code = ["def clean(txt):"]
+	for i,rule in enumerate(rules):
+		if rule[0]=="replace":
+			if rule[1]!=rule[2]:
+				namespace["old"+str(i)] = rule[1]
+				namespace["new"+str(i)] = rule[2]
+				code.append("	txt = txt.replace(old"+str(i)+", new"+str(i)+")")
+		elif rule[0]=="sub":
+			flags = rule[3] if len(rule)>3 else 0
+			namespace["sub"+str(i)] = partial(re.compile(rule[1],flags).sub, rule[2])
+			guard = requiredLiteral(rule[1],rule[2],flags)
+			if guard is None:
+				code.append("	txt = sub"+str(i)+"(txt)")
+			else:
+				namespace["guard"+str(i)] = guard
+				code.append("	if guard"+str(i)+" in txt: txt = sub"+str(i)+"(txt)")
+		elif rule[0]=="strip":
+			code.append("	txt = txt.strip()")
+		else:
+			raise ValueError("Unknown text pipeline rule: "+str(rule))
+	code.append("	return(txt)")
+	exec("\n".join(code), namespace)
+	return((namespace["clean"],len(code)-2))
+
+class TextPipeline:
+	def __init__(self,rules):
+		self.rules = list(rules)
+		self.clean,self.numSteps = compileRules(self.rules)
+
+	def __call__(self,txt):
+		return(self.clean(txt))
+
+	def applyRules(self,txt):
+		# Apply the rules one by one, without compiling
+		#  (for checking and benchmarking)
+		for rule in self.rules:
+			if rule[0]=="replace":
+				txt = txt.replace(rule[1],rule[2])
+			elif rule[0]=="sub":
+				txt = re.sub(rule[1],rule[2],txt,flags=rule[3] if len(rule)>3 else 0)
+			elif rule[0]=="strip":
+				txt = txt.strip()
+		return(txt)